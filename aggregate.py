@@ -0,0 +1,348 @@
+"""
+AGGREGATE.PY — Statistiques fusionnables (shards, flux de chunks)
+==================================================================
+Flow: chunks de runs → StreamingSummary.update() → merge() → finalize()
+
+Toutes les statistiques sont fusionnables sans perte d'ordre:
+- Moyennes: une somme par chunk, additionnées par math.fsum (arrondi
+  correct, indépendant de l'ordre de fusion)
+- Quantiles: QuantileSketch, histogramme exact tant qu'il y a peu de
+  valeurs distinctes, puis buckets logarithmiques (précision relative
+  alpha, type DDSketch). Les comptes s'additionnent: fusionner N shards
+  donne exactement le même sketch qu'un seul run sur tous les chunks.
+- Trajectoires: les revenus des runs d'indice < n_sample, clés par indice
+- Intervalles de confiance (bootstrap.py): sommes par groupe de runs
+  (index % N_GROUPS) pour les moyennes et la volatilité, rangs d'ordre
+  lus dans les sketches pour les percentiles
+
+finalize() renvoie un bloc de même structure que simulate.summarize().
+Différence avec summarize(): les percentiles de revenues/capitals
+passent par le sketch (erreur relative ≤ alpha une fois en buckets);
+units reste exact (entiers, peu de valeurs distinctes).
+"""
+
+import math
+
+import numpy as np
+
+from bootstrap import (BOOTSTRAP_SEED, PERCENTILES, bounds, group_bootstrap, group_counts, group_sums,
+                       rank_interval, summary_bounds)
+
+DEFAULT_ALPHA = 0.001
+DEFAULT_MAX_EXACT = 2048
+
+
+class QuantileSketch:
+    """
+    Sketch de quantiles fusionnable d'une colonne.
+
+    Exact (valeur → compte) tant que le nombre de valeurs distinctes reste
+    ≤ max_exact, sinon buckets log de précision relative alpha. Le passage
+    en buckets dépend seulement de l'ensemble des valeurs vues, donc le
+    résultat ne dépend pas de l'ordre des update()/merge().
+    """
+
+    def __init__(self, alpha=DEFAULT_ALPHA, max_exact=DEFAULT_MAX_EXACT):
+        self.alpha = alpha
+        self.max_exact = max_exact
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.log_gamma = math.log(self.gamma)
+        self.exact = {}
+        self.pos = None
+        self.neg = None
+        self.zeros = 0
+        self.count = 0
+
+    @property
+    def is_exact(self):
+        return self.pos is None
+
+    # -------------------------------------------------------------------------
+    # Mise à jour
+    # -------------------------------------------------------------------------
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.count += len(values)
+        if self.is_exact:
+            uniques, counts = np.unique(values, return_counts=True)
+            for value, n in zip(uniques.tolist(), counts.tolist()):
+                self.exact[value] = self.exact.get(value, 0) + n
+            if len(self.exact) > self.max_exact:
+                self._to_buckets()
+        else:
+            self._add_to_buckets(values, np.ones(len(values), dtype=np.int64))
+
+    def merge(self, other):
+        if (other.alpha, other.max_exact) != (self.alpha, self.max_exact):
+            raise ValueError("Sketches incompatibles (alpha / max_exact différents)")
+        self.count += other.count
+        if self.is_exact and other.is_exact:
+            for value, n in other.exact.items():
+                self.exact[value] = self.exact.get(value, 0) + n
+            if len(self.exact) > self.max_exact:
+                self._to_buckets()
+            return
+        if self.is_exact:
+            self._to_buckets()
+        if other.is_exact:
+            values = np.array(list(other.exact.keys()), dtype=np.float64)
+            counts = np.array(list(other.exact.values()), dtype=np.int64)
+            self._add_to_buckets(values, counts)
+        else:
+            for key, n in other.pos.items():
+                self.pos[key] = self.pos.get(key, 0) + n
+            for key, n in other.neg.items():
+                self.neg[key] = self.neg.get(key, 0) + n
+            self.zeros += other.zeros
+
+    def _to_buckets(self):
+        values = np.array(list(self.exact.keys()), dtype=np.float64)
+        counts = np.array(list(self.exact.values()), dtype=np.int64)
+        self.exact = None
+        self.pos, self.neg, self.zeros = {}, {}, 0
+        self._add_to_buckets(values, counts)
+
+    def _add_to_buckets(self, values, counts):
+        nonzero = values != 0
+        self.zeros += int(counts[~nonzero].sum())
+        keys = np.ceil(np.log(np.abs(values[nonzero])) / self.log_gamma).astype(np.int64)
+        signs = values[nonzero] > 0
+        for target, mask in [(self.pos, signs), (self.neg, ~signs)]:
+            uniques, inverse = np.unique(keys[mask], return_inverse=True)
+            sums = np.bincount(inverse, weights=counts[nonzero][mask], minlength=len(uniques))
+            for key, n in zip(uniques.tolist(), sums.astype(np.int64).tolist()):
+                target[key] = target.get(key, 0) + n
+
+    # -------------------------------------------------------------------------
+    # Lecture
+    # -------------------------------------------------------------------------
+
+    def _sorted_values_counts(self):
+        """(valeurs représentatives croissantes, comptes)."""
+        if self.is_exact:
+            items = sorted(self.exact.items())
+            return [v for v, _ in items], [n for _, n in items]
+        mid = 2 / (1 + self.gamma)
+        values, counts = [], []
+        for key in sorted(self.neg, reverse=True):
+            values.append(-mid * self.gamma ** key)
+            counts.append(self.neg[key])
+        if self.zeros:
+            values.append(0.0)
+            counts.append(self.zeros)
+        for key in sorted(self.pos):
+            values.append(mid * self.gamma ** key)
+            counts.append(self.pos[key])
+        return values, counts
+
+    def quantile(self, q):
+        """Quantile q ∈ [0, 1], interpolation linéaire comme np.percentile."""
+        if self.count == 0:
+            return float('nan')
+        values, counts = self._sorted_values_counts()
+        cumulative = np.cumsum(counts)
+        h = (self.count - 1) * q
+        low = int(math.floor(h))
+        high = min(low + 1, self.count - 1)
+        v_low = values[int(np.searchsorted(cumulative, low, side='right'))]
+        v_high = values[int(np.searchsorted(cumulative, high, side='right'))]
+        return v_low + (h - low) * (v_high - v_low)
+
+    # -------------------------------------------------------------------------
+    # Sérialisation (JSON)
+    # -------------------------------------------------------------------------
+
+    def to_dict(self):
+        data = {'alpha': self.alpha, 'max_exact': self.max_exact, 'count': self.count}
+        if self.is_exact:
+            data['exact'] = [list(self.exact.keys()), list(self.exact.values())]
+        else:
+            data['pos'] = [list(self.pos.keys()), list(self.pos.values())]
+            data['neg'] = [list(self.neg.keys()), list(self.neg.values())]
+            data['zeros'] = self.zeros
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['alpha'], data['max_exact'])
+        sketch.count = data['count']
+        if 'exact' in data:
+            sketch.exact = dict(zip(*data['exact']))
+        else:
+            sketch.exact = None
+            sketch.pos = dict(zip(*data['pos']))
+            sketch.neg = dict(zip(*data['neg']))
+            sketch.zeros = data['zeros']
+        return sketch
+
+
+class StreamingSummary:
+    """
+    Résumé fusionnable d'un job actif × mode, alimenté chunk par chunk.
+
+    Args:
+        n_years: horizon
+        initial_capital: pour le rendement final
+        n_sample: nombre de trajectoires de revenus conservées (runs 0..n_sample-1)
+    """
+
+    METRICS = ['revenues', 'capitals', 'units']
+
+    def __init__(self, n_years, initial_capital, n_sample=0, alpha=DEFAULT_ALPHA,
+                 max_exact=DEFAULT_MAX_EXACT):
+        self.n_years = n_years
+        self.initial_capital = initial_capital
+        self.n_sample = n_sample
+        widths = {'revenues': n_years, 'capitals': n_years + 1, 'units': n_years + 1}
+        self.sketches = {
+            metric: [QuantileSketch(alpha, max_exact) for _ in range(widths[metric])]
+            for metric in self.METRICS
+        }
+        self.sketches['returns'] = [QuantileSketch(alpha, max_exact)]
+        self.chunks = {}
+        self.samples = {}
+
+    def update(self, chunk, first_run, revenues, capitals, units):
+        """Ajoute un chunk (chunk = indice global, first_run = indice du 1er run)."""
+        if chunk in self.chunks:
+            raise ValueError(f"Chunk {chunk} déjà agrégé")
+        # Sommes et rendements en float64, même si le chunk est stocké en float32 / int16
+        returns = capitals[:, -1].astype(np.float64) / self.initial_capital - 1
+        arrays = {'revenues': revenues, 'capitals': capitals, 'units': units}
+        self.chunks[chunk] = {
+            'n': len(returns),
+            'sums': {metric: arrays[metric].sum(axis=0, dtype=np.float64).tolist()
+                     for metric in self.METRICS},
+            'return_sum': float(returns.sum()),
+            'return_sumsq': float((returns ** 2).sum()),
+            'groups': {
+                'counts': group_counts(first_run, len(returns)).tolist(),
+                'sums': {metric: group_sums(arrays[metric], first_run).tolist()
+                         for metric in self.METRICS},
+                'return_sums': group_sums(returns, first_run).tolist(),
+                'return_sumsq': group_sums(returns ** 2, first_run).tolist(),
+            },
+        }
+        for metric in self.METRICS:
+            for col, sketch in enumerate(self.sketches[metric]):
+                sketch.update(arrays[metric][:, col])
+        self.sketches['returns'][0].update(returns)
+
+        for i in range(max(0, min(self.n_sample - first_run, len(revenues)))):
+            self.samples[first_run + i] = revenues[i].tolist()
+
+    def merge(self, other):
+        overlap = set(self.chunks) & set(other.chunks)
+        if overlap:
+            raise ValueError(f"Chunks présents dans deux shards: {sorted(overlap)[:10]}")
+        self.chunks.update(other.chunks)
+        self.samples.update(other.samples)
+        for metric, sketches in self.sketches.items():
+            for sketch, other_sketch in zip(sketches, other.sketches[metric]):
+                sketch.merge(other_sketch)
+
+    @property
+    def n_runs(self):
+        return sum(c['n'] for c in self.chunks.values())
+
+    def finalize(self):
+        """Bloc au format simulate.summarize()."""
+        n = self.n_runs
+        chunks = list(self.chunks.values())
+
+        def means(metric):
+            columns = zip(*(c['sums'][metric] for c in chunks))
+            return [math.fsum(column) / n for column in columns]
+
+        def percentiles(metric, q):
+            return [sketch.quantile(q) for sketch in self.sketches[metric]]
+
+        return_mean = math.fsum(c['return_sum'] for c in chunks) / n
+        return_sq = math.fsum(c['return_sumsq'] for c in chunks) / n
+        returns = self.sketches['returns'][0]
+        units_mean = means('units')
+
+        return {
+            'revenues': {
+                'mean': means('revenues'),
+                'p10': percentiles('revenues', 0.10),
+                'p50': percentiles('revenues', 0.50),
+                'p90': percentiles('revenues', 0.90),
+            },
+            'capitals': {
+                'mean': means('capitals'),
+                'p10': percentiles('capitals', 0.10),
+                'p50': percentiles('capitals', 0.50),
+                'p90': percentiles('capitals', 0.90),
+            },
+            'units': {
+                'mean': units_mean,
+                'p10': percentiles('units', 0.10),
+                'p90': percentiles('units', 0.90),
+            },
+            'summary': {
+                'return_mean': return_mean,
+                'return_p10': returns.quantile(0.10),
+                'return_p90': returns.quantile(0.90),
+                'volatility': math.sqrt(max(return_sq - return_mean ** 2, 0.0)),
+                'units_final_mean': units_mean[-1],
+            },
+            'ci': self.confidence_intervals(),
+        }
+
+    def confidence_intervals(self):
+        """Bloc 'ci' (voir bootstrap.py): batch means par groupe, rangs d'ordre des sketches."""
+        n = self.n_runs
+        groups = [self.chunks[chunk]['groups'] for chunk in sorted(self.chunks)]
+        counts = np.sum([g['counts'] for g in groups], axis=0)
+        rng = np.random.default_rng(BOOTSTRAP_SEED)
+
+        def sketch_bounds(metric, q):
+            q_low, q_high = rank_interval(n, q)
+            return {'low': [sketch.quantile(q_low) for sketch in self.sketches[metric]],
+                    'high': [sketch.quantile(q_high) for sketch in self.sketches[metric]]}
+
+        ci = {}
+        for metric in self.METRICS:
+            sums = np.sum([g['sums'][metric] for g in groups], axis=0)
+            means, _ = group_bootstrap(counts, sums, rng=rng)
+            ci[metric] = {'mean': bounds(means)}
+            for percent in PERCENTILES[metric]:
+                ci[metric][f"p{percent}"] = sketch_bounds(metric, percent / 100)
+
+        return_means, return_stds = group_bootstrap(
+            counts, np.sum([g['return_sums'] for g in groups], axis=0),
+            np.sum([g['return_sumsq'] for g in groups], axis=0), rng=rng)
+        returns = self.sketches['returns'][0]
+        ci['summary'] = {
+            'return_mean': summary_bounds(return_means),
+            'return_p10': dict(zip(('low', 'high'), map(returns.quantile, rank_interval(n, 0.10)))),
+            'return_p90': dict(zip(('low', 'high'), map(returns.quantile, rank_interval(n, 0.90)))),
+            'volatility': summary_bounds(return_stds),
+            'units_final_mean': {key: values[-1] for key, values in ci['units']['mean'].items()},
+        }
+        return ci
+
+    def sample_trajectories(self):
+        return [self.samples[i] for i in sorted(self.samples)]
+
+    def to_dict(self):
+        return {
+            'n_years': self.n_years,
+            'initial_capital': self.initial_capital,
+            'n_sample': self.n_sample,
+            'chunks': {str(k): v for k, v in self.chunks.items()},
+            'samples': {str(k): v for k, v in self.samples.items()},
+            'sketches': {metric: [s.to_dict() for s in sketches]
+                         for metric, sketches in self.sketches.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        summary = cls(data['n_years'], data['initial_capital'], data['n_sample'])
+        summary.chunks = {int(k): v for k, v in data['chunks'].items()}
+        summary.samples = {int(k): v for k, v in data['samples'].items()}
+        summary.sketches = {metric: [QuantileSketch.from_dict(s) for s in sketches]
+                            for metric, sketches in data['sketches'].items()}
+        return summary
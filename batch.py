@@ -0,0 +1,309 @@
+"""
+BATCH.PY — Lot de scénarios sur un pool de workers partagé
+===========================================================
+Flow: scenarios/*.json → batch.py → batch_results/<scénario>.results.json
+                                   + batch_results/index.jsonl / index.csv
+
+Ce qu'il fait:
+- Collecte les model.json d'un ou plusieurs dossiers / globs
+- Saute les scénarios dont le results.json en cache est à jour
+  (même contenu de modèle, même moteur, même code)
+- Planifie TOUS les jobs actif × mode (+ trajectoires) de TOUS les
+  scénarios sur un seul ProcessPoolExecutor, les plus lourds d'abord
+- Écrit une ligne de résumé par scénario (JSONL + CSV)
+
+Chaque <scénario>.results.json a exactement la structure de results.json
+(mêmes fonctions que simulate.py), donc charts.py peut le lire tel quel.
+
+Usage:
+    python3 batch.py scenarios/
+    python3 batch.py 'scenarios/*.json' --workers 8 --out batch_results
+    python3 batch.py scenarios/ --force            # ignorer le cache
+"""
+
+import argparse
+import ast
+import csv
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from simulate import (ENGINES, MODES, TRAJ_N_RUNS, asset_names, build_results, calculate_pnl, load_model,
+                      simulate_mode, simulate_trajectories)
+
+SUMMARY_KEYS = ['return_mean', 'return_p10', 'return_p90', 'volatility', 'units_final_mean']
+
+# Le cache est invalidé si le code de simulation change: simulate.py et tous
+# les modules du dépôt qu'il importe, directement ou non (P&L, paramètres, agrégation...)
+CODE_ROOT = 'simulate.py'
+
+# =============================================================================
+# 1. COLLECTE DES SCÉNARIOS
+# =============================================================================
+
+def collect_model_paths(patterns):
+    """Dossiers (→ *.json) et globs, sans les fichiers *.results.json."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, '*.json'))
+        else:
+            matches = glob.glob(pattern)
+        for match in sorted(matches):
+            if match.endswith('.results.json') or match in paths:
+                continue
+            paths.append(match)
+    return paths
+
+
+def scenario_ids(paths):
+    """Identifiant par fichier: le nom sans extension, préfixé du dossier si collision."""
+    stems = [Path(p).stem for p in paths]
+    ids = []
+    for path, stem in zip(paths, stems):
+        if stems.count(stem) > 1:
+            stem = f"{Path(path).parent.name}_{stem}"
+        ids.append(stem)
+    return ids
+
+
+def code_files(root=CODE_ROOT):
+    """Fichiers .py du dépôt atteints depuis root par import (y compris imports locaux aux fonctions)."""
+    here = Path(__file__).resolve().parent
+    files, pending = [], [root]
+    while pending:
+        name = pending.pop()
+        if name in files:
+            continue
+        files.append(name)
+        tree = ast.parse((here / name).read_text(encoding='utf-8'))
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                modules = [node.module]
+            else:
+                continue
+            pending += [f"{module}.py" for module in modules if (here / f"{module}.py").exists()]
+    return sorted(files)
+
+
+def code_digest():
+    digest = hashlib.sha256()
+    here = Path(__file__).resolve().parent
+    for name in code_files():
+        digest.update(name.encode())
+        digest.update((here / name).read_bytes())
+    return digest.hexdigest()
+
+
+def cache_key(model, engine, code):
+    """Empreinte du scénario: contenu du modèle (canonique) + moteur + code."""
+    payload = json.dumps(model, sort_keys=True) + engine + code
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def cached_results(results_path, key):
+    """results.json en cache s'il est à jour, sinon None."""
+    if not results_path.exists():
+        return None
+    try:
+        with open(results_path, 'r') as f:
+            results = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if results.get('meta', {}).get('cache_key') != key:
+        return None
+    return results
+
+# =============================================================================
+# 2. JOBS (exécutés dans les workers)
+# =============================================================================
+
+def job_cost(model, asset_name, kind):
+    """Coût relatif estimé, pour lancer les jobs lourds en premier."""
+    sim = model['simulation']
+    cfg = model['assets'][asset_name]['config']
+    events = cfg['n_units'] * cfg['n_cycles_year']
+    if kind == 'trajectories':
+        return TRAJ_N_RUNS * sim['n_years'] * events
+    # Avec réinvestissement le troupeau grossit: ~4× plus d'événements en moyenne
+    factor = 4 if kind == 'with_reinvest' else 1
+    return sim['n_runs'] * sim['n_years'] * events * factor
+
+
+def run_job(scenario, model, asset_name, kind, engine):
+    if kind == 'trajectories':
+        return scenario, asset_name, kind, simulate_trajectories(model, asset_name)
+    return scenario, asset_name, kind, simulate_mode(model, asset_name, kind, engine)
+
+# =============================================================================
+# 3. INDEX
+# =============================================================================
+
+def summary_row(scenario, path, status, results=None, error=None, elapsed=None):
+    row = {
+        'scenario': scenario,
+        'model': path,
+        'status': status,
+        'error': error,
+        'elapsed_s': None if elapsed is None else round(elapsed, 3),
+    }
+    if results is None:
+        return row
+    meta = results['meta']
+    row.update({
+        'engine': meta.get('engine'),
+        'n_runs': meta['n_runs'],
+        'n_years': meta['n_years'],
+        'seed': meta['seed'],
+        'cache_key': meta.get('cache_key'),
+    })
+    for mode in MODES:
+        for asset_name, block in results['simulation'][mode].items():
+            for key in SUMMARY_KEYS:
+                row[f"{asset_name}.{mode}.{key}"] = block['summary'][key]
+    return row
+
+
+def write_index(rows, out_dir):
+    with open(out_dir / 'index.jsonl', 'w') as f:
+        for row in rows:
+            f.write(json.dumps(row) + '\n')
+
+    columns = []
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns.append(key)
+    with open(out_dir / 'index.csv', 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+# =============================================================================
+# 4. EXÉCUTION
+# =============================================================================
+
+def run_batch(patterns, out_dir='batch_results', workers=None, engine=None, force=False):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    paths = collect_model_paths(patterns)
+    ids = scenario_ids(paths)
+    code = code_digest()
+
+    rows = {}
+    pending = {}
+    for scenario, path in zip(ids, paths):
+        try:
+            model = load_model(path)
+            scenario_engine = engine or model['simulation'].get('engine', 'legacy')
+            key = cache_key(model, scenario_engine, code)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            rows[scenario] = summary_row(scenario, path, 'error', error=f"{type(e).__name__}: {e}")
+            continue
+
+        results_path = out_dir / f"{scenario}.results.json"
+        cached = None if force else cached_results(results_path, key)
+        if cached is not None:
+            rows[scenario] = summary_row(scenario, path, 'cached', cached)
+            continue
+
+        pending[scenario] = {
+            'path': path, 'model': model, 'engine': scenario_engine, 'key': key,
+            'results_path': results_path, 'parts': {mode: {} for mode in MODES},
+            'trajectories': {}, 'remaining': len(model['assets']) * (len(MODES) + 1),
+            'start': time.perf_counter(),
+        }
+
+    print(f"\n{len(paths)} scénarios: {len(pending)} à calculer, "
+          f"{sum(1 for r in rows.values() if r['status'] == 'cached')} en cache")
+
+    jobs = []
+    for scenario, state in pending.items():
+        for asset_name in asset_names(state['model']):
+            for kind in MODES + ['trajectories']:
+                jobs.append((job_cost(state['model'], asset_name, kind), scenario, asset_name, kind))
+    jobs.sort(reverse=True)
+
+    if jobs:
+        print(f"{len(jobs)} jobs sur {workers or os.cpu_count()} workers...")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(run_job, scenario, pending[scenario]['model'], asset_name, kind,
+                            pending[scenario]['engine']): scenario
+                for _, scenario, asset_name, kind in jobs
+            }
+            for future in as_completed(futures):
+                scenario = futures[future]
+                state = pending[scenario]
+                if scenario in rows:
+                    continue  # scénario déjà en erreur
+                try:
+                    _, asset_name, kind, payload = future.result()
+                except Exception as e:
+                    rows[scenario] = summary_row(scenario, state['path'], 'error',
+                                                 error=f"{type(e).__name__}: {e}")
+                    print(f"  ✗ {scenario}: {type(e).__name__}: {e}")
+                    continue
+
+                if kind == 'trajectories':
+                    state['trajectories'][asset_name] = payload
+                else:
+                    state['parts'][kind][asset_name] = payload
+                state['remaining'] -= 1
+                if state['remaining'] == 0:
+                    rows[scenario] = finish_scenario(scenario, state)
+
+    ordered = [rows[scenario] for scenario in ids if scenario in rows]
+    write_index(ordered, out_dir)
+    return ordered
+
+
+def finish_scenario(scenario, state):
+    model = state['model']
+    pnl = {asset_name: calculate_pnl(asset_name, model['assets'][asset_name])
+           for asset_name in asset_names(model)}
+    results = build_results(model, pnl, state['parts'], state['trajectories'],
+                            state['engine'], source=state['path'])
+    results['meta']['cache_key'] = state['key']
+    with open(state['results_path'], 'w') as f:
+        json.dump(results, f, indent=2)
+    elapsed = time.perf_counter() - state['start']
+    print(f"  ✓ {scenario} ({elapsed:.1f}s)")
+    return summary_row(scenario, state['path'], 'computed', results, elapsed=elapsed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lot de scénarios model.json")
+    parser.add_argument('patterns', nargs='+', help="dossiers ou globs de model.json")
+    parser.add_argument('--out', default='batch_results', help="dossier de sortie")
+    parser.add_argument('--workers', type=int, help="taille du pool (défaut: nb de cœurs)")
+    parser.add_argument('--engine', choices=sorted(ENGINES), help="force le moteur pour tous les scénarios")
+    parser.add_argument('--force', action='store_true', help="recalculer même si en cache")
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print("BATCH.PY — Scénarios sur pool partagé")
+    print("=" * 80)
+
+    start = time.perf_counter()
+    rows = run_batch(args.patterns, args.out, args.workers, args.engine, args.force)
+
+    print("\n" + "=" * 80)
+    counts = {status: sum(1 for r in rows if r['status'] == status)
+              for status in ['computed', 'cached', 'error']}
+    print(f"✓ {counts['computed']} calculés, {counts['cached']} en cache, "
+          f"{counts['error']} en erreur ({time.perf_counter() - start:.1f}s)")
+    print(f"✓ Index: {args.out}/index.jsonl, {args.out}/index.csv")
+    print("=" * 80)
+    return 1 if counts['error'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,86 @@
+"""
+BENCHMARK.PY — Coût des options du moteur fast
+===============================================
+Flow: model.json → benchmark.py → tableau des temps (stdout)
+
+Ce qu'il fait:
+- Chronomètre simulate_asset_fast par actif × mode, avec et sans
+  capital_events (marquage au marché annuel)
+- Meilleur de --repeat essais (perf_counter), même seed pour les deux
+  variantes
+- Affiche le surcoût du modèle enrichi et l'effet sur le rendement moyen
+
+Usage:
+    python3 benchmark.py
+    python3 benchmark.py --n-runs 100000 --repeat 5
+"""
+
+import argparse
+import time
+
+from simulate import MODES, asset_names, calculate_pnl, load_model, mode_cap, run_engine
+
+
+def best_time(fn, repeat):
+    """Meilleur temps de repeat appels, et le résultat du dernier."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_job(model, asset_name, mode, n_runs, seed, repeat):
+    asset_data = model['assets'][asset_name]
+    pnl_data = calculate_pnl(asset_name, asset_data)
+    n_years = model['simulation']['n_years']
+    row = {'asset': asset_name, 'mode': mode}
+    for label, capital_events in [('base', False), ('events', True)]:
+        elapsed, (_, capitals, _) = best_time(
+            lambda: run_engine('fast', asset_name, asset_data, pnl_data, n_runs, n_years,
+                               mode_cap(mode, pnl_data), seed, capital_events=capital_events),
+            repeat)
+        row[f"{label}_s"] = elapsed
+        row[f"{label}_return"] = float((capitals[:, -1] / pnl_data['capital_total'] - 1).mean())
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Coût des options du moteur fast")
+    parser.add_argument('--model', default='model.json')
+    parser.add_argument('--n-runs', type=int, help="défaut: simulation.n_runs")
+    parser.add_argument('--seed', type=int, help="défaut: simulation.seed")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    model = load_model(args.model)
+    n_runs = args.n_runs or model['simulation']['n_runs']
+    seed = model['simulation']['seed'] if args.seed is None else args.seed
+
+    print("=" * 80)
+    print(f"BENCHMARK.PY — moteur fast, {n_runs} runs × {model['simulation']['n_years']} ans, "
+          f"meilleur de {args.repeat}")
+    print("=" * 80)
+    print(f"\n{'Actif':<12} {'Mode':<18} {'Base':>9} {'+Events':>9} {'Surcoût':>9} "
+          f"{'Return base':>12} {'Return +ev':>11}")
+    print("-" * 86)
+
+    total_base = total_events = 0.0
+    for asset_name in asset_names(model):
+        for mode in MODES:
+            row = bench_job(model, asset_name, mode, n_runs, seed, args.repeat)
+            total_base += row['base_s']
+            total_events += row['events_s']
+            print(f"{asset_name:<12} {mode:<18} {row['base_s']:>8.3f}s {row['events_s']:>8.3f}s "
+                  f"{row['events_s'] / row['base_s'] - 1:>+8.1%} "
+                  f"{row['base_return']:>12.1%} {row['events_return']:>11.1%}")
+
+    print("-" * 86)
+    print(f"{'Total':<31} {total_base:>8.3f}s {total_events:>8.3f}s "
+          f"{total_events / total_base - 1:>+8.1%}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,208 @@
+"""
+BOOTSTRAP.PY — Intervalles de confiance Monte Carlo des statistiques publiées
+==============================================================================
+Flow: runs d'un job → summarize() / StreamingSummary.finalize() → bloc 'ci' de results.json
+
+Chaque statistique de results.json (moyennes, p10 / p50 / p90 par année,
+return_mean, return_p10, return_p90, volatility, units_final_mean) est une
+estimation sur n_runs tirages: son IC à 95 % dit ce que vaut le chiffre.
+Aucune boucle Python sur les rééchantillonnages:
+
+1. Percentiles, runs en mémoire: bootstrap exact par statistique d'ordre.
+   Un rééchantillon de taille n est x_(⌈n·U_i⌉) avec U_i uniformes; sa r-ième
+   valeur triée est donc x_(⌈n·U_(r)⌉), U_(r) ~ Beta(r, n - r + 1). N_BOOTSTRAP
+   tirages Beta donnent N_BOOTSTRAP percentiles rééchantillonnés (interpolés
+   comme np.percentile) sans construire un seul rééchantillon. Seules les
+   valeurs triées autour du rang r servent (order_band): quelques % de la
+   colonne, situés par un sous-échantillon.
+
+2. Moyennes et volatilité: bootstrap par groupes. Le run d'index global i
+   tombe dans le groupe i % N_GROUPS; on garde par groupe effectif, somme
+   (et somme des carrés des rendements), puis les N_BOOTSTRAP
+   rééchantillonnages sont des poids multinomiaux sur les groupes: un
+   produit matriciel (N_BOOTSTRAP × N_GROUPS) · (N_GROUPS × colonnes).
+   Les groupes ne dépendent que de l'index du run: chunks (--memory-budget)
+   et shards les accumulent sans rien garder par run (batch means).
+
+3. Percentiles, runs streamés (sketch): intervalle par statistique d'ordre,
+   rangs n·q ∓ z·√(n·q·(1-q)), lus dans le sketch. C'est la limite du
+   bootstrap du point 1 (loi binomiale du nombre de runs sous le quantile).
+
+Le générateur du bootstrap a son propre seed (BOOTSTRAP_SEED): les IC sont
+reproductibles et ne touchent pas aux flux de la simulation.
+"""
+
+import math
+
+import numpy as np
+
+CI_LEVEL = 0.95
+Z_CI = 1.959963984540054  # Φ⁻¹(0.975)
+N_BOOTSTRAP = 1000
+N_GROUPS = 64
+SUBSAMPLE = 4096
+BOOTSTRAP_SEED = 20260108
+
+# =============================================================================
+# 1. SOMMES PAR GROUPE
+# =============================================================================
+
+def group_counts(first_run, n_runs, n_groups=N_GROUPS):
+    """Nombre de runs [first_run, first_run + n_runs) par groupe (index % n_groups)."""
+    counts = np.full(n_groups, n_runs // n_groups, dtype=np.int64)
+    start = first_run % n_groups
+    extra = (start + np.arange(n_runs % n_groups)) % n_groups
+    counts[extra] += 1
+    return counts
+
+
+def group_sums(values, first_run, n_groups=N_GROUPS):
+    """
+    Sommes par groupe des lignes de values (runs first_run...), en float64.
+
+    Returns:
+        array (n_groups,) + values.shape[1:]
+    """
+    values = np.asarray(values)
+    sums = np.zeros((n_groups,) + values.shape[1:])
+    # Tête jusqu'au prochain multiple de n_groups, corps remodelé sans copie, queue
+    head = min((-first_run) % n_groups, len(values))
+    start = first_run % n_groups
+    sums[start:start + head] += values[:head]
+    n_body = (len(values) - head) // n_groups * n_groups
+    if n_body:
+        body = values[head:head + n_body].reshape((-1, n_groups) + values.shape[1:])
+        sums += body.sum(axis=0, dtype=np.float64)
+    tail = values[head + n_body:]
+    sums[:len(tail)] += tail
+    return sums
+
+
+def interval(samples):
+    """Bornes basse et haute (percentiles 2,5 % / 97,5 %) d'échantillons bootstrap (axe 0)."""
+    alpha = (1 - CI_LEVEL) / 2
+    return np.quantile(samples, [alpha, 1 - alpha], axis=0)
+
+
+def group_bootstrap(counts, sums, sumsq=None, rng=None):
+    """
+    Moyennes (et écarts-types si sumsq) rééchantillonnées par poids
+    multinomiaux sur les groupes.
+
+    Returns:
+        (moyennes [N_BOOTSTRAP, ...], écarts-types [N_BOOTSTRAP, ...] ou None)
+    """
+    rng = np.random.default_rng(BOOTSTRAP_SEED) if rng is None else rng
+    n_groups = len(counts)
+    weights = rng.multinomial(n_groups, np.full(n_groups, 1 / n_groups), size=N_BOOTSTRAP)
+    flat = sums.reshape(n_groups, -1)
+    n = np.maximum(weights @ counts, 1).astype(np.float64)
+    means = (weights @ flat) / n[:, None]
+    stds = None
+    if sumsq is not None:
+        second = (weights @ sumsq.reshape(n_groups, -1)) / n[:, None]
+        stds = np.sqrt(np.maximum(second - means ** 2, 0.0)).reshape((N_BOOTSTRAP,) + sums.shape[1:])
+    return means.reshape((N_BOOTSTRAP,) + sums.shape[1:]), stds
+
+# =============================================================================
+# 2. PERCENTILES
+# =============================================================================
+
+def order_band(column, low, high):
+    """
+    Valeurs triées de rangs low..high (0-based) d'une colonne, sans la trier.
+
+    Un sous-échantillon régulier (SUBSAMPLE valeurs, les runs sont iid)
+    situe la bande en valeur avec 6 écarts-types de marge; seules les
+    valeurs dans la fenêtre sont comptées puis triées (quelques % de la
+    colonne). Si la fenêtre ne contient pas la bande: np.partition.
+    """
+    n = len(column)
+    step = n // SUBSAMPLE
+    if step > 1:
+        sub = np.sort(column[::step])
+        m = len(sub)
+        a, b = low / n, high / n
+        margin = 6 * math.sqrt(max(a * (1 - b), 1 / m) / m)
+        i_low, i_high = int((a - margin) * m), int(math.ceil((b + margin) * m))
+        lo = sub[i_low] if i_low >= 0 else -np.inf
+        hi = sub[i_high] if i_high < m else np.inf
+        below = int(np.count_nonzero(column < lo))
+        window = column[(column >= lo) & (column <= hi)]
+        if below <= low and below + len(window) > high:
+            return np.sort(window)[low - below:high - below + 1]
+    return np.sort(np.partition(column, [low, high])[low:high + 1])
+
+
+def percentile_bootstrap(values, percents, rng=None):
+    """
+    Percentiles rééchantillonnés de chaque colonne de values (n, colonnes),
+    par statistiques d'ordre (voir l'en-tête). Mêmes tirages Beta pour toutes
+    les colonnes (comme un même rééchantillon).
+
+    Returns:
+        {percent: array [N_BOOTSTRAP, colonnes]}
+    """
+    rng = np.random.default_rng(BOOTSTRAP_SEED) if rng is None else rng
+    n = len(values)
+    columns = np.ascontiguousarray(np.asarray(values).T)  # colonnes contiguës: order_band 3× plus rapide
+    samples = {}
+    for percent in percents:
+        # Même interpolation linéaire que np.percentile: rang h = q·(n - 1)
+        h = percent / 100 * (n - 1)
+        r = int(math.floor(h))
+        frac = h - r
+        u = rng.beta(r + 1, n - r, size=N_BOOTSTRAP)
+        u_next = u + (1 - u) * rng.beta(1, n - r - 1, size=N_BOOTSTRAP) if frac > 0 else u
+        below, above = (np.clip(np.ceil(n * v).astype(np.int64) - 1, 0, n - 1) for v in (u, u_next))
+        low, high = int(below.min()), int(above.max())
+        band = np.stack([order_band(column, low, high) for column in columns], axis=1).astype(np.float64)
+        samples[percent] = band[below - low] + frac * (band[above - low] - band[below - low])
+    return samples
+
+
+def rank_interval(n, q):
+    """Quantiles (q_bas, q_haut) dont les valeurs bornent l'IC du quantile q (statistique d'ordre)."""
+    half = Z_CI * math.sqrt(q * (1 - q) / max(n, 1))
+    return max(q - half, 0.0), min(q + half, 1.0)
+
+# =============================================================================
+# 3. BLOC 'ci' DE results.json
+# =============================================================================
+
+PERCENTILES = {'revenues': [10, 50, 90], 'capitals': [10, 50, 90], 'units': [10, 90]}
+
+
+def bounds(samples):
+    low, high = interval(samples)
+    return {'low': low.tolist(), 'high': high.tolist()}
+
+
+def summary_bounds(samples):
+    low, high = interval(samples)
+    return {'low': float(low), 'high': float(high)}
+
+
+def summarize_ci(rev, cap, units, returns):
+    """IC des statistiques de simulate.summarize() (runs en mémoire)."""
+    rng = np.random.default_rng(BOOTSTRAP_SEED)
+    arrays = {'revenues': rev, 'capitals': cap, 'units': units}
+    counts = group_counts(0, len(returns))
+    ci = {}
+    for metric, values in arrays.items():
+        means, _ = group_bootstrap(counts, group_sums(values, 0), rng=rng)
+        ci[metric] = {'mean': bounds(means)}
+        for percent, samples in percentile_bootstrap(values, PERCENTILES[metric], rng).items():
+            ci[metric][f"p{percent}"] = bounds(samples)
+
+    return_means, return_stds = group_bootstrap(counts, group_sums(returns, 0),
+                                                group_sums(returns ** 2, 0), rng=rng)
+    return_pct = percentile_bootstrap(returns[:, None], [10, 90], rng)
+    ci['summary'] = {
+        'return_mean': summary_bounds(return_means),
+        'return_p10': summary_bounds(return_pct[10][:, 0]),
+        'return_p90': summary_bounds(return_pct[90][:, 0]),
+        'volatility': summary_bounds(return_stds),
+        'units_final_mean': {key: values[-1] for key, values in ci['units']['mean'].items()},
+    }
+    return ci
@@ -0,0 +1,87 @@
+"""
+BUDGET.PY — Taille des chunks sous budget mémoire
+==================================================
+Flow: simulate.py --memory-budget 512M → plan_chunks() → chunks streamés → StreamingSummary
+
+Sans budget, un job alloue revenues / capitals / units pour tous les runs
+d'un coup: la mémoire croît avec n_runs × n_years. Avec un budget, chaque
+job actif × mode est simulé par chunks de runs et agrégé au fil de l'eau
+(aggregate.StreamingSummary): seul un chunk existe en mémoire.
+
+Modèle de coût (octets):
+- RESERVE: interpréteur, numpy, sketches de quantiles (fixe)
+- par run: matrices stockées (revenues, capitals en float64 ou float32,
+  units en int16/int32), sorties par cycle (--cycles), vecteurs de travail
+  du moteur (dont la matrice des sommes triangulaires exactes, au plus
+  EXACT_SUM_MAX colonnes: indépendante de la taille du troupeau) et de
+  l'agrégation
+- par run, avec simulation.shocks: facteurs communs (runs × années × actifs)
+  et leurs temporaires (mots Philox, Box-Muller), SHOCK_BYTES par valeur
+
+La moitié du budget utile va aux chunks: marge pour les temporaires numpy.
+
+Le plan dépend seulement du budget et de model.json: même budget, mêmes
+chunks, mêmes résultats.
+"""
+
+import re
+
+import numpy as np
+
+from engine import EXACT_SUM_MAX, max_units, units_dtype
+
+MB = 1024 ** 2
+RESERVE = 96 * MB
+BYTES_PER_RUN = 160 + 20 * EXACT_SUM_MAX
+MIN_CHUNK = 1000
+SHOCK_BYTES = 64
+
+_SIZE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([kKmMgG]?)[oObB]?\s*$')
+_UNITS = {'': 1, 'k': 1024, 'm': MB, 'g': 1024 ** 3}
+
+
+def parse_size(text):
+    """'512M', '2G', '1.5g', '300000000' → octets."""
+    match = _SIZE.match(str(text))
+    if not match:
+        raise ValueError(f"taille invalide: {text!r} (ex.: 512M, 2G)")
+    value, unit = match.groups()
+    return int(float(value) * _UNITS[unit.lower()])
+
+
+def run_bytes(n_years, float32, units_itemsize, n_periods_out=0, n_shock_factors=0):
+    """Octets par run: matrices stockées (+ sorties par cycle, facteurs de chocs) + vecteurs de travail."""
+    float_itemsize = 4 if float32 else 8
+    stored = n_years * float_itemsize + (n_years + 1) * (float_itemsize + units_itemsize)
+    cycles = n_periods_out * (float_itemsize + 2 * units_itemsize)
+    shocks = n_years * n_shock_factors * SHOCK_BYTES
+    return stored + cycles + shocks + BYTES_PER_RUN
+
+
+def plan_chunks(budget, asset_data, pnl_data, n_runs, n_years, cap, float32=False,
+                cycles=False, n_shock_factors=0):
+    """
+    Taille de chunk d'un job pour tenir dans budget (octets).
+    cycles: compter les sorties par cycle (n_years × n_cycles_year périodes).
+    n_shock_factors: actifs du modèle si simulation.shocks (facteurs tirés par chunk).
+
+    Returns:
+        dict {'chunk_size', 'n_chunks', 'units_dtype'}
+
+    Raises:
+        ValueError: budget trop petit pour MIN_CHUNK runs
+    """
+    bound = max_units(asset_data, pnl_data, n_years, cap)
+    dtype = np.dtype(units_dtype(bound))
+    available = budget - RESERVE
+    n_periods_out = n_years * asset_data['config']['n_cycles_year'] if cycles else 0
+    per_run = run_bytes(n_years, float32, dtype.itemsize, n_periods_out, n_shock_factors)
+    chunk_size = min(n_runs, available // 2 // per_run) if available > 0 else 0
+    if chunk_size < min(n_runs, MIN_CHUNK):
+        raise ValueError(f"budget {budget / MB:.0f} Mo trop petit: minimum ~"
+                         f"{(RESERVE + 2 * MIN_CHUNK * per_run) / MB:.0f} Mo")
+    return {
+        'chunk_size': int(chunk_size),
+        'n_chunks': -(-n_runs // int(chunk_size)),
+        'units_dtype': dtype.name,
+    }
@@ -3,28 +3,43 @@ CHARTS.PY — 14 Visualisations (pure lecture)
 =============================================
 Flow: results.json → charts.py → charts/*.png
 
+Usage:
+    python3 charts.py
+    python3 charts.py --results runs/results.json --out-dir runs/charts
+
 AUCUNE simulation ici. Tout vient de results.json.
+
+CHARTS liste chaque chart avec les blocs de results.json qu'il lit
+('without_reinvest.revenues', 'trajectories', ...): render(results, names)
+ne redessine que ceux demandés (watch.py redessine ceux dont un bloc a changé).
 """
 
+import argparse
 import json
+import os
 import numpy as np
 import matplotlib.pyplot as plt
 from pathlib import Path
 
-print("=" * 80)
-print("CHARTS.PY — Génération 14 visualisations")
-print("=" * 80)
-
 # =============================================================================
 # 1. LECTURE
 # =============================================================================
 
-with open('results.json', 'r') as f:
-    results = json.load(f)
+# Renseignés par use_results() / render() avant de dessiner
+OUT_DIR = 'charts'
+results = None
+N_YEARS = None
+years_1 = None
+years_0 = None
 
-Path('charts').mkdir(exist_ok=True)
 
-N_YEARS = results['meta']['n_years']
+def use_results(data):
+    """Rend data (dict results.json) visible des fonctions chart_*."""
+    global results, N_YEARS, years_1, years_0
+    results = data
+    N_YEARS = results['meta']['n_years']
+    years_1 = list(range(1, N_YEARS + 1))
+    years_0 = list(range(N_YEARS + 1))
 
 # =============================================================================
 # 2. CONFIGURATION STYLE
@@ -42,6 +57,25 @@ LABELS = {
     'embouche': 'Embouche'
 }
 
+# Actifs ajoutés dans model.json sans entrée dans COLORS/LABELS
+DEFAULT_COLORS = ['#9b59b6', '#f39c12', '#1abc9c', '#34495e', '#e67e22', '#7f8c8d']
+MARKERS = ['o', 's', '^', 'D', 'v', 'P']
+
+
+def asset_list():
+    """Actifs présents dans results.json, dans l'ordre de model.json."""
+    return list(results['simulation']['without_reinvest'])
+
+
+def asset_color(asset):
+    if asset in COLORS:
+        return COLORS[asset]
+    return DEFAULT_COLORS[asset_list().index(asset) % len(DEFAULT_COLORS)]
+
+
+def asset_label(asset):
+    return LABELS.get(asset, asset.replace('_', ' ').capitalize())
+
 plt.rcParams.update({
     'font.family': 'DejaVu Sans',
     'font.size': 11,
@@ -54,9 +88,6 @@ plt.rcParams.update({
     'grid.alpha': 0.3
 })
 
-years_1 = list(range(1, N_YEARS + 1))
-years_0 = list(range(N_YEARS + 1))
-
 # =============================================================================
 # 3. CHARTS SANS RÉINVESTISSEMENT (A, B, C, D)
 # =============================================================================
@@ -67,12 +98,12 @@ def chart_a_revenus():
     
     data = results['simulation']['without_reinvest']
     
-    for asset in ['embouche', 'betail', 'immobilier']:
+    for asset in reversed(asset_list()):
         r = data[asset]['revenues']
         ax.fill_between(years_1, np.array(r['p10'])/1e6, np.array(r['p90'])/1e6,
-                        color=COLORS[asset], alpha=0.2)
-        ax.plot(years_1, np.array(r['mean'])/1e6, color=COLORS[asset],
-                linewidth=2.5, marker='o', label=LABELS[asset])
+                        color=asset_color(asset), alpha=0.2)
+        ax.plot(years_1, np.array(r['mean'])/1e6, color=asset_color(asset),
+                linewidth=2.5, marker='o', label=asset_label(asset))
     
     ax.axhline(y=0, color='gray', linestyle='-', linewidth=0.5)
     ax.set_xlabel('Année')
@@ -82,7 +113,7 @@ def chart_a_revenus():
     ax.set_xticks(years_1)
     
     plt.tight_layout()
-    plt.savefig('charts/chart_a_revenus.png', dpi=150)
+    plt.savefig(f"{OUT_DIR}/chart_a_revenus.png", dpi=150)
     plt.close()
     print("✓ chart_a_revenus.png")
 
@@ -93,12 +124,12 @@ def chart_b_wealth():
     
     data = results['simulation']['without_reinvest']
     
-    for asset in ['embouche', 'betail', 'immobilier']:
+    for asset in reversed(asset_list()):
         c = data[asset]['capitals']
         ax.fill_between(years_0, np.array(c['p10'])/1e6, np.array(c['p90'])/1e6,
-                        color=COLORS[asset], alpha=0.2)
-        ax.plot(years_0, np.array(c['mean'])/1e6, color=COLORS[asset],
-                linewidth=2.5, marker='o', label=LABELS[asset])
+                        color=asset_color(asset), alpha=0.2)
+        ax.plot(years_0, np.array(c['mean'])/1e6, color=asset_color(asset),
+                linewidth=2.5, marker='o', label=asset_label(asset))
     
     ax.axhline(y=1, color='gray', linestyle='--', linewidth=1, label='Capital initial')
     ax.set_xlabel('Année')
@@ -108,7 +139,7 @@ def chart_b_wealth():
     ax.set_xticks(years_0)
     
     plt.tight_layout()
-    plt.savefig('charts/chart_b_wealth.png', dpi=150)
+    plt.savefig(f"{OUT_DIR}/chart_b_wealth.png", dpi=150)
     plt.close()
     print("✓ chart_b_wealth.png")
 
@@ -120,11 +151,11 @@ def chart_c_bulles():
     data = results['simulation']['without_reinvest']
     
     points = []
-    for asset in ['immobilier', 'betail', 'embouche']:
+    for asset in asset_list():
         s = data[asset]['summary']
         vol = s['volatility'] * 100
         ret = s['return_mean'] * 100
-        points.append((LABELS[asset], vol, ret, COLORS[asset]))
+        points.append((asset_label(asset), vol, ret, asset_color(asset)))
     
     for name, vol, ret, color in points:
         ax.scatter(vol, ret, s=800, c=color, alpha=0.7, edgecolors='white', linewidth=2)
@@ -140,7 +171,7 @@ def chart_c_bulles():
     ax.set_ylim(0, max(p[2] for p in points) * 1.2)
     
     plt.tight_layout()
-    plt.savefig('charts/chart_c_bulles.png', dpi=150)
+    plt.savefig(f"{OUT_DIR}/chart_c_bulles.png", dpi=150)
     plt.close()
     print("✓ chart_c_bulles.png")
 
@@ -152,11 +183,11 @@ def chart_d_zones():
     data = results['simulation']['without_reinvest']
     
     points = []
-    for asset in ['immobilier', 'betail', 'embouche']:
+    for asset in asset_list():
         s = data[asset]['summary']
         vol = s['volatility'] * 100
         ret = s['return_mean'] * 100
-        points.append((LABELS[asset], vol, ret, COLORS[asset]))
+        points.append((asset_label(asset), vol, ret, asset_color(asset)))
     
     max_vol = max(p[1] for p in points) * 1.4
     max_ret = max(p[2] for p in points) * 1.3
@@ -182,7 +213,7 @@ def chart_d_zones():
     ax.set_ylim(0, max_ret)
     
     plt.tight_layout()
-    plt.savefig('charts/chart_d_zones.png', dpi=150)
+    plt.savefig(f"{OUT_DIR}/chart_d_zones.png", dpi=150)
     plt.close()
     print("✓ chart_d_zones.png")
 
@@ -196,12 +227,12 @@ def chart_a_revenus_reinvest():
     
     data = results['simulation']['with_reinvest']
     
-    for asset in ['embouche', 'betail', 'immobilier']:
+    for asset in reversed(asset_list()):
         r = data[asset]['revenues']
         ax.fill_between(years_1, np.array(r['p10'])/1e6, np.array(r['p90'])/1e6,
-                        color=COLORS[asset], alpha=0.2)
-        ax.plot(years_1, np.array(r['mean'])/1e6, color=COLORS[asset],
-                linewidth=2.5, marker='o', label=LABELS[asset])
+                        color=asset_color(asset), alpha=0.2)
+        ax.plot(years_1, np.array(r['mean'])/1e6, color=asset_color(asset),
+                linewidth=2.5, marker='o', label=asset_label(asset))
     
     ax.axhline(y=0, color='gray', linestyle='-', linewidth=0.5)
     ax.set_xlabel('Année')
@@ -211,7 +242,7 @@ def chart_a_revenus_reinvest():
     ax.set_xticks(years_1)
     
     plt.tight_layout()
-    plt.savefig('charts/chart_a_revenus_reinvest.png', dpi=150)
+    plt.savefig(f"{OUT_DIR}/chart_a_revenus_reinvest.png", dpi=150)
     plt.close()
     print("✓ chart_a_revenus_reinvest.png")
 
@@ -222,12 +253,12 @@ def chart_b_capital_reinvest():
     
     data = results['simulation']['with_reinvest']
     
-    for asset in ['embouche', 'betail', 'immobilier']:
+    for asset in reversed(asset_list()):
         c = data[asset]['capitals']
         ax.fill_between(years_0, np.array(c['p10'])/1e6, np.array(c['p90'])/1e6,
-                        color=COLORS[asset], alpha=0.2)
-        ax.plot(years_0, np.array(c['mean'])/1e6, color=COLORS[asset],
-                linewidth=2.5, marker='o', label=LABELS[asset])
+                        color=asset_color(asset), alpha=0.2)
+        ax.plot(years_0, np.array(c['mean'])/1e6, color=asset_color(asset),
+                linewidth=2.5, marker='o', label=asset_label(asset))
     
     ax.axhline(y=1, color='gray', linestyle='--', linewidth=1, label='Capital initial')
     ax.set_xlabel('Année')
@@ -237,7 +268,7 @@ def chart_b_capital_reinvest():
     ax.set_xticks(years_0)
     
     plt.tight_layout()
-    plt.savefig('charts/chart_b_capital_reinvest.png', dpi=150)
+    plt.savefig(f"{OUT_DIR}/chart_b_capital_reinvest.png", dpi=150)
     plt.close()
     print("✓ chart_b_capital_reinvest.png")
 
@@ -249,11 +280,11 @@ def chart_c_bulles_reinvest():
     data = results['simulation']['with_reinvest']
     
     points = []
-    for asset in ['immobilier', 'betail', 'embouche']:
+    for asset in asset_list():
         s = data[asset]['summary']
         vol = s['volatility'] * 100
         ret = s['return_mean'] * 100
-        points.append((LABELS[asset], vol, ret, COLORS[asset]))
+        points.append((asset_label(asset), vol, ret, asset_color(asset)))
     
     for name, vol, ret, color in points:
         ax.scatter(vol, ret, s=800, c=color, alpha=0.7, edgecolors='white', linewidth=2)
@@ -269,7 +300,7 @@ def chart_c_bulles_reinvest():
     ax.set_ylim(0, max(p[2] for p in points) * 1.2)
     
     plt.tight_layout()
-    plt.savefig('charts/chart_c_bulles_reinvest.png', dpi=150)
+    plt.savefig(f"{OUT_DIR}/chart_c_bulles_reinvest.png", dpi=150)
     plt.close()
     print("✓ chart_c_bulles_reinvest.png")
 
@@ -281,11 +312,11 @@ def chart_d_zones_reinvest():
     data = results['simulation']['with_reinvest']
     
     points = []
-    for asset in ['immobilier', 'betail', 'embouche']:
+    for asset in asset_list():
         s = data[asset]['summary']
         vol = s['volatility'] * 100
         ret = s['return_mean'] * 100
-        points.append((LABELS[asset], vol, ret, COLORS[asset]))
+        points.append((asset_label(asset), vol, ret, asset_color(asset)))
     
     max_vol = max(p[1] for p in points) * 1.2
     max_ret = max(p[2] for p in points) * 1.2
@@ -308,7 +339,7 @@ def chart_d_zones_reinvest():
     ax.set_ylim(0, max_ret)
     
     plt.tight_layout()
-    plt.savefig('charts/chart_d_zones_reinvest.png', dpi=150)
+    plt.savefig(f"{OUT_DIR}/chart_d_zones_reinvest.png", dpi=150)
     plt.close()
     print("✓ chart_d_zones_reinvest.png")
 
@@ -317,15 +348,17 @@ def chart_d_zones_reinvest():
 # =============================================================================
 
 def chart_e_comparaison():
-    """E — Comparaison avec/sans réinvestissement (3 subplots)"""
-    fig, axes = plt.subplots(1, 3, figsize=(14, 5))
+    """E — Comparaison avec/sans réinvestissement (un subplot par actif)"""
+    n = len(asset_list())
+    fig, axes = plt.subplots(1, n, figsize=(14 * n / 3, 5), squeeze=False)
+    axes = axes[0]
     
     data_no = results['simulation']['without_reinvest']
     data_yes = results['simulation']['with_reinvest']
     
-    for idx, asset in enumerate(['immobilier', 'betail', 'embouche']):
+    for idx, asset in enumerate(asset_list()):
         ax = axes[idx]
-        color = COLORS[asset]
+        color = asset_color(asset)
         
         # Sans réinvestissement
         c_no = np.array(data_no[asset]['capitals']['mean']) / 1e6
@@ -342,13 +375,13 @@ def chart_e_comparaison():
         ax.axhline(y=1, color='gray', linestyle=':', linewidth=1)
         ax.set_xlabel('Année')
         ax.set_ylabel('Richesse (M FCFA)' if idx == 0 else '')
-        ax.set_title(LABELS[asset], fontsize=12, fontweight='bold')
+        ax.set_title(asset_label(asset), fontsize=12, fontweight='bold')
         ax.legend(loc='upper left', fontsize=9)
         ax.set_xticks(years_0)
     
     plt.suptitle('E — Impact du réinvestissement sur 5 ans', fontsize=14, fontweight='bold')
     plt.tight_layout()
-    plt.savefig('charts/chart_e_comparaison.png', dpi=150)
+    plt.savefig(f"{OUT_DIR}/chart_e_comparaison.png", dpi=150)
     plt.close()
     print("✓ chart_e_comparaison.png")
 
@@ -359,10 +392,10 @@ def chart_f_units():
     
     data = results['simulation']['with_reinvest']
     
-    for asset in ['embouche', 'betail', 'immobilier']:
+    for asset in reversed(asset_list()):
         u = data[asset]['units']
-        ax.fill_between(years_0, u['p10'], u['p90'], color=COLORS[asset], alpha=0.2)
-        ax.plot(years_0, u['mean'], color=COLORS[asset], linewidth=2.5, marker='o', label=LABELS[asset])
+        ax.fill_between(years_0, u['p10'], u['p90'], color=asset_color(asset), alpha=0.2)
+        ax.plot(years_0, u['mean'], color=asset_color(asset), linewidth=2.5, marker='o', label=asset_label(asset))
     
     ax.set_xlabel('Année')
     ax.set_ylabel("Nombre d'unités")
@@ -371,20 +404,22 @@ def chart_f_units():
     ax.set_xticks(years_0)
     
     plt.tight_layout()
-    plt.savefig('charts/chart_f_units.png', dpi=150)
+    plt.savefig(f"{OUT_DIR}/chart_f_units.png", dpi=150)
     plt.close()
     print("✓ chart_f_units.png")
 
 
 def chart_g_trajectoires():
     """G — 30 trajectoires par actif (lu depuis results.json)"""
-    fig, axes = plt.subplots(1, 3, figsize=(15, 5))
+    n = len(asset_list())
+    fig, axes = plt.subplots(1, n, figsize=(5 * n, 5), squeeze=False)
+    axes = axes[0]
     
     traj_data = results['trajectories']['data']
     
-    for idx, asset_name in enumerate(['immobilier', 'betail', 'embouche']):
+    for idx, asset_name in enumerate(asset_list()):
         ax = axes[idx]
-        color = COLORS[asset_name]
+        color = asset_color(asset_name)
         
         # Lire les 30 trajectoires pré-calculées
         trajectories = np.array(traj_data[asset_name])  # 30 × 5
@@ -398,14 +433,14 @@ def chart_g_trajectoires():
         
         ax.set_xlabel('Année')
         ax.set_ylabel('Revenus (M FCFA)' if idx == 0 else '')
-        ax.set_title(LABELS[asset_name], fontsize=13, fontweight='bold')
+        ax.set_title(asset_label(asset_name), fontsize=13, fontweight='bold')
         ax.set_xticks(years_1)
         ax.legend(loc='upper right')
         ax.set_ylim(bottom=0)
     
     plt.suptitle('G — Volatilité des revenus (30 trajectoires)', fontsize=14, fontweight='bold')
     plt.tight_layout()
-    plt.savefig('charts/chart_g_trajectoires.png', dpi=150)
+    plt.savefig(f"{OUT_DIR}/chart_g_trajectoires.png", dpi=150)
     plt.close()
     print("✓ chart_g_trajectoires.png")
 
@@ -416,13 +451,13 @@ def chart_h_une_trajectoire():
     
     traj_data = results['trajectories']['data']
     
-    for asset_name in ['immobilier', 'betail', 'embouche']:
+    for idx, asset_name in enumerate(asset_list()):
         # Prendre la première trajectoire
         trajectory = np.array(traj_data[asset_name][0])  # 5 années
         
-        marker = {'immobilier': 'o', 'betail': 's', 'embouche': '^'}[asset_name]
-        ax.plot(years_1, trajectory/1e6, color=COLORS[asset_name],
-                linewidth=2.5, marker=marker, markersize=8, label=LABELS[asset_name])
+        marker = MARKERS[idx % len(MARKERS)]
+        ax.plot(years_1, trajectory/1e6, color=asset_color(asset_name),
+                linewidth=2.5, marker=marker, markersize=8, label=asset_label(asset_name))
     
     ax.axhline(y=0, color='gray', linestyle='-', linewidth=0.5)
     ax.set_xlabel('Année')
@@ -433,7 +468,7 @@ def chart_h_une_trajectoire():
     ax.set_ylim(bottom=0)
     
     plt.tight_layout()
-    plt.savefig('charts/chart_h_une_trajectoire.png', dpi=150)
+    plt.savefig(f"{OUT_DIR}/chart_h_une_trajectoire.png", dpi=150)
     plt.close()
     print("✓ chart_h_une_trajectoire.png")
 
@@ -443,14 +478,16 @@ def chart_h_une_trajectoire():
 
 def chart_e_vertical():
     """E-v — Comparaison vertical (TikTok 9:16)"""
-    fig, axes = plt.subplots(3, 1, figsize=(6, 10.67))
+    n = len(asset_list())
+    fig, axes = plt.subplots(n, 1, figsize=(6, 10.67 * n / 3), squeeze=False)
+    axes = axes[:, 0]
     
     data_no = results['simulation']['without_reinvest']
     data_yes = results['simulation']['with_reinvest']
     
-    for idx, asset in enumerate(['immobilier', 'betail', 'embouche']):
+    for idx, asset in enumerate(asset_list()):
         ax = axes[idx]
-        color = COLORS[asset]
+        color = asset_color(asset)
         
         c_no = np.array(data_no[asset]['capitals']['mean']) / 1e6
         ax.plot(years_0, c_no, color=color, linewidth=2, linestyle='--', label='Sans')
@@ -460,28 +497,30 @@ def chart_e_vertical():
         
         ax.axhline(y=1, color='gray', linestyle=':', linewidth=1)
         ax.set_ylabel('M FCFA')
-        ax.set_title(LABELS[asset], fontweight='bold')
+        ax.set_title(asset_label(asset), fontweight='bold')
         ax.legend(loc='upper left', fontsize=8)
         ax.set_xticks(years_0)
-        if idx == 2:
+        if idx == n - 1:
             ax.set_xlabel('Année')
     
     plt.suptitle('Impact réinvestissement', fontsize=12, fontweight='bold')
     plt.tight_layout()
-    plt.savefig('charts/chart_e_comparaison_vertical.png', dpi=150)
+    plt.savefig(f"{OUT_DIR}/chart_e_comparaison_vertical.png", dpi=150)
     plt.close()
     print("✓ chart_e_comparaison_vertical.png")
 
 
 def chart_g_vertical():
     """G-v — Trajectoires vertical (TikTok 9:16)"""
-    fig, axes = plt.subplots(3, 1, figsize=(6, 10.67))
+    n = len(asset_list())
+    fig, axes = plt.subplots(n, 1, figsize=(6, 10.67 * n / 3), squeeze=False)
+    axes = axes[:, 0]
     
     traj_data = results['trajectories']['data']
     
-    for idx, asset_name in enumerate(['immobilier', 'betail', 'embouche']):
+    for idx, asset_name in enumerate(asset_list()):
         ax = axes[idx]
-        color = COLORS[asset_name]
+        color = asset_color(asset_name)
         
         trajectories = np.array(traj_data[asset_name])
         
@@ -490,16 +529,16 @@ def chart_g_vertical():
         ax.plot(years_1, trajectories.mean(axis=0)/1e6, color='black', linewidth=2, label='Moy.')
         
         ax.set_ylabel('M FCFA')
-        ax.set_title(LABELS[asset_name], fontweight='bold')
+        ax.set_title(asset_label(asset_name), fontweight='bold')
         ax.legend(loc='upper right', fontsize=8)
         ax.set_xticks(years_1)
         ax.set_ylim(bottom=0)
-        if idx == 2:
+        if idx == n - 1:
             ax.set_xlabel('Année')
     
     plt.suptitle('30 trajectoires possibles', fontsize=12, fontweight='bold')
     plt.tight_layout()
-    plt.savefig('charts/chart_g_trajectoires_vertical.png', dpi=150)
+    plt.savefig(f"{OUT_DIR}/chart_g_trajectoires_vertical.png", dpi=150)
     plt.close()
     print("✓ chart_g_trajectoires_vertical.png")
 
@@ -507,47 +546,85 @@ def chart_g_vertical():
 # 7. EXÉCUTION
 # =============================================================================
 
-print("\nGénération des charts...")
-print("-" * 40)
-
-# Sans réinvestissement
-chart_a_revenus()
-chart_b_wealth()
-chart_c_bulles()
-chart_d_zones()
-
-# Avec réinvestissement
-chart_a_revenus_reinvest()
-chart_b_capital_reinvest()
-chart_c_bulles_reinvest()
-chart_d_zones_reinvest()
-
-# Comparaison & pédagogie
-chart_e_comparaison()
-chart_f_units()
-chart_g_trajectoires()
-chart_h_une_trajectoire()
-
-# Verticales TikTok
-chart_e_vertical()
-chart_g_vertical()
-
-# =============================================================================
-# 8. RÉSUMÉ
-# =============================================================================
-
-print("\n" + "=" * 80)
-print("RÉSUMÉ — 14 charts générés")
-print("=" * 80)
-
-import os
-charts_dir = 'charts'
-files = sorted(os.listdir(charts_dir))
-print(f"\nDossier: {charts_dir}/")
-for f in files:
-    size = os.path.getsize(f"{charts_dir}/{f}") / 1024
-    print(f"  {f:<40} {size:>6.1f} KB")
-
-print("\n" + "=" * 80)
-print("✓ Terminé")
-print("=" * 80)
+# (fichier, fonction, blocs de results.json lus)
+CHARTS = [
+    # Sans réinvestissement
+    ('chart_a_revenus.png', chart_a_revenus, ['without_reinvest.revenues']),
+    ('chart_b_wealth.png', chart_b_wealth, ['without_reinvest.capitals']),
+    ('chart_c_bulles.png', chart_c_bulles, ['without_reinvest.summary']),
+    ('chart_d_zones.png', chart_d_zones, ['without_reinvest.summary']),
+    # Avec réinvestissement
+    ('chart_a_revenus_reinvest.png', chart_a_revenus_reinvest, ['with_reinvest.revenues']),
+    ('chart_b_capital_reinvest.png', chart_b_capital_reinvest, ['with_reinvest.capitals']),
+    ('chart_c_bulles_reinvest.png', chart_c_bulles_reinvest, ['with_reinvest.summary']),
+    ('chart_d_zones_reinvest.png', chart_d_zones_reinvest, ['with_reinvest.summary']),
+    # Comparaison & pédagogie
+    ('chart_e_comparaison.png', chart_e_comparaison,
+     ['without_reinvest.capitals', 'with_reinvest.capitals']),
+    ('chart_f_units.png', chart_f_units, ['with_reinvest.units']),
+    ('chart_g_trajectoires.png', chart_g_trajectoires, ['trajectories']),
+    ('chart_h_une_trajectoire.png', chart_h_une_trajectoire, ['trajectories']),
+    # Verticales TikTok
+    ('chart_e_comparaison_vertical.png', chart_e_vertical,
+     ['without_reinvest.capitals', 'with_reinvest.capitals']),
+    ('chart_g_trajectoires_vertical.png', chart_g_vertical, ['trajectories']),
+]
+
+
+def charts_depending_on(changed):
+    """Fichiers des charts qui lisent au moins un des blocs changed."""
+    changed = set(changed)
+    return [name for name, _, deps in CHARTS if changed.intersection(deps)]
+
+
+def render(data, names=None, out_dir='charts'):
+    """Dessine les charts names (défaut: tous) de data (dict results.json) dans out_dir."""
+    global OUT_DIR
+    use_results(data)
+    OUT_DIR = out_dir
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    for name, chart, _ in CHARTS:
+        if names is None or name in names:
+            chart()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="14 visualisations depuis results.json")
+    parser.add_argument('--results', default='results.json')
+    parser.add_argument('--out-dir', default='charts', help="dossier des .png")
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print("CHARTS.PY — Génération 14 visualisations")
+    print("=" * 80)
+
+    with open(args.results, 'r') as f:
+        data = json.load(f)
+
+    print("\nGénération des charts...")
+    print("-" * 40)
+    render(data, out_dir=args.out_dir)
+
+    # =========================================================================
+    # 8. RÉSUMÉ
+    # =========================================================================
+
+    print("\n" + "=" * 80)
+    print("RÉSUMÉ — 14 charts générés")
+    print("=" * 80)
+
+    charts_dir = args.out_dir
+    files = sorted(os.listdir(charts_dir))
+    print(f"\nDossier: {charts_dir}/")
+    for f in files:
+        size = os.path.getsize(f"{charts_dir}/{f}") / 1024
+        print(f"  {f:<40} {size:>6.1f} KB")
+
+    print("\n" + "=" * 80)
+    print("✓ Terminé")
+    print("=" * 80)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
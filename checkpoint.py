@@ -0,0 +1,161 @@
+"""
+CHECKPOINT.PY — Reprise des simulations longues
+================================================
+Flow: simulate.py --checkpoint → checkpoint/ → simulate.py --resume
+
+Chaque job actif × mode est découpé en chunks de runs. Après chaque chunk:
+- checkpoint/<actif>__<mode>__<chunk>.npz   (revenues, capitals, units du chunk)
+- checkpoint/manifest.json                  (état RNG, chunks faits, compteurs)
+
+Un job terminé garde aussi son bloc résumé (percentiles) dans le manifest:
+à la reprise il n'est ni resimulé ni rechargé.
+
+Le manifest est écrit de façon atomique (fichier temporaire + rename): une
+interruption pendant l'écriture laisse le checkpoint précédent intact.
+L'état RNG est celui de la fin du dernier chunk écrit, donc la reprise
+produit exactement les mêmes tirages qu'un run ininterrompu.
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+
+MANIFEST = 'manifest.json'
+CHUNK_PATTERN = re.compile(r'.+__\d{5}\.npz')
+
+
+def model_digest(model):
+    return hashlib.sha256(json.dumps(model, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def chunk_filename(scope, chunk):
+    return f"{scope.replace(':', '__')}__{chunk:05d}.npz"
+
+
+def load_manifest(path):
+    """Manifest d'un dossier de checkpoint, en lecture seule (None si absent)."""
+    manifest_path = Path(path) / MANIFEST
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path, 'r') as f:
+        return json.load(f)
+
+
+def iter_chunks(path, scope, n_chunks):
+    """(revenues, capitals, units) chunk par chunk: un seul chunk en mémoire à la fois."""
+    for chunk in range(n_chunks):
+        with np.load(Path(path) / chunk_filename(scope, chunk)) as data:
+            yield data['revenues'], data['capitals'], data['units']
+
+
+class CheckpointMismatch(Exception):
+    """Le checkpoint existant ne correspond pas au run demandé."""
+
+
+class NotACheckpoint(Exception):
+    """Le dossier demandé n'est pas vide et n'est pas un checkpoint."""
+
+
+class Checkpoint:
+    """
+    Dossier de checkpoint d'un run de simulate.py.
+
+    Args:
+        path: dossier (créé si absent)
+        model: dict model.json (son empreinte protège la reprise)
+        engine: nom du moteur
+        chunk_size: runs par chunk
+        resume: True = reprendre le dossier existant, False = repartir de zéro
+    """
+
+    def __init__(self, path, model, engine, chunk_size, resume=False):
+        self.path = Path(path)
+        self.header = {
+            'model_digest': model_digest(model),
+            'engine': engine,
+            'chunk_size': chunk_size,
+            'n_runs': model['simulation']['n_runs'],
+            'n_years': model['simulation']['n_years'],
+            'seed': model['simulation']['seed'],
+        }
+
+        manifest_path = self.path / MANIFEST
+        if resume and manifest_path.exists():
+            with open(manifest_path, 'r') as f:
+                self.manifest = json.load(f)
+            for key, value in self.header.items():
+                if self.manifest.get(key) != value:
+                    raise CheckpointMismatch(
+                        f"{key}: checkpoint={self.manifest.get(key)!r}, run={value!r}")
+        else:
+            self._clear()
+            self.manifest = dict(self.header, jobs={})
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _clear(self):
+        """
+        Repartir de zéro: supprime le manifest et les chunks d'un checkpoint
+        précédent, rien d'autre. Un dossier non vide sans manifest n'est pas
+        un checkpoint: on refuse plutôt que d'y écrire.
+        """
+        if not self.path.exists():
+            return
+        if not (self.path / MANIFEST).exists():
+            if any(self.path.iterdir()):
+                raise NotACheckpoint(f"{self.path}/ n'est pas vide et ne contient pas de {MANIFEST}")
+            return
+        for entry in self.path.iterdir():
+            if entry.name in (MANIFEST, MANIFEST + '.tmp') or CHUNK_PATTERN.fullmatch(entry.name):
+                entry.unlink()
+
+    # -------------------------------------------------------------------------
+    # Lecture
+    # -------------------------------------------------------------------------
+
+    def job(self, scope):
+        """État du job: {'chunks_done', 'rng_state', 'stats', 'summary'}."""
+        return self.manifest['jobs'].get(scope, {
+            'chunks_done': 0, 'rng_state': None, 'stats': {}, 'summary': None,
+        })
+
+    def chunk_path(self, scope, chunk):
+        return self.path / chunk_filename(scope, chunk)
+
+    def load_chunks(self, scope):
+        """Arrays des chunks déjà faits, dans l'ordre."""
+        parts = []
+        for chunk in range(self.job(scope)['chunks_done']):
+            with np.load(self.chunk_path(scope, chunk)) as data:
+                parts.append((data['revenues'], data['capitals'], data['units']))
+        return parts
+
+    # -------------------------------------------------------------------------
+    # Écriture
+    # -------------------------------------------------------------------------
+
+    def save_chunk(self, scope, chunk, arrays, rng_state, stats):
+        revenues, capitals, units = arrays
+        np.savez(self.chunk_path(scope, chunk), revenues=revenues, capitals=capitals, units=units)
+        job = self.job(scope)
+        job['chunks_done'] = chunk + 1
+        job['rng_state'] = rng_state
+        for key, value in stats.items():
+            job['stats'][key] = job['stats'].get(key, 0) + value
+        self.manifest['jobs'][scope] = job
+        self._write_manifest()
+
+    def finish(self, scope, summary):
+        job = self.job(scope)
+        job['summary'] = summary
+        self.manifest['jobs'][scope] = job
+        self._write_manifest()
+
+    def _write_manifest(self):
+        tmp = self.path / (MANIFEST + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp, self.path / MANIFEST)
@@ -0,0 +1,99 @@
+"""
+CLI.PY — Point d'entrée unique du pipeline
+===========================================
+Flow: cli.py <commande> → simulate.py / charts.py / excel_writer.py
+
+Commandes:
+    python3 cli.py simulate [options de simulate.py]      # model.json → results.json
+    python3 cli.py charts [--results R] [--out-dir D]     # results.json → charts/*.png
+    python3 cli.py excel --template T [--model M] [--output O]
+    python3 cli.py all --template T                       # les trois, dans l'ordre
+
+Chaque commande n'importe que le module qui la sert: `simulate` ne charge
+ni matplotlib ni openpyxl (lancé des milliers de fois par jour par
+l'ordonnanceur, son démarrage à froid compte). Mesure:
+    python3 -X importtime cli.py simulate --help 2> import.log
+"""
+
+import os
+import sys
+
+# commande: (module, description)
+COMMANDS = {
+    'simulate': ('simulate', "Monte Carlo: model.json → results.json"),
+    'charts': ('charts', "14 visualisations: results.json → charts/*.png"),
+    'excel': ('excel_writer', "injection des paramètres: model.json + template → classeur"),
+    'all': (None, "simulate, puis charts, puis excel"),
+}
+
+
+def run(command, argv):
+    """Importe le module de command et appelle son main(argv). Returns: code de sortie."""
+    module = __import__(COMMANDS[command][0])
+    code = module.main(argv)  # simulate.main() retourne le dict results
+    return code if isinstance(code, int) else 0
+
+
+def main_all(argv):
+    import argparse  # seulement pour `all`: les autres commandes ont leur propre parser
+
+    parser = argparse.ArgumentParser(prog='cli.py all', description=COMMANDS['all'][1])
+    parser.add_argument('--model', default='model.json')
+    parser.add_argument('--results', default='results.json')
+    parser.add_argument('--charts-dir', default='charts')
+    parser.add_argument('--template', help="template Excel (obligatoire sauf avec --no-excel)")
+    parser.add_argument('--excel-output', help="classeur rempli (défaut: celui d'excel_writer.py)")
+    parser.add_argument('--no-excel', action='store_true')
+    parser.add_argument('--engine', help="moteur de simulation (voir simulate.py --engine)")
+    args = parser.parse_args(argv)
+    # Vérifié avant toute étape: pas de simulate + charts pour échouer à l'excel
+    if not args.no_excel:
+        if not args.template:
+            parser.error("--template est obligatoire (ou --no-excel)")
+        if not os.path.isfile(args.template):
+            print(f"✗ Template introuvable: {args.template}")
+            return 1
+
+    simulate_argv = ['--model', args.model, '--output', args.results]
+    if args.engine:
+        simulate_argv += ['--engine', args.engine]
+    excel_argv = ['--model', args.model, '--template', args.template]
+    if args.excel_output:
+        excel_argv += ['--output', args.excel_output]
+
+    steps = [('simulate', simulate_argv), ('charts', ['--results', args.results,
+                                                      '--out-dir', args.charts_dir])]
+    if not args.no_excel:
+        steps.append(('excel', excel_argv))
+    for command, command_argv in steps:
+        code = run(command, command_argv)
+        if code:
+            print(f"✗ {command} a échoué (code {code}), arrêt")
+            return code
+    return 0
+
+
+def usage():
+    width = max(len(command) for command in COMMANDS)
+    lines = ["usage: cli.py <commande> [options]", "", "commandes:"]
+    lines += [f"  {command:<{width}}  {description}" for command, (_, description) in COMMANDS.items()]
+    lines += ["", "cli.py <commande> --help: options de la commande"]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0 if argv else 2
+    command, rest = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"✗ commande inconnue: {command}\n\n{usage()}", file=sys.stderr)
+        return 2
+    if command == 'all':
+        return main_all(rest)
+    return run(command, rest)
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,111 @@
+"""
+CYCLES.PY — Sorties par cycle (revenus, unités, pertes)
+========================================================
+Flow: simulate.py --cycles DIR → DIR/<actif>__<mode>__<métrique>.npy + DIR/cycles.json
+
+results.json ne garde que des valeurs annuelles. Or l'embouche fait
+n_cycles_year cycles par an, avec remplacement des pertes entre cycles,
+et on veut étudier des cycles mensuels ou hebdomadaires sur 20-30 ans.
+Avec --cycles, le moteur fast enregistre pour chaque run et chaque
+période (année × cycle, période = année × n_cycles_year + cycle):
+- revenues: revenu du cycle (float64, ou float32 avec simulation.float32)
+- units: unités après les achats du cycle
+- losses: unités perdues pendant le cycle
+
+Un fichier .npy par job × métrique, de forme (n_runs, n_périodes). Un run
+= une ligne contiguë, donc un chunk de runs = une plage d'octets: chaque
+chunk est écrit à son offset (en-tête créé par open_memmap, puis écriture
+fichier simple, sans mapping: les pages écrites ne restent pas dans la RSS
+du process). Avec --memory-budget, la taille des chunks tient compte de
+ces sorties.
+
+Relecture sans tout charger:
+    from cycles import load_cycles
+    revenues = load_cycles('cycles', 'embouche:without_reinvest', 'revenues')
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from engine import CYCLE_METRICS
+
+INDEX = 'cycles.json'
+
+
+def cycle_path(path, scope, metric):
+    return Path(path) / f"{scope.replace(':', '__')}__{metric}.npy"
+
+
+def load_cycles(path, scope, metric, mmap_mode='r'):
+    """Array (n_runs, n_périodes) d'un job, mappé en lecture par défaut."""
+    return np.load(cycle_path(path, scope, metric), mmap_mode=mmap_mode)
+
+
+class CycleWriter:
+    """Fichiers .npy d'un job, remplis chunk de runs par chunk de runs."""
+
+    def __init__(self, store, scope, n_runs, n_years, n_cycles):
+        self.store = store
+        self.scope = scope
+        self.shape = (n_runs, n_years * n_cycles)
+        self.n_years = n_years
+        self.n_cycles = n_cycles
+        self.files = None
+        self.dtypes = None
+
+    def _create(self, outputs):
+        # dtypes connus au premier chunk (float32 / units_dtype du moteur)
+        self.files, self.dtypes = {}, {}
+        for metric in CYCLE_METRICS:
+            path = cycle_path(self.store.path, self.scope, metric)
+            header = np.lib.format.open_memmap(path, mode='w+', dtype=outputs[metric].dtype,
+                                               shape=self.shape)
+            offset = header.offset
+            del header
+            self.files[metric] = (open(path, 'r+b'), offset)
+            self.dtypes[metric] = outputs[metric].dtype
+
+    def write(self, start, outputs):
+        """outputs: dict cycle_outputs du moteur pour les runs [start, start + n)."""
+        if self.files is None:
+            self._create(outputs)
+        for metric, (f, offset) in self.files.items():
+            array = np.ascontiguousarray(outputs[metric], dtype=self.dtypes[metric])
+            f.seek(offset + start * array.strides[0])
+            f.write(array.data)
+
+    def close(self):
+        # Aucun chunk écrit (0 run, exception avant le premier chunk) ou déjà fermé:
+        # pas de fichier, pas d'entrée dans cycles.json
+        if self.files is None:
+            return
+        for f, _ in self.files.values():
+            f.close()
+        self.store.jobs[self.scope] = {
+            'n_runs': self.shape[0],
+            'n_years': self.n_years,
+            'n_cycles_year': self.n_cycles,
+            'metrics': {metric: dtype.name for metric, dtype in self.dtypes.items()},
+        }
+        self.files = None
+
+
+class CycleStore:
+    """
+    Dossier des sorties par cycle d'un run de simulate.py.
+    write_index() écrit cycles.json (jobs, formes, dtypes) à la fin.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.jobs = {}
+
+    def writer(self, scope, n_runs, n_years, n_cycles):
+        return CycleWriter(self, scope, n_runs, n_years, n_cycles)
+
+    def write_index(self, meta):
+        with open(self.path / INDEX, 'w') as f:
+            json.dump(dict(meta, jobs=self.jobs), f, indent=2)
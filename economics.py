@@ -0,0 +1,125 @@
+"""
+ECONOMICS.PY — P&L des actifs déclaré dans model.json
+======================================================
+Flow: model.json (assets.<actif>.pnl) → compile_pnl() → calculate_pnl()
+
+Chaque actif peut déclarer son économie sous forme d'expressions:
+
+    "pnl": {
+      "revenue_unit_year": "rent_month * n_months_occupied",
+      "cost_unit_year": "cost_maintenance + cost_taxes + cost_management",
+      "profit_unit_cycle": "revenue_unit_year - cost_unit_year",
+      "capital_total": "n_units * price_unit"
+    }
+
+- Les noms disponibles: clés de config et inputs, puis les expressions
+  définies plus haut dans le même bloc (évaluées dans l'ordre)
+- profit_unit_cycle et capital_total sont obligatoires
+- Syntaxe: nombres, noms, + - * / ** %, parenthèses, min() max() abs()
+  (vérifiée sur l'AST: pas d'attributs, d'indexation, ni d'autres appels)
+
+Les expressions sont compilées une fois (cache par bloc) et évaluées avec
+numpy: passer des arrays de variantes de paramètres évalue tout un balayage
+en une seule passe.
+"""
+
+import ast
+import json
+from functools import lru_cache
+
+import numpy as np
+
+REQUIRED = ['profit_unit_cycle', 'capital_total']
+
+FUNCTIONS = {
+    'min': np.minimum,
+    'max': np.maximum,
+    'abs': np.abs,
+}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Load, ast.Call,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.USub, ast.UAdd,
+)
+
+
+class ExpressionError(ValueError):
+    """Expression P&L invalide (syntaxe, nom inconnu, construction interdite)."""
+
+
+def _check_tree(tree, where):
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ExpressionError(f"{where}: construction interdite ({type(node).__name__})")
+        if isinstance(node, ast.Constant) and (isinstance(node.value, bool)
+                                               or not isinstance(node.value, (int, float))):
+            raise ExpressionError(f"{where}: constante non numérique {node.value!r}")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+                raise ExpressionError(f"{where}: fonction non autorisée "
+                                      f"({ast.unparse(node.func)}; autorisées: {sorted(FUNCTIONS)})")
+            if node.keywords:
+                raise ExpressionError(f"{where}: arguments nommés interdits")
+
+
+def _names(tree):
+    called = {node.func.id for node in ast.walk(tree) if isinstance(node, ast.Call)}
+    return {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)} - called
+
+
+class CompiledPnl:
+    """
+    Bloc pnl d'un actif compilé.
+
+    Args:
+        asset_name: pour les messages d'erreur
+        definitions: {nom: expression} dans l'ordre d'évaluation
+        parameters: noms disponibles en entrée (clés config + inputs)
+    """
+
+    def __init__(self, asset_name, definitions, parameters):
+        self.asset_name = asset_name
+        self.steps = []
+        known = set(parameters)
+        for name, text in definitions.items():
+            where = f"{asset_name}.pnl.{name}"
+            if name in parameters:
+                raise ExpressionError(f"{where}: masque le paramètre du même nom")
+            if not isinstance(text, str):
+                raise ExpressionError(f"{where}: expression texte attendue, trouvé {text!r}")
+            try:
+                tree = ast.parse(text, mode='eval')
+            except SyntaxError as e:
+                raise ExpressionError(f"{where}: syntaxe invalide ({e.msg})") from None
+            _check_tree(tree, where)
+            unknown = _names(tree) - known
+            if unknown:
+                raise ExpressionError(f"{where}: nom(s) inconnu(s) {sorted(unknown)}")
+            self.steps.append((name, compile(tree, where, 'eval')))
+            known.add(name)
+
+        missing = [name for name in REQUIRED if name not in definitions]
+        if missing:
+            raise ExpressionError(f"{asset_name}.pnl: sortie(s) obligatoire(s) manquante(s) {missing}")
+
+    def evaluate(self, values):
+        """values: {paramètre: scalaire ou array}. Retourne toutes les expressions."""
+        namespace = dict(FUNCTIONS)
+        namespace.update(values)
+        results = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for name, code in self.steps:
+                results[name] = namespace[name] = eval(code, {'__builtins__': {}}, namespace)
+        return results
+
+
+@lru_cache(maxsize=256)
+def _compile_cached(asset_name, definitions_json, parameters):
+    return CompiledPnl(asset_name, json.loads(definitions_json), parameters)
+
+
+def compile_pnl(asset_name, asset_data):
+    """CompiledPnl du bloc asset_data['pnl'] (en cache: compilé une fois par contenu)."""
+    parameters = tuple(sorted(set(asset_data['config']) | set(asset_data['inputs'])))
+    definitions_json = json.dumps(asset_data['pnl'])
+    return _compile_cached(asset_name, definitions_json, parameters)
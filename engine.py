@@ -0,0 +1,320 @@
+"""
+ENGINE.PY — Moteur Monte Carlo vectorisé
+=========================================
+Flow: simulate.py --engine fast → simulate_asset_fast → results.json
+
+Même modèle que simulate_asset (simulate.py), mais vectorisé sur les runs.
+Le coût est en runs × périodes (année × cycle), indépendant de la taille
+du troupeau:
+- Pertes d'un cycle: Binomiale(n_units, p_loss_total) par run, même loi
+  que n_units tirages de Bernoulli
+- Revenu des unités produisant: k + somme de k variations triangulaires,
+  tirée par triangular_sum (exacte jusqu'à EXACT_SUM_MAX unités, normale
+  au-delà, tronquée au support [k·low, k·high] de la somme exacte)
+- Achats calculés en une fois: min(cap - n_units, cash // price_unit)
+
+La référence reste simulate_asset. Toute modification ici doit passer
+validate_engines.py (équivalence statistique avec la boucle legacy).
+
+Option capital_events (simulation.capital_events, fast uniquement):
+- Valeur de marché du troupeau suivie par run (herd_value) au lieu de
+  n_units × price_unit
+- Chaque année, deux tirages par run: dépréciation (p_depreciation,
+  × (1 + pct_depreciation)) et appréciation (p_appreciation,
+  × (1 + pct_appreciation)), indépendants
+- Une unité perdue emporte sa part de la valeur, un achat ajoute price_unit
+- capital = herd_value + cash
+Désactivée, aucun tirage supplémentaire: résultats inchangés.
+
+Option importance (tail.py): les pertes sont tirées avec une probabilité
+inclinée p' au lieu de p_loss_total. Chaque run porte son log-poids
+    L·log(p/p') + (T-L)·log((1-p)/(1-p'))
+(L pertes sur T tirages de perte), qui repondère ses résultats vers la
+loi nominale.
+
+Stockage compact (simulate.py --memory-budget):
+- units en entiers: int16 si la borne max_units() le permet, sinon int32
+- float32=True: revenues et capitals stockés en float32. Les calculs
+  restent en float64 (cash, revenu de l'année); seule la valeur rangée
+  dans la matrice est arrondie (erreur relative ≤ 2^-24 ≈ 6e-8, sans
+  cumul d'une année sur l'autre)
+
+Sorties par cycle (simulate.py --cycles, voir cycles.py): avec un dict
+cycle_outputs, le moteur y range revenues / units / losses de forme
+(n_runs, n_years × n_cycles_year).
+
+Moteur counter (simulate.py --engine counter): même fonction, rng =
+philox.CounterRNG. Les tirages sont adressés par (run, période) au lieu de
+suivre un flux: le moteur positionne la période (seek) avant chaque cycle.
+Tous les calculs étant élément par élément (sommes triangulaires comprises,
+colonne par colonne), un run rejoué seul est identique à sa ligne dans la
+simulation complète (replay.py).
+
+Option shocks (simulation.shocks, voir shocks.py): dict {'z': facteur
+commun (n_runs, n_years), 'rho_loss', 'rho_revenue'}. L'année t, la
+probabilité de perte de chaque run devient vasicek_p(p_loss_total,
+rho_loss, z[:, t]) et les variations triangulaires sont tirées par la
+copule gaussienne (shocked_triangular_sum). Marges inchangées, pertes et
+revenus corrélés entre unités, actifs et années. Sans shocks: aucun
+changement, ni de tirage ni de calcul.
+"""
+
+import numpy as np
+
+from philox import CounterRNG, RunStreams
+from shocks import MomentTable, shocked_triangular_sum, vasicek_p
+
+# Au-delà, la somme des variations triangulaires d'un cycle est tirée par
+# l'approximation normale (TCL): à 16 termes l'écart à la loi exacte est
+# invisible à côté du bruit Monte Carlo (validate_engines.py)
+EXACT_SUM_MAX = 16
+
+CYCLE_METRICS = ['revenues', 'units', 'losses']
+
+
+def max_units(asset_data, pnl_data, n_years, cap):
+    """
+    Borne haute des unités d'un run sur n_years: aucune perte et revenu au
+    plus haut (pct_high) à chaque cycle. La richesse n_units × price_unit + cash
+    croît alors au plus d'un facteur (1 + k / price_unit) par an, avec
+    k = n_cycles_year × profit_unit_cycle × (1 + pct_high).
+
+    Tient aussi pour l'approximation normale des sommes (tronquée au support
+    de la somme exacte); simulate_asset_fast le vérifie chaque année avant
+    de ranger les unités (units_dtype).
+    """
+    cfg = asset_data['config']
+    n_units = cfg['n_units']
+    k = cfg['n_cycles_year'] * pnl_data['profit_unit_cycle'] * (1 + asset_data['risks']['revenue']['pct_high'])
+    if k <= 0:
+        return n_units
+    growth = n_years * np.log1p(k / cfg['price_unit'])
+    if growth > np.log(cap / max(n_units, 1)):
+        return max(cap, n_units)
+    return int(np.floor(n_units * np.exp(growth)))
+
+
+def triangular_sum(rng, k, low, mode, high):
+    """
+    Somme de k[i] variations triangulaires(low, mode, high) indépendantes, par run.
+
+    Exacte (matrice runs × max(k) masquée) pour les runs où k ≤ EXACT_SUM_MAX;
+    au-delà, loi normale de même moyenne et variance: k·μ, k·σ² avec
+    μ = (a + b + c) / 3 et σ² = (a² + b² + c² - ab - ac - bc) / 18,
+    tronquée à [k·a, k·c] comme la somme exacte (à plus de 10 σ dès k > 16:
+    sans effet sur les statistiques, mais max_units reste une borne).
+    Somme colonne par colonne: l'arrondi d'un run ne dépend pas de max(k).
+
+    Returns:
+        (sommes[n_runs], nombre de tirages)
+    """
+    n_runs = len(k)
+    small = k <= EXACT_SUM_MAX
+    width = int(np.max(k, where=small, initial=0))
+    total = np.zeros(n_runs)
+    n_draws = 0
+    if width > 0:
+        draws = rng.triangular(low, mode, high, size=(n_runs, width))
+        counted = np.where(small, k, 0)
+        for column in range(width):
+            total += np.where(column < counted, draws[:, column], 0.0)
+        n_draws += n_runs * width
+    if not small.all():
+        mean = (low + mode + high) / 3
+        var = (low ** 2 + mode ** 2 + high ** 2 - low * mode - low * high - mode * high) / 18
+        normal = rng.standard_normal(n_runs)
+        normal = np.clip(k * mean + np.sqrt(k * var) * normal, k * low, k * high)
+        total = np.where(small, total, normal)
+        n_draws += n_runs
+    return total, n_draws
+
+
+def units_dtype(bound):
+    """Plus petit type entier signé qui contient bound."""
+    for dtype in (np.int16, np.int32):
+        if bound <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def simulate_asset_fast(asset_name, asset_data, pnl_data, n_runs, n_years, cap,
+                        rng=None, stats=None, capital_events=False, importance=None,
+                        float32=False, cycle_outputs=None, shocks=None):
+    """
+    Simulation unifiée, vectorisée sur les runs.
+
+    Args:
+        cap: plafond d'unités (comme simulate_asset)
+        rng: np.random.Generator (défaut: np.random.default_rng())
+             ou philox.CounterRNG (moteur counter: prend les n_runs runs suivants)
+        stats: dict optionnel, rempli avec les compteurs
+               random_draws, losses, units_purchased
+               (+ depreciations, appreciations avec capital_events)
+        capital_events: marquage au marché annuel de la valeur des unités
+        importance: dict optionnel {'p_loss': p'}; le moteur y ajoute les arrays
+                    par run 'log_weights', 'losses', 'trials'
+        float32: stocker revenues et capitals en float32
+        cycle_outputs: dict optionnel, rempli avec les arrays par cycle
+                       (CYCLE_METRICS, forme (n_runs, n_years × n_cycles_year))
+        shocks: dict optionnel {'z', 'rho_loss', 'rho_revenue'} (shocks.py),
+                z de forme (n_runs, n_years)
+
+    Returns:
+        revenues[n_runs, n_years]
+        capitals[n_runs, n_years+1]
+        units[n_runs, n_years+1] (entiers, voir units_dtype)
+    """
+    if shocks is not None and importance is not None:
+        raise ValueError("shocks et importance ne se combinent pas (log-poids sans facteur commun)")
+    if rng is None:
+        rng = np.random.default_rng()
+    elif isinstance(rng, CounterRNG):
+        rng = rng.take(n_runs)
+    counter = isinstance(rng, RunStreams)
+
+    cfg = asset_data['config']
+    risks = asset_data['risks']
+
+    n_units_initial = cfg['n_units']
+    price_unit = cfg['price_unit']
+    n_cycles = cfg['n_cycles_year']
+    profit_unit_cycle = pnl_data['profit_unit_cycle']
+    initial_capital = pnl_data['capital_total']
+
+    rev_low = risks['revenue']['pct_low']
+    rev_base = risks['revenue']['pct_base']
+    rev_high = risks['revenue']['pct_high']
+    p_loss = risks['capital']['p_loss_total']
+    p_dep = risks['capital']['p_depreciation']
+    pct_dep = risks['capital']['pct_depreciation']
+    p_app = risks['capital']['p_appreciation']
+    pct_app = risks['capital']['pct_appreciation']
+
+    float_dtype = np.float32 if float32 else np.float64
+    revenues = np.zeros((n_runs, n_years), dtype=float_dtype)
+    capitals = np.zeros((n_runs, n_years + 1), dtype=float_dtype)
+    bound = max_units(asset_data, pnl_data, n_years, cap)
+    units = np.zeros((n_runs, n_years + 1), dtype=units_dtype(bound))
+
+    n_units = np.full(n_runs, n_units_initial, dtype=np.int64)
+    cash = np.zeros(n_runs)
+
+    capitals[:, 0] = initial_capital
+    units[:, 0] = n_units
+
+    if cycle_outputs is not None:
+        shape = (n_runs, n_years * n_cycles)
+        cycle_outputs['revenues'] = np.zeros(shape, dtype=float_dtype)
+        cycle_outputs['units'] = np.zeros(shape, dtype=units.dtype)
+        cycle_outputs['losses'] = np.zeros(shape, dtype=units.dtype)
+
+    n_draws = 0
+    n_losses = 0
+    n_purchased = 0
+    n_depreciations = 0
+    n_appreciations = 0
+    herd_value = n_units * float(price_unit) if capital_events else None
+
+    p_draw = p_loss if importance is None else importance['p_loss']
+    run_losses = np.zeros(n_runs, dtype=np.int64)
+    run_trials = np.zeros(n_runs, dtype=np.int64)
+
+    def buy(n_units, cash):
+        nonlocal herd_value
+        # Équivalent de: while n_units < cap and cash >= price_unit
+        n_buy = np.minimum(cap - n_units, np.floor(cash / price_unit)).astype(np.int64)
+        np.maximum(n_buy, 0, out=n_buy)
+        if capital_events:
+            herd_value = herd_value + n_buy * price_unit
+        return n_units + n_buy, cash - n_buy * price_unit, int(n_buy.sum())
+
+    if shocks is not None:
+        moment_table = MomentTable(shocks['rho_revenue'], rev_low, rev_base, rev_high)
+
+    for year in range(n_years):
+        year_revenue = np.zeros(n_runs)
+        if shocks is not None:
+            z = shocks['z'][:, year]
+            p_draw = vasicek_p(p_loss, shocks['rho_loss'], z)
+
+        for cycle in range(n_cycles):
+            period = year * n_cycles + cycle
+            if counter:
+                rng.seek(period)
+            losses_this_cycle = None
+            if n_units.any():
+                losses_this_cycle = rng.binomial(n_units, p_draw)
+                producing = n_units - losses_this_cycle
+                if shocks is None:
+                    variation, draws = triangular_sum(rng, producing, rev_low, rev_base, rev_high)
+                else:
+                    variation, draws = shocked_triangular_sum(
+                        rng, producing, rev_low, rev_base, rev_high, shocks['rho_revenue'], z,
+                        moment_table, EXACT_SUM_MAX)
+                cycle_revenue = profit_unit_cycle * (producing + variation)
+                year_revenue += cycle_revenue
+
+                if capital_events:
+                    # Valeur restante au prorata des unités survivantes
+                    herd_value = herd_value * np.divide(producing, n_units, out=np.zeros(n_runs),
+                                                        where=n_units > 0)
+                if importance is not None:
+                    run_trials += n_units
+                    run_losses += losses_this_cycle
+                n_units = producing
+                n_draws += n_runs + draws
+                n_losses += int(losses_this_cycle.sum())
+
+            n_units, cash, bought = buy(n_units, cash)
+            n_purchased += bought
+
+            if cycle_outputs is not None:
+                cycle_outputs['units'][:, period] = n_units
+                if losses_this_cycle is not None:
+                    cycle_outputs['revenues'][:, period] = cycle_revenue
+                    cycle_outputs['losses'][:, period] = losses_this_cycle
+
+        if capital_events:
+            if counter:
+                rng.seek(year * n_cycles)  # usage EVENTS, distinct des tirages du cycle
+            events = rng.random((n_runs, 2))
+            depreciated = events[:, 0] < p_dep
+            appreciated = events[:, 1] < p_app
+            herd_value = (herd_value * np.where(depreciated, 1 + pct_dep, 1.0)
+                          * np.where(appreciated, 1 + pct_app, 1.0))
+            n_draws += 2 * n_runs
+            n_depreciations += int(depreciated.sum())
+            n_appreciations += int(appreciated.sum())
+
+        revenues[:, year] = year_revenue
+        cash += year_revenue
+
+        n_units, cash, bought = buy(n_units, cash)
+        n_purchased += bought
+
+        if capital_events:
+            capitals[:, year + 1] = herd_value + cash
+        else:
+            capitals[:, year + 1] = n_units * price_unit + cash
+        if n_units.max() > bound:
+            # units (int16/int32) déborderait sans erreur
+            raise RuntimeError(f"{asset_name}: {int(n_units.max())} unités en année {year + 1}, "
+                               f"au-delà de max_units = {bound}")
+        units[:, year + 1] = n_units
+
+    if importance is not None:
+        log_weights = np.zeros(n_runs)
+        if p_draw != p_loss:
+            log_weights = (run_losses * np.log(p_loss / p_draw)
+                           + (run_trials - run_losses) * np.log((1 - p_loss) / (1 - p_draw)))
+        importance.update(log_weights=log_weights, losses=run_losses, trials=run_trials)
+
+    if stats is not None:
+        stats['random_draws'] = n_draws
+        stats['losses'] = n_losses
+        stats['units_purchased'] = n_purchased
+        if capital_events:
+            stats['depreciations'] = n_depreciations
+            stats['appreciations'] = n_appreciations
+
+    return revenues, capitals, units
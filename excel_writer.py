@@ -3,6 +3,9 @@ EXCEL_WRITER.PY — Injection paramètres dans Excel
 ==================================================
 Flow: model.json + template.xlsx → output.xlsx
 
+Usage:
+    python3 excel_writer.py --template template.xlsx --model model.json --output output.xlsx
+
 Ce qu'il fait:
 - Lit model.json (SST)
 - Lit template Excel (avec formules)
@@ -13,15 +16,35 @@ Ce qu'il ne fait PAS:
 - Calculs P&L (Excel fait ses propres calculs)
 - Simulation Monte Carlo
 - Création de formules
+
+Vérification: les formules des cellules de contrôle (excel_mapping.checks
+de chaque actif, {clé calculate_pnl: cellule}) sont évaluées en Python
+(formulas.py) et comparées à calculate_pnl.
+
+Export des distributions simulées (results.json + checkpoint, sans resimuler):
+    python3 excel_writer.py --distributions distributions.xlsx
+    python3 excel_writer.py --distributions distributions.xlsx --runs checkpoint/
+
+Mode batch (un template parsé une fois, N classeurs remplis):
+    python3 excel_writer.py --batch scenarios/ --out-dir excel_out --workers 8
+    python3 excel_writer.py --batch scenarios/ --verify   # + relecture des cellules clés
+    python3 excel_writer.py --batch scenarios/ --check    # formules vs P&L, sans écrire
 """
 
+import argparse
 import json
-import openpyxl
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-print("=" * 80)
-print("EXCEL_WRITER.PY — Injection paramètres")
-print("=" * 80)
+import numpy as np
+import openpyxl
+
+from checkpoint import iter_chunks, load_manifest
+from formulas import FormulaError, FormulaGraph
+from params import build_index, cell_sort_key
+from simulate import MODES, calculate_pnl
 
 # =============================================================================
 # 1. CONFIGURATION
@@ -31,141 +54,602 @@ MODEL_PATH = 'model.json'
 TEMPLATE_PATH = '/mnt/user-data/uploads/unit_economics-6.xlsx'
 OUTPUT_PATH = 'unit_economics_output.xlsx'
 
-# =============================================================================
-# 2. LECTURE MODEL.JSON
-# =============================================================================
+# Libellés des clés calculate_pnl de excel_mapping.checks (sinon la clé elle-même)
+CHECK_LABELS = {
+    'capital_total': 'Capital total',
+    'profit_unit_cycle': 'Bénéfice/unité',
+}
 
-with open(MODEL_PATH, 'r') as f:
-    model = json.load(f)
+CHECK_RTOL = 1e-9
+MAX_MISMATCHES_SHOWN = 20
 
-print(f"\n✓ model.json chargé (version {model['meta']['version']})")
+# Limite de lignes d'une feuille Excel (en-tête compris)
+EXCEL_MAX_ROWS = 1_048_576
 
 # =============================================================================
-# 3. FONCTION POUR TROUVER UNE VALEUR
+# 2. INJECTION
 # =============================================================================
 
-def find_value(key, asset_data):
+def mapped_values(index):
+    """(asset, cell, key, value) pour chaque cellule mappée, triées par ligne (params.ParamIndex)."""
+    for asset_name, cells in index.cells.items():
+        for cell, key, value in cells:
+            yield asset_name, cell, key, value
+
+
+def formula_checks(model):
+    """(actif, cellule, libellé, clé calculate_pnl) lus dans excel_mapping.checks de chaque actif."""
+    return [(asset_name, cell, CHECK_LABELS.get(key, key), key)
+            for asset_name, asset_data in model['assets'].items()
+            for key, cell in asset_data.get('excel_mapping', {}).get('checks', {}).items()]
+
+
+def inject_model(ws, index):
     """
-    Cherche la valeur d'une clé dans config, inputs, ou risks.
-    
-    Args:
-        key: nom du paramètre (ex: 'n_units', 'pct_low')
-        asset_data: dict contenant config, inputs, risks
-    
+    Écrit les paramètres de l'index (params.build_index(model)) dans la feuille ws.
+
     Returns:
-        La valeur trouvée, ou None si pas trouvée
+        writes: liste (asset, cell, key, value, old_value) dans l'ordre d'écriture
+        errors: erreurs de l'index (collisions, types, clés introuvables), non écrites
     """
-    # Chercher dans config
-    if key in asset_data['config']:
-        return asset_data['config'][key]
-    
-    # Chercher dans inputs
-    if key in asset_data['inputs']:
-        return asset_data['inputs'][key]
-    
-    # Chercher dans risks.revenue
-    if key in asset_data['risks']['revenue']:
-        return asset_data['risks']['revenue'][key]
-    
-    # Chercher dans risks.capital
-    if key in asset_data['risks']['capital']:
-        return asset_data['risks']['capital'][key]
-    
-    return None
+    writes = []
+    errors = [f"  ⚠ {err}" for err in index.errors + index.mapping_errors]
 
-# =============================================================================
-# 4. CHARGEMENT TEMPLATE
-# =============================================================================
+    for asset_name, cell, key, value in mapped_values(index):
+        old_value = ws[cell].value
+        ws[cell] = value
+        writes.append((asset_name, cell, key, value, old_value))
+
+    return writes, errors
+
+
+class TemplateFiller:
+    """
+    Template parsé une seule fois, réutilisé pour N scénarios.
+
+    fill() injecte, sauvegarde, puis remet les cellules touchées à leur
+    valeur d'origine: le classeur en mémoire redevient le template.
+
+    update() (watch.py) garde au contraire les valeurs injectées d'un appel
+    à l'autre et n'écrit que les cellules dont la valeur change. Ne pas
+    mélanger fill() et update() sur le même objet.
+    """
+
+    def __init__(self, template_path):
+        self.template_path = template_path
+        self.wb = openpyxl.load_workbook(template_path)
+        self.ws = self.wb.active
+        self._graph = None
+        self._injected = {}
+        self._original = {}
+
+    @property
+    def graph(self):
+        """Formules du template compilées (construites au premier usage)."""
+        if self._graph is None:
+            self._graph = FormulaGraph(self.wb)
+        return self._graph
 
-wb = openpyxl.load_workbook(TEMPLATE_PATH)
-ws = wb.active
+    def fill(self, model, output_path):
+        writes, errors = inject_model(self.ws, build_index(model))
+        try:
+            self.wb.save(output_path)
+        finally:
+            # Ordre inverse: une cellule mappée deux fois retrouve sa vraie valeur d'origine
+            for _, cell, _, _, old_value in reversed(writes):
+                self.ws[cell] = old_value
+        return writes, errors
 
-print(f"✓ Template chargé: {TEMPLATE_PATH}")
-print(f"  Feuille: {ws.title}")
+    def update(self, model, output_path):
+        """
+        Injection incrémentale: écrit les cellules dont la valeur a changé,
+        remet à leur valeur d'origine celles qui ne sont plus mappées, et
+        sauvegarde s'il y a eu au moins une écriture.
+
+        Returns:
+            changes: liste (cell, ancienne valeur, nouvelle valeur)
+            errors: comme inject_model
+        """
+        index = build_index(model)
+        errors = [f"  ⚠ {err}" for err in index.errors + index.mapping_errors]
+        target = {cell: value for _, cell, _, value in mapped_values(index)}
+
+        changes = []
+        for cell in sorted(self._injected.keys() - target.keys(), key=cell_sort_key):
+            changes.append((cell, self._injected[cell], self._original[cell]))
+            self.ws[cell] = self._original.pop(cell)
+        for cell, value in target.items():
+            if cell not in self._original:
+                self._original[cell] = self.ws[cell].value
+            elif self._injected[cell] == value:
+                continue
+            changes.append((cell, self.ws[cell].value, value))
+            self.ws[cell] = value
+        self._injected = target
+
+        if changes:
+            self.wb.save(output_path)
+        return changes, errors
 
 # =============================================================================
-# 5. INJECTION DES PARAMÈTRES
+# 3. VÉRIFICATION (lecture des formules)
 # =============================================================================
 
-print("\nInjection des paramètres...")
-print("-" * 60)
-
-total_cells = 0
-errors = []
-
-for asset_name in ['immobilier', 'betail', 'embouche']:
-    asset_data = model['assets'][asset_name]
-    mapping = asset_data['excel_mapping']['cells']
-    column = asset_data['excel_mapping']['column']
-    
-    print(f"\n{asset_name.upper()} (colonne {column}):")
-    
-    for key, cell in sorted(mapping.items(), key=lambda x: int(x[1][1:])):
-        value = find_value(key, asset_data)
-        
-        if value is None:
-            errors.append(f"  ⚠ {cell}: {key} NOT FOUND")
-            continue
-        
-        # Écrire la valeur
-        old_value = ws[cell].value
-        ws[cell] = value
-        total_cells += 1
-        
-        # Afficher si changement
-        if old_value != value:
-            print(f"  {cell}: {key} = {value} (était: {old_value})")
-        else:
-            print(f"  {cell}: {key} = {value}")
+def read_checks(output_path, model):
+    """Recharge le fichier écrit et lit les cellules de contrôle de model (formules)."""
+    # Note: data_only=False montre les formules, pas les valeurs calculées
+    # Pour voir les valeurs calculées, il faut ouvrir dans Excel
+    ws = openpyxl.load_workbook(output_path, data_only=False).active
+    return [(asset, cell, label, ws[cell].value) for asset, cell, label, _ in formula_checks(model)]
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def batched_pnl(asset_name, assets):
+    """
+    calculate_pnl d'un même actif pour plusieurs modèles, en une seule passe:
+    les paramètres qui diffèrent d'un modèle à l'autre passent en variants.
+    assets doivent partager le bloc pnl et les clés numériques (voir pnl_group).
+
+    Returns: {clé calculate_pnl: array[len(assets)]}
+    """
+    base = assets[0]
+    variants = {}
+    for section in ('config', 'inputs'):
+        for key, value in base[section].items():
+            if not _is_number(value):
+                continue
+            values = [asset_data[section][key] for asset_data in assets]
+            if any(v != value for v in values):
+                variants[key] = values
+    pnl = calculate_pnl(asset_name, base, variants or None)
+    return {key: np.broadcast_to(value, len(assets)) for key, value in pnl.items()}
+
+
+def pnl_group(asset_name, asset_data):
+    """Clé de regroupement pour batched_pnl: actif, bloc pnl, clés numériques."""
+    keys = tuple(sorted((section, key) for section in ('config', 'inputs')
+                        for key, value in asset_data[section].items() if _is_number(value)))
+    return asset_name, json.dumps(asset_data.get('pnl'), sort_keys=True), keys
+
+
+def check_formulas(graph, models):
+    """
+    Évalue les cellules de contrôle de tous les modèles en une seule passe
+    (un array par cellule d'entrée) et les compare à calculate_pnl, lui aussi
+    évalué une fois par actif et par structure de P&L (batched_pnl). Un modèle
+    n'est comparé que sur ses propres excel_mapping.checks.
+
+    Returns:
+        checks: union des formula_checks des modèles, dans l'ordre
+        computed: {cell: array[n_models]} valeurs des formules
+        expected: {cell: array[n_models]} valeurs calculate_pnl
+        mismatches: liste (index modèle, asset, cell, label, computed, expected)
+        errors: {index modèle: message} (clé de checks absente de calculate_pnl)
+    """
+    columns = {}
+    for i, model in enumerate(models):
+        for _, cell, _, value in mapped_values(build_index(model)):
+            if cell not in columns:
+                default = graph.constants.get(graph.key(cell), 0.0)
+                columns[cell] = np.full(len(models), default, dtype=np.float64)
+            columns[cell][i] = value
+
+    per_model = [formula_checks(model) for model in models]
+    checks = list(dict.fromkeys(check for model_checks in per_model for check in model_checks))
+    cells = list(dict.fromkeys(cell for _, cell, _, _ in checks))
+    computed = graph.evaluate(cells, columns)
+    computed = {cell: np.broadcast_to(value, len(models)) for cell, value in computed.items()}
+
+    masks = {check: np.zeros(len(models), dtype=bool) for check in checks}
+    groups = {}
+    for i, model_checks in enumerate(per_model):
+        for check in model_checks:
+            masks[check][i] = True
+        for asset_name in dict.fromkeys(check[0] for check in model_checks):
+            group = pnl_group(asset_name, models[i]['assets'][asset_name])
+            groups.setdefault(group, []).append(i)
+
+    expected = {check: np.full(len(models), np.nan) for check in checks}
+    errors = {}
+    for (asset_name, _, _), indices in groups.items():
+        indices = np.array(indices)
+        pnl = batched_pnl(asset_name, [models[i]['assets'][asset_name] for i in indices])
+        for check in checks:
+            if check[0] != asset_name:
+                continue
+            selected = masks[check][indices]
+            if check[3] not in pnl:
+                for i in indices[selected]:
+                    errors[int(i)] = (f"{asset_name}.excel_mapping.checks: {check[3]!r} n'est pas "
+                                      f"une sortie de calculate_pnl")
+                    masks[check][i] = False
+                continue
+            expected[check][indices[selected]] = pnl[check[3]][selected]
+
+    mismatches = []
+    for check in checks:
+        asset_name, cell, label, _ = check
+        ok = np.isclose(computed[cell], expected[check], rtol=CHECK_RTOL, atol=1e-6) | ~masks[check]
+        for i in np.flatnonzero(~ok):
+            mismatches.append((int(i), asset_name, cell, label,
+                               float(computed[cell][i]), float(expected[check][i])))
+    expected = {check[1]: values for check, values in expected.items()}
+    return checks, computed, expected, mismatches, errors
 
 # =============================================================================
-# 6. AFFICHAGE ERREURS
+# 4. MODE BATCH (pool de workers, template parsé une fois)
 # =============================================================================
 
-if errors:
-    print("\n⚠ ERREURS:")
-    for err in errors:
-        print(err)
+_FILLER = None
+
+
+def _init_worker(template_path):
+    # Avec fork (Linux), le template parsé par le parent est hérité tel quel
+    global _FILLER
+    if _FILLER is None or _FILLER.template_path != template_path:
+        _FILLER = TemplateFiller(template_path)
+
+
+def _fill_one(scenario, model_path, output_path, verify):
+    try:
+        with open(model_path, 'r') as f:
+            model = json.load(f)
+        writes, errors = _FILLER.fill(model, output_path)
+        checks = read_checks(output_path, model) if verify else None
+    except Exception as e:
+        return scenario, output_path, 0, [f"{type(e).__name__}: {e}"], None
+    return scenario, output_path, len(writes), errors, checks
+
+
+def run_check(patterns, template_path):
+    """Vérifie les formules de tous les scénarios sans écrire de classeur."""
+    from batch import collect_model_paths, scenario_ids
+    from simulate import load_model
+
+    paths = collect_model_paths(patterns)
+    ids = scenario_ids(paths)
+    valid, models, errors = [], [], {}
+    for scenario, path in zip(ids, paths):
+        try:
+            models.append(load_model(path))
+            valid.append(scenario)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            errors[scenario] = f"{type(e).__name__}: {e}"
+    graph = TemplateFiller(template_path).graph
+    checks, _, _, mismatches, check_errors = check_formulas(graph, models)
+    errors.update({valid[i]: message for i, message in check_errors.items()})
+    mismatches = [(valid[i], *mismatch) for i, *mismatch in mismatches]
+    return ids, checks, mismatches, errors
+
+
+def run_batch(patterns, template_path, out_dir, workers=None, verify=False):
+    """Remplit un classeur par model.json trouvé. Retourne la liste des résultats."""
+    from batch import collect_model_paths, scenario_ids
+
+    global _FILLER
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = collect_model_paths(patterns)
+    ids = scenario_ids(paths)
+
+    _FILLER = TemplateFiller(template_path)
+    tasks = [(scenario, path, str(out_dir / f"{scenario}.xlsx"), verify)
+             for scenario, path in zip(ids, paths)]
+
+    if workers == 1:
+        return [_fill_one(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(template_path,)) as pool:
+        return list(pool.map(_fill_one, *zip(*tasks))) if tasks else []
 
 # =============================================================================
-# 7. SAUVEGARDE
+# 5. EXPORT DES DISTRIBUTIONS (write-only, mémoire bornée)
 # =============================================================================
 
-wb.save(OUTPUT_PATH)
+class SplitSheet:
+    """Feuille write-only qui continue sur 'Titre (2)', 'Titre (3)'... une fois pleine."""
+
+    def __init__(self, wb, title, header, max_rows=EXCEL_MAX_ROWS):
+        self.wb = wb
+        self.title = title
+        self.header = header
+        self.max_rows = max_rows
+        self.n_sheets = 0
+        self.n_rows = 0
+        self._new_sheet()
+
+    def _new_sheet(self):
+        self.n_sheets += 1
+        title = self.title if self.n_sheets == 1 else f"{self.title} ({self.n_sheets})"
+        self.ws = self.wb.create_sheet(title)
+        self.ws.append(self.header)
+        self.sheet_rows = 1
+
+    def append(self, row):
+        if self.sheet_rows == self.max_rows:
+            self._new_sheet()
+        self.ws.append(row)
+        self.sheet_rows += 1
+        self.n_rows += 1
+
+
+def runs_chunks(results, runs_dir):
+    """
+    Vérifie que le checkpoint runs_dir est complet et vient du même run
+    que results.json. Retourne le nombre de chunks par job.
+    """
+    manifest = load_manifest(runs_dir)
+    if manifest is None:
+        raise ValueError(f"{runs_dir}: pas de manifest.json (lancer simulate.py --checkpoint)")
+    meta = results['meta']
+    for key in ['n_runs', 'n_years', 'seed', 'engine']:
+        if manifest.get(key) != meta.get(key):
+            raise ValueError(f"{key}: checkpoint={manifest.get(key)!r}, results.json={meta.get(key)!r}")
+    n_chunks = -(-manifest['n_runs'] // manifest['chunk_size'])
+    for mode in MODES:
+        for asset_name in results['pnl']:
+            scope = f"{asset_name}:{mode}"
+            if manifest['jobs'].get(scope, {}).get('chunks_done', 0) < n_chunks:
+                raise ValueError(f"{scope}: checkpoint incomplet")
+    return n_chunks
+
+
+def export_distributions(results_path, output_path, runs_dir=None, max_rows=EXCEL_MAX_ROWS):
+    """
+    Écrit les distributions simulées dans un classeur en mode write-only.
+
+    Feuilles:
+        Résumé        une ligne par mode × actif (bloc summary + bornes IC95)
+        Percentiles   mean/p10/p50/p90 par année, par mode × actif × métrique,
+                      chacun suivi de ses bornes IC95 (bloc ci)
+        Trajectoires  les trajectoires de revenus de results.json
+        Runs          rendement final de chaque run, une colonne par mode × actif
+                      (seulement avec runs_dir; lu chunk par chunk)
+
+    Returns:
+        ({titre: nombre de lignes de données}, nombre de feuilles écrites)
+    """
+    with open(results_path, 'r') as f:
+        results = json.load(f)
+    n_years = results['meta']['n_years']
+    assets = list(results['pnl'])
+    n_chunks = runs_chunks(results, runs_dir) if runs_dir else None
+
+    wb = openpyxl.Workbook(write_only=True)
+    sheets = []
+
+    first = results['simulation'][MODES[0]][assets[0]]['summary']
+    ci_header = [f"{key} IC95 {side}" for key in first for side in ('bas', 'haut')]
+    summary = SplitSheet(wb, 'Résumé', ['mode', 'actif'] + list(first) + ci_header, max_rows)
+    for mode in MODES:
+        for asset_name in assets:
+            job = results['simulation'][mode][asset_name]
+            ci = job.get('ci', {}).get('summary', {})
+            bounds = [ci.get(key, {}).get(side) for key in first for side in ('low', 'high')]
+            summary.append([mode, asset_name] + list(job['summary'].values()) + bounds)
+    sheets.append(summary)
+
+    header = ['mode', 'actif', 'métrique', 'stat'] + [f"année {y}" for y in range(n_years + 1)]
+    percentiles = SplitSheet(wb, 'Percentiles', header, max_rows)
+    for mode in MODES:
+        for asset_name in assets:
+            job = results['simulation'][mode][asset_name]
+            for metric, stats in job.items():
+                if metric in ('summary', 'ci'):
+                    continue
+                ci = job.get('ci', {}).get(metric, {})
+                for stat, values in stats.items():
+                    # revenues commence à l'année 1, capitals/units à l'année 0
+                    padding = [None] * (n_years + 1 - len(values))
+                    percentiles.append([mode, asset_name, metric, stat] + padding + values)
+                    for side, label in (('low', 'bas'), ('high', 'haut')):
+                        if stat in ci:
+                            percentiles.append([mode, asset_name, metric, f"{stat} IC95 {label}"]
+                                               + padding + ci[stat][side])
+    sheets.append(percentiles)
 
-print("\n" + "=" * 80)
-print(f"✓ {total_cells} cellules écrites")
-print(f"✓ Fichier sauvegardé: {OUTPUT_PATH}")
-print("=" * 80)
+    header = ['actif', 'trajectoire'] + [f"année {y}" for y in range(1, n_years + 1)]
+    trajectories = SplitSheet(wb, 'Trajectoires', header, max_rows)
+    for asset_name in assets:
+        for i, revenues in enumerate(results['trajectories']['data'][asset_name]):
+            trajectories.append([asset_name, i] + revenues)
+    sheets.append(trajectories)
+
+    if runs_dir:
+        scopes = [(asset_name, mode) for mode in MODES for asset_name in assets]
+        header = ['run'] + [f"{asset_name} {mode}" for asset_name, mode in scopes]
+        runs = SplitSheet(wb, 'Runs', header, max_rows)
+        streams = [iter_chunks(runs_dir, f"{asset_name}:{mode}", n_chunks)
+                   for asset_name, mode in scopes]
+        run = 0
+        for parts in zip(*streams):
+            columns = [(capitals[:, -1] / results['pnl'][asset_name]['capital_total'] - 1).tolist()
+                       for (asset_name, _), (_, capitals, _) in zip(scopes, parts)]
+            for row in zip(*columns):
+                runs.append([run, *row])
+                run += 1
+        sheets.append(runs)
+
+    wb.save(output_path)
+    return {sheet.title: sheet.n_rows for sheet in sheets}, sum(s.n_sheets for s in sheets)
 
 # =============================================================================
-# 8. VÉRIFICATION (lecture des formules calculées)
+# 6. EXÉCUTION
 # =============================================================================
 
-print("\nVÉRIFICATION — Formules Excel vs model.json P&L:")
-print("-" * 60)
+def main_single(template_path, model_path, output_path):
+    with open(model_path, 'r') as f:
+        model = json.load(f)
+
+    print(f"\n✓ model.json chargé (version {model['meta']['version']})")
+
+    filler = TemplateFiller(template_path)
+
+    print(f"✓ Template chargé: {template_path}")
+    print(f"  Feuille: {filler.ws.title}")
+
+    print("\nInjection des paramètres...")
+    print("-" * 60)
+
+    writes, errors = filler.fill(model, output_path)
+
+    for asset_name, asset_data in model['assets'].items():
+        column = asset_data['excel_mapping']['column']
+        print(f"\n{asset_name.upper()} (colonne {column}):")
+
+        for written_asset, cell, key, value, old_value in writes:
+            if written_asset != asset_name:
+                continue
+            # Afficher si changement
+            if old_value != value:
+                print(f"  {cell}: {key} = {value} (était: {old_value})")
+            else:
+                print(f"  {cell}: {key} = {value}")
+
+    if errors:
+        print("\n⚠ ERREURS:")
+        for err in errors:
+            print(err)
+
+    print("\n" + "=" * 80)
+    print(f"✓ {len(writes)} cellules écrites")
+    print(f"✓ Fichier sauvegardé: {output_path}")
+    print("=" * 80)
+
+    print("\nVÉRIFICATION — Formules Excel vs model.json P&L:")
+    print("-" * 60)
+    print(f"{'Asset':<12} {'Cellule':<10} {'Formule/Valeur':<30}")
+    print("-" * 60)
+
+    for asset, cell, label, val in read_checks(output_path, model):
+        print(f"{asset:<12} {cell:<10} {str(val):<30} ({label})")
+
+    print("\nVÉRIFICATION — Formules évaluées en Python vs calculate_pnl:")
+    print("-" * 60)
+    try:
+        checks, computed, expected, mismatches, check_errors = check_formulas(filler.graph, [model])
+    except FormulaError as e:
+        print(f"⚠ Évaluation impossible: {e}")
+        print("\n💡 Pour vérifier les calculs, ouvrir le fichier dans Excel.")
+        return
+
+    print(f"{'Asset':<12} {'Cellule':<10} {'Excel (Python)':>16} {'calculate_pnl':>16}")
+    print("-" * 60)
+    wrong = {(asset, cell) for _, asset, cell, _, _, _ in mismatches}
+    for asset, cell, label, _ in checks:
+        status = '✗' if (asset, cell) in wrong else '⚠' if np.isnan(expected[cell][0]) else '✓'
+        print(f"{asset:<12} {cell:<10} {computed[cell][0]:>16,.0f} {expected[cell][0]:>16,.0f}  "
+              f"{status} ({label})")
+    for message in check_errors.values():
+        print(f"⚠ {message}")
+
+
+def main_check(args):
+    start = time.perf_counter()
+    try:
+        ids, checks, mismatches, errors = run_check(args.batch, args.template)
+    except FormulaError as e:
+        print(f"✗ Évaluation impossible: {e}")
+        return 1
+
+    for scenario, error in errors.items():
+        print(f"  ⚠ {scenario:<30} {error}")
+    for scenario, asset, cell, label, value, expected in mismatches[:MAX_MISMATCHES_SHOWN]:
+        print(f"  ✗ {scenario:<30} {asset:<12} {cell:<6} {value:,.2f} ≠ {expected:,.2f} ({label})")
+    if len(mismatches) > MAX_MISMATCHES_SHOWN:
+        print(f"  ... {len(mismatches) - MAX_MISMATCHES_SHOWN} autres écarts")
+
+    print("\n" + "=" * 80)
+    print(f"{'✗' if mismatches else '✓'} {len(ids)} scénarios × {len(checks)} cellules vérifiés en "
+          f"{time.perf_counter() - start:.2f}s ({len(mismatches)} écarts)")
+    if errors:
+        print(f"⚠ {len(errors)} scénarios invalides ou incomplets")
+    print("=" * 80)
+    return 1 if mismatches or errors else 0
+
+
+def main_batch(args):
+    if args.check:
+        return main_check(args)
+    start = time.perf_counter()
+    results = run_batch(args.batch, args.template, args.out_dir, args.workers, args.verify)
+
+    n_errors = 0
+    for scenario, output_path, n_cells, errors, checks in results:
+        status = '⚠' if errors else '✓'
+        n_errors += bool(errors)
+        print(f"  {status} {scenario:<30} {n_cells:>4} cellules → {output_path}")
+        for err in errors:
+            print(f"    {err.strip()}")
+        for asset, cell, label, val in checks or []:
+            print(f"    {asset:<12} {cell:<6} {str(val):<30} ({label})")
+
+    print("\n" + "=" * 80)
+    print(f"✓ {len(results)} classeurs en {time.perf_counter() - start:.1f}s "
+          f"({args.workers or os.cpu_count()} workers, template parsé une fois)")
+    if n_errors:
+        print(f"⚠ {n_errors} scénarios avec erreurs")
+    print("=" * 80)
+    return 1 if n_errors else 0
+
+
+def main_distributions(args):
+    start = time.perf_counter()
+    try:
+        counts, n_sheets = export_distributions(args.results, args.distributions, args.runs)
+    except (OSError, ValueError) as e:
+        print(f"✗ {e}")
+        return 1
+
+    for title, n_rows in counts.items():
+        print(f"  ✓ {title:<14} {n_rows:>10,} lignes")
+    if not args.runs:
+        print("  (rendements par run: ajouter --runs checkpoint/ après simulate.py --checkpoint)")
+    print("\n" + "=" * 80)
+    print(f"✓ {args.distributions} ({n_sheets} feuilles, {time.perf_counter() - start:.1f}s)")
+    print("=" * 80)
+    return 0
 
-# Recharger pour voir les valeurs
-wb2 = openpyxl.load_workbook(OUTPUT_PATH, data_only=False)
-ws2 = wb2.active
 
-# Note: data_only=False montre les formules, pas les valeurs calculées
-# Pour voir les valeurs calculées, il faut ouvrir dans Excel
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Injection paramètres dans Excel")
+    parser.add_argument('--template', default=TEMPLATE_PATH)
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--output', default=OUTPUT_PATH, help="classeur rempli")
+    parser.add_argument('--batch', nargs='+', metavar='PATTERN',
+                        help="dossiers ou globs de model.json (mode batch)")
+    parser.add_argument('--out-dir', default='excel_out', help="dossier de sortie (batch)")
+    parser.add_argument('--workers', type=int, help="taille du pool (défaut: nb de cœurs)")
+    parser.add_argument('--verify', action='store_true',
+                        help="batch: relire chaque fichier et afficher les cellules de contrôle")
+    parser.add_argument('--check', action='store_true',
+                        help="batch: formules de contrôle évaluées en Python vs calculate_pnl, "
+                             "sans écrire de classeur")
+    parser.add_argument('--distributions', metavar='OUTPUT',
+                        help="exporter les distributions simulées dans ce classeur")
+    parser.add_argument('--results', default='results.json',
+                        help="results.json source de --distributions")
+    parser.add_argument('--runs', metavar='DIR',
+                        help="dossier de checkpoint: ajoute le rendement final de chaque run")
+    args = parser.parse_args(argv)
 
-print(f"{'Asset':<12} {'Cellule':<10} {'Formule/Valeur':<30}")
-print("-" * 60)
+    print("=" * 80)
+    print("EXCEL_WRITER.PY — Injection paramètres")
+    print("=" * 80)
 
-checks = [
-    ('immobilier', 'C6', 'Capital total'),
-    ('immobilier', 'C33', 'Bénéfice/unité'),
-    ('betail', 'H6', 'Capital total'),
-    ('betail', 'H33', 'Bénéfice/unité'),
-    ('embouche', 'M9', 'Capital total'),
-    ('embouche', 'M33', 'Bénéfice/veau'),
-]
+    if args.distributions:
+        return main_distributions(args)
+    if not os.path.isfile(args.template):
+        print(f"✗ Template introuvable: {args.template} (--template)")
+        return 1
+    if args.batch:
+        return main_batch(args)
+    main_single(args.template, args.model, args.output)
+    return 0
 
-for asset, cell, label in checks:
-    val = ws2[cell].value
-    print(f"{asset:<12} {cell:<10} {str(val):<30} ({label})")
 
-print("\n💡 Pour vérifier les calculs, ouvrir le fichier dans Excel.")
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,334 @@
+"""
+FORMULAS.PY — Évaluation des formules du template Excel en Python
+==================================================================
+Flow: template.xlsx → FormulaGraph → valeurs des cellules formules
+
+Ce qu'il fait:
+- Lit les constantes et les formules de toutes les feuilles du template
+- Compile chaque formule une seule fois en lambda Python (cache par texte)
+- Ordonne les dépendances une fois par ensemble de cellules demandées
+- Évalue sur des scalaires OU des arrays numpy: un array par cellule
+  d'entrée = tous les scénarios d'un batch en une seule passe
+
+Sous-ensemble Excel supporté:
+- Nombres, chaînes, TRUE/FALSE, références A1 / $A$1 / Feuille!A1, plages A1:B3
+- Opérateurs + - * / ^ & % = <> < > <= >= (priorités Excel: -2^2 = 4)
+- SUM, MIN, MAX, AVERAGE, PRODUCT, ABS, ROUND, IF, IFERROR, AND, OR, NOT
+
+Une fonction ou une syntaxe hors de ce sous-ensemble lève FormulaError
+(jamais de résultat silencieusement faux). Cellule vide = 0, comme Excel.
+Les erreurs Excel (#DIV/0!) deviennent inf / nan.
+"""
+
+import re
+from functools import lru_cache, reduce
+
+import numpy as np
+from openpyxl.utils import get_column_letter, range_boundaries
+
+
+class FormulaError(Exception):
+    """Formule non supportée, référence circulaire ou valeur non numérique."""
+
+# =============================================================================
+# 1. TOKENIZER
+# =============================================================================
+
+_SHEET = r"(?:'(?:[^']|'')+'|[A-Za-z_][\w\.]*)!"
+_CELL = r"\$?[A-Za-z]{1,3}\$?\d+"
+
+_TOKEN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<string>"(?:[^"]|"")*")
+  | (?P<func>[A-Za-z_][\w\.]*(?=\())
+  | (?P<ref>(?:%s)?%s(?::%s)?)
+  | (?P<bool>(?i:TRUE|FALSE)\b)
+  | (?P<op><>|<=|>=|[-+*/^&=<>%%(),;])
+""" % (_SHEET, _CELL, _CELL), re.VERBOSE)
+
+
+def tokenize(text):
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if match is None:
+            raise FormulaError(f"Syntaxe non supportée à la position {pos}: {text!r}")
+        pos = match.end()
+        if match.lastgroup != 'space':
+            tokens.append((match.lastgroup, match.group()))
+    return tokens
+
+
+def _split_ref(text, sheet):
+    """'Feuille!$A$1:B2' → (feuille, 'A1', 'B2' ou None)."""
+    if '!' in text:
+        sheet, text = text.rsplit('!', 1)
+        if sheet.startswith("'"):
+            sheet = sheet[1:-1].replace("''", "'")
+    cells = text.replace('$', '').upper().split(':')
+    return sheet, cells[0], cells[1] if len(cells) > 1 else None
+
+# =============================================================================
+# 2. PARSER → SOURCE PYTHON
+# =============================================================================
+
+_COMPARE = {'=': '==', '<>': '!=', '<': '<', '>': '>', '<=': '<=', '>=': '>='}
+
+
+class _Parser:
+    """Descente récursive; produit une expression Python sur v[(feuille, cellule)]."""
+
+    def __init__(self, tokens, sheet):
+        self.tokens = tokens
+        self.pos = 0
+        self.sheet = sheet
+        self.refs = set()
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, value=None):
+        kind, text = self.peek()
+        if kind is None or (value is not None and text != value):
+            raise FormulaError(f"Attendu {value!r}, trouvé {text!r}")
+        self.pos += 1
+        return kind, text
+
+    def parse(self):
+        source = self.compare()
+        if self.pos != len(self.tokens):
+            raise FormulaError(f"Jeton inattendu: {self.peek()[1]!r}")
+        return source
+
+    def binary(self, operand, operators, build):
+        left = operand()
+        while self.peek()[0] == 'op' and self.peek()[1] in operators:
+            op = self.take()[1]
+            left = build(op, left, operand())
+        return left
+
+    def compare(self):
+        return self.binary(self.concat, _COMPARE, lambda op, a, b: f"({a} {_COMPARE[op]} {b})")
+
+    def concat(self):
+        return self.binary(self.additive, {'&'}, lambda op, a, b: f"_CONCAT({a}, {b})")
+
+    def additive(self):
+        return self.binary(self.term, {'+', '-'}, lambda op, a, b: f"({a} {op} {b})")
+
+    def term(self):
+        return self.binary(self.power, {'*', '/'}, lambda op, a, b: f"({a} {op} {b})")
+
+    def power(self):
+        return self.binary(self.unary, {'^'}, lambda op, a, b: f"({a} ** {b})")
+
+    def unary(self):
+        if self.peek() in [('op', '-'), ('op', '+')]:
+            op = self.take()[1]
+            return f"({op}{self.unary()})"
+        return self.postfix()
+
+    def postfix(self):
+        source = self.primary()
+        while self.peek() == ('op', '%'):
+            self.take()
+            source = f"({source} / 100)"
+        return source
+
+    def primary(self):
+        kind, text = self.take()
+        if kind == 'number':
+            return f"_F({float(text)!r})"
+        if kind == 'string':
+            return repr(text[1:-1].replace('""', '"'))
+        if kind == 'bool':
+            return 'True' if text.upper() == 'TRUE' else 'False'
+        if kind == 'ref':
+            return self.reference(text)
+        if kind == 'func':
+            return self.call(text.upper())
+        if (kind, text) == ('op', '('):
+            source = self.compare()
+            self.take(')')
+            return source
+        raise FormulaError(f"Jeton inattendu: {text!r}")
+
+    def reference(self, text):
+        sheet, first, last = _split_ref(text, self.sheet)
+        if last is None:
+            self.refs.add((sheet, first))
+            return f"v[{(sheet, first)!r}]"
+        min_col, min_row, max_col, max_row = range_boundaries(f"{first}:{last}")
+        keys = [(sheet, f"{get_column_letter(col)}{row}")
+                for row in range(min_row, max_row + 1)
+                for col in range(min_col, max_col + 1)]
+        self.refs.update(keys)
+        return "(" + "".join(f"v[{key!r}], " for key in keys) + ")"
+
+    def call(self, name):
+        if name not in FUNCTIONS:
+            raise FormulaError(f"Fonction non supportée: {name}")
+        self.take('(')
+        args = []
+        if self.peek() != ('op', ')'):
+            args.append(self.compare())
+            while self.peek() in [('op', ','), ('op', ';')]:
+                self.take()
+                args.append(self.compare())
+        self.take(')')
+        return f"_{name}({', '.join(args)})"
+
+# =============================================================================
+# 3. FONCTIONS EXCEL (scalaires ou arrays numpy)
+# =============================================================================
+
+def _flatten(args):
+    for arg in args:
+        if isinstance(arg, tuple):
+            yield from arg
+        else:
+            yield arg
+
+
+def _round(x, digits=0):
+    # Excel arrondit les demis loin de zéro (np.round arrondit au pair)
+    factor = 10.0 ** digits
+    return np.sign(x) * np.floor(np.abs(x) * factor + 0.5) / factor
+
+
+FUNCTIONS = {
+    'SUM': lambda *a: sum(_flatten(a), 0.0),
+    'MIN': lambda *a: reduce(np.minimum, _flatten(a)),
+    'MAX': lambda *a: reduce(np.maximum, _flatten(a)),
+    'AVERAGE': lambda *a: sum(_flatten(a), 0.0) / len(list(_flatten(a))),
+    'PRODUCT': lambda *a: reduce(np.multiply, _flatten(a)),
+    'ABS': np.abs,
+    'ROUND': _round,
+    'IF': lambda cond, a, b=False: np.where(cond, a, b),
+    'IFERROR': lambda a, b: np.where(np.isfinite(a), a, b),
+    'AND': lambda *a: reduce(np.logical_and, _flatten(a)),
+    'OR': lambda *a: reduce(np.logical_or, _flatten(a)),
+    'NOT': np.logical_not,
+}
+
+_NAMESPACE = {f"_{name}": fn for name, fn in FUNCTIONS.items()}
+_NAMESPACE['_CONCAT'] = lambda a, b: f"{a}{b}"
+_NAMESPACE['_F'] = np.float64
+
+
+@lru_cache(maxsize=None)
+def compile_formula(text, sheet):
+    """'=C4*C5' (sur sheet) → (fonction v → valeur, références lues)."""
+    parser = _Parser(tokenize(text.lstrip('=')), sheet)
+    source = parser.parse()
+    fn = eval(f"lambda v: {source}", dict(_NAMESPACE))
+    return fn, frozenset(parser.refs)
+
+# =============================================================================
+# 4. GRAPHE DU CLASSEUR
+# =============================================================================
+
+class FormulaGraph:
+    """
+    Constantes + formules compilées d'un classeur openpyxl (data_only=False).
+
+    Les cellules se désignent par 'C6' (feuille active) ou ('Feuille', 'C6').
+    """
+
+    def __init__(self, wb):
+        self.default_sheet = wb.active.title
+        self.constants = {}
+        self.formulas = {}
+        for ws in wb.worksheets:
+            for row in ws.iter_rows():
+                for cell in row:
+                    value = cell.value
+                    if value is None:
+                        continue
+                    key = (ws.title, cell.coordinate)
+                    if isinstance(value, str) and value.startswith('='):
+                        self.formulas[key] = value
+                    elif isinstance(value, (bool, int, float)):
+                        self.constants[key] = np.float64(value)
+                    else:
+                        self.constants[key] = value
+        self._plans = {}
+
+    def key(self, cell):
+        if isinstance(cell, tuple):
+            return cell
+        return (self.default_sheet, cell.replace('$', '').upper())
+
+    def plan(self, targets):
+        """Formules à évaluer pour targets, dans l'ordre des dépendances (en cache)."""
+        targets = tuple(self.key(t) for t in targets)
+        if targets in self._plans:
+            return self._plans[targets]
+
+        order = []
+        state = {}  # 1 = en cours, 2 = fait
+        for target in targets:
+            stack = [(target, False)]
+            while stack:
+                key, expanded = stack.pop()
+                if key not in self.formulas or state.get(key) == 2:
+                    continue
+                if expanded:
+                    state[key] = 2
+                    order.append((key, compile_formula(self.formulas[key], key[0])[0]))
+                    continue
+                if state.get(key) == 1:
+                    raise FormulaError(f"Référence circulaire sur {key[0]}!{key[1]}")
+                state[key] = 1
+                stack.append((key, True))
+                try:
+                    refs = compile_formula(self.formulas[key], key[0])[1]
+                except FormulaError as e:
+                    raise FormulaError(f"{key[0]}!{key[1]} {self.formulas[key]}: {e}") from None
+                for ref in refs:
+                    if ref in self.formulas and state.get(ref) == 1:
+                        raise FormulaError(f"Référence circulaire sur {ref[0]}!{ref[1]}")
+                    stack.append((ref, False))
+
+        self._plans[targets] = order
+        return order
+
+    def evaluate(self, targets, inputs=None):
+        """
+        Évalue les cellules targets.
+
+        Args:
+            targets: liste de cellules ('C6' ou (feuille, cellule))
+            inputs: {cellule: valeur ou array} qui remplace les constantes
+                    du template (les arrays doivent avoir la même longueur)
+
+        Returns:
+            {cellule demandée: valeur (float ou array)}
+        """
+        values = _Values(self.constants)
+        for cell, value in (inputs or {}).items():
+            values[self.key(cell)] = np.asarray(value, dtype=np.float64)
+
+        with np.errstate(all='ignore'):
+            for key, fn in self.plan(targets):
+                try:
+                    values[key] = fn(values)
+                except TypeError as e:
+                    raise FormulaError(f"{key[0]}!{key[1]} {self.formulas[key]}: {e}") from None
+
+        results = {}
+        for target in targets:
+            value = values[self.key(target)]
+            if isinstance(value, (np.generic, np.ndarray)) and np.ndim(value) == 0:
+                value = value.item()
+            results[target] = value
+        return results
+
+
+class _Values(dict):
+    """Valeurs des cellules; une cellule absente vaut 0 (cellule vide Excel)."""
+
+    def __missing__(self, key):
+        return np.float64(0.0)
@@ -0,0 +1,151 @@
+"""
+INSTRUMENTATION.PY — Chronométrage et compteurs du moteur
+==========================================================
+Flow: simulate.py --profile → results['meta']['instrumentation'] (+ trace)
+
+Ce qu'il fait:
+- Chronomètre chaque phase (temps mur + temps CPU)
+- Agrège les compteurs par actif × mode (tirages, pertes, achats)
+- Relève le pic mémoire du process
+- Exporte une trace au format Chrome Trace Event (chrome://tracing, Perfetto)
+
+Désactivé, NULL_INSTRUMENTATION ne fait rien: phase() renvoie un contexte
+vide réutilisable, count() est une fonction vide.
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_memory_mb():
+    """Pic de mémoire résidente du process (Mo), None si indisponible."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss: octets sur macOS, kilo-octets sur Linux
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+class Instrumentation:
+    """
+    Collecteur de mesures pour un run de simulate.py.
+
+    Les phases sont nommées 'phase' ou 'phase:actif:mode'. Les totaux
+    sont agrégés sur le préfixe avant le premier ':'.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.phases = {}
+        self.counters = {}
+        self._events = []
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            entry = self.phases.setdefault(name, {'wall_s': 0.0, 'cpu_s': 0.0, 'calls': 0})
+            entry['wall_s'] += wall
+            entry['cpu_s'] += cpu
+            entry['calls'] += 1
+            self._events.append({
+                'name': name,
+                'ph': 'X',
+                'ts': (wall_start - self._origin) * 1e6,
+                'dur': wall * 1e6,
+                'pid': os.getpid(),
+                'tid': 0,
+                'args': {'cpu_ms': cpu * 1e3},
+            })
+
+    def count(self, scope, **counters):
+        """Ajoute des compteurs pour un scope (ex: 'embouche:with_reinvest')."""
+        entry = self.counters.setdefault(scope, {})
+        for key, value in counters.items():
+            entry[key] = entry.get(key, 0) + value
+
+    def totals(self):
+        """Temps agrégés par phase (préfixe avant ':')."""
+        totals = {}
+        for name, entry in self.phases.items():
+            prefix = name.split(':', 1)[0]
+            total = totals.setdefault(prefix, {'wall_s': 0.0, 'cpu_s': 0.0, 'calls': 0})
+            for key in total:
+                total[key] += entry[key]
+        return totals
+
+    def to_meta(self):
+        """Dict sérialisable pour results['meta']['instrumentation']."""
+        return {
+            'enabled': True,
+            'phases': self.phases,
+            'totals': self.totals(),
+            'counters': self.counters,
+            'peak_memory_mb': peak_memory_mb(),
+        }
+
+    def write_trace(self, path):
+        """Écrit la trace (Chrome Trace Event) avec les compteurs en args."""
+        events = list(self._events)
+        end = (time.perf_counter() - self._origin) * 1e6
+        for scope, counters in self.counters.items():
+            events.append({
+                'name': scope,
+                'ph': 'C',
+                'ts': end,
+                'pid': os.getpid(),
+                'tid': 0,
+                'args': counters,
+            })
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    def report(self):
+        """Affiche le tableau des phases et des compteurs."""
+        print(f"{'Phase':<40} {'Mur (s)':>10} {'CPU (s)':>10} {'Appels':>7}")
+        print("-" * 70)
+        for name, entry in sorted(self.phases.items(), key=lambda x: -x[1]['wall_s']):
+            print(f"{name:<40} {entry['wall_s']:>10.3f} {entry['cpu_s']:>10.3f} {entry['calls']:>7}")
+        print("-" * 70)
+        for scope, counters in self.counters.items():
+            values = '  '.join(f"{k}={v:,}" for k, v in counters.items())
+            print(f"{scope:<28} {values}")
+        peak = peak_memory_mb()
+        if peak is not None:
+            print(f"\nPic mémoire: {peak:.1f} Mo")
+
+
+class NullInstrumentation:
+    """Instrumentation désactivée: aucun coût mesurable dans les boucles."""
+
+    enabled = False
+    _context = nullcontext()
+
+    def phase(self, name):
+        return self._context
+
+    def count(self, scope, **counters):
+        pass
+
+    def to_meta(self):
+        return {'enabled': False}
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
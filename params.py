@@ -0,0 +1,165 @@
+"""
+PARAMS.PY — Index plat et validé des paramètres de model.json
+==============================================================
+Flow: model.json → build_index() → ParamIndex → excel_writer / simulate / batch
+
+Ce qu'il fait:
+- Aplati config, inputs, risks.revenue, risks.capital en un dict par actif
+  (une seule lecture de model.json, ensuite des accès directs)
+- Détecte les collisions (même clé dans deux sections d'un actif) et
+  les cellules Excel mappées deux fois ou mal formées
+- Type les valeurs selon la nomenclature: n_ = entier ≥ 0, p_ = probabilité
+  dans [0, 1], autres = nombre (name/label = texte)
+- Vérifie les contraintes dont dépendent le P&L et le moteur: price_unit > 0
+  (divisions), pct_low ≤ pct_base ≤ pct_high (loi triangulaire)
+- Pré-trie les cellules de excel_mapping par ligne puis colonne
+
+Toutes les erreurs sont collectées à la construction (pas d'arrêt à la
+première): ParamIndex.errors, ou validate() qui les lève en un bloc.
+"""
+
+import re
+
+SECTIONS = [
+    ('config',),
+    ('inputs',),
+    ('risks', 'revenue'),
+    ('risks', 'capital'),
+]
+
+# Clés descriptives (texte), pas des paramètres numériques
+TEXT_KEYS = {'name', 'label'}
+
+# Diviseurs du P&L et du moteur (achats: floor(cash / price_unit))
+POSITIVE_KEYS = {'price_unit'}
+
+# Bornes de la loi triangulaire des revenus, dans l'ordre attendu
+TRIANGULAR_KEYS = ('pct_low', 'pct_base', 'pct_high')
+
+_CELL = re.compile(r'^([A-Z]{1,3})([1-9]\d*)$')
+
+
+class ParameterError(ValueError):
+    """model.json invalide; le message liste toutes les erreurs."""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__("\n".join(self.errors))
+
+
+def cell_sort_key(cell):
+    """'C13' → (13, 3): tri par ligne puis colonne."""
+    letters, row = _CELL.match(cell).groups()
+    column = 0
+    for letter in letters:
+        column = column * 26 + ord(letter) - ord('A') + 1
+    return int(row), column
+
+
+def _typed(asset_name, key, value):
+    """Valeur typée selon la nomenclature, ou (None, message d'erreur)."""
+    where = f"{asset_name}.{key}"
+    if key in TEXT_KEYS:
+        if not isinstance(value, str):
+            return None, f"{where}: texte attendu, trouvé {value!r}"
+        return value, None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None, f"{where}: nombre attendu, trouvé {value!r}"
+    if key.startswith('n_'):
+        if value != int(value) or value < 0:
+            return None, f"{where}: entier ≥ 0 attendu, trouvé {value!r}"
+        return int(value), None
+    if key.startswith('p_') and not 0 <= value <= 1:
+        return None, f"{where}: probabilité hors de [0, 1]: {value!r}"
+    if key in POSITIVE_KEYS and not value > 0:
+        return None, f"{where}: nombre > 0 attendu, trouvé {value!r}"
+    return value, None
+
+
+class ParamIndex:
+    """
+    Paramètres de tous les actifs d'un model.json, aplatis et validés.
+
+    Attributs:
+        values: {actif: {clé: valeur typée}}
+        sources: {actif: {clé: 'risks.capital', ...}}
+        cells: {actif: [(cellule, clé, valeur), ...]} triées, clés trouvées seulement
+        errors: erreurs de paramètres (collisions, types, probabilités, price_unit, loi triangulaire)
+        mapping_errors: erreurs de excel_mapping (clé introuvable, cellule invalide
+                        ou mappée deux fois)
+    """
+
+    def __init__(self, model):
+        self.values = {}
+        self.sources = {}
+        self.cells = {}
+        self.errors = []
+        self.mapping_errors = []
+
+        for asset_name, asset_data in model['assets'].items():
+            self._index_asset(asset_name, asset_data)
+        self._check_cells()
+
+    def _index_asset(self, asset_name, asset_data):
+        values = self.values[asset_name] = {}
+        sources = self.sources[asset_name] = {}
+        invalid = set()
+
+        for path in SECTIONS:
+            section = asset_data
+            for part in path:
+                section = section.get(part, {})
+            for key, raw in section.items():
+                source = '.'.join(path)
+                if key in sources:
+                    self.errors.append(f"{asset_name}.{key}: défini dans {sources[key]} "
+                                       f"et dans {source}")
+                    continue
+                value, error = _typed(asset_name, key, raw)
+                if error:
+                    self.errors.append(error)
+                    invalid.add(key)
+                    continue
+                values[key] = value
+                sources[key] = source
+
+        bounds = [values.get(key) for key in TRIANGULAR_KEYS]
+        if None not in bounds and not bounds[0] <= bounds[1] <= bounds[2]:
+            self.errors.append(f"{asset_name}: pct_low ≤ pct_base ≤ pct_high attendu, "
+                               f"trouvé {bounds[0]!r}, {bounds[1]!r}, {bounds[2]!r}")
+
+        cells = []
+        mapping = asset_data.get('excel_mapping', {}).get('cells', {})
+        for key, cell in mapping.items():
+            if not isinstance(cell, str) or not _CELL.match(cell):
+                self.mapping_errors.append(f"{asset_name}.{key}: cellule invalide {cell!r}")
+            elif key in invalid:
+                continue  # déjà signalée dans errors
+            elif key not in values:
+                self.mapping_errors.append(f"{cell}: {asset_name}.{key} NOT FOUND")
+            else:
+                cells.append((cell, key, values[key]))
+        self.cells[asset_name] = sorted(cells, key=lambda c: cell_sort_key(c[0]))
+
+    def _check_cells(self):
+        owners = {}
+        for asset_name, cells in self.cells.items():
+            for cell, key, _ in cells:
+                owner = f"{asset_name}.{key}"
+                if cell in owners:
+                    self.mapping_errors.append(f"{cell}: mappée par {owners[cell]} et {owner}")
+                owners[cell] = owner
+
+    def get(self, asset_name, key):
+        return self.values[asset_name][key]
+
+    def validate(self, mapping=True):
+        """Lève ParameterError s'il y a des erreurs (mapping=False: ignorer excel_mapping)."""
+        errors = self.errors + (self.mapping_errors if mapping else [])
+        if errors:
+            raise ParameterError(errors)
+        return self
+
+
+def build_index(model):
+    return ParamIndex(model)
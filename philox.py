@@ -0,0 +1,262 @@
+"""
+PHILOX.PY — Générateur à compteur (Philox4x32-10) pour le moteur counter
+=========================================================================
+Flow: simulate.py --engine counter → CounterRNG → simulate_asset_fast → replay.py
+
+Avec np.random (legacy) ou un np.random.Generator (fast), le tirage d'un
+run dépend de tous les tirages qui le précèdent dans le flux: rejouer le
+run #734 512 oblige à resimuler les 734 511 premiers.
+
+Ici chaque nombre aléatoire est une fonction pure
+    Philox4x32-10(compteur, clé)
+- clé (2 × uint32): dérivée de (seed, actif, mode), voir simulate.job_seed
+- compteur (4 × uint32): (run, période, slot, usage)
+    run     index global du run dans le job (< 2^32)
+    période année × n_cycles_year + cycle
+    slot    colonne du tirage (ex.: k-ième variation triangulaire)
+    usage   LOSSES, REVENUE, NORMAL, EVENTS: une méthode = un usage, appelée
+            au plus une fois par période
+
+Conséquences:
+- un run (ou un chunk) se recalcule seul, en temps constant (replay.py)
+- le résultat d'un run ne dépend ni du découpage en chunks (--memory-budget,
+  --checkpoint) ni des shards: ils sont identiques par construction
+- toute l'arithmétique du moteur est élément par élément: rejouer un run
+  seul redonne exactement (bit à bit) sa ligne de la simulation complète
+
+Lois (API compatible np.random.Generator pour ce qu'utilise le moteur):
+- random: uniforme [0, 1) sur 53 bits (deux mots de 32 bits)
+- triangular: inversion de la fonction de répartition
+- standard_normal: Box-Muller sur les deux uniformes d'un bloc
+- binomial: inversion exacte de la loi (récurrence sur la densité) tant
+  que n·p·(1-p) < BINOMIAL_EXACT_VAR, normale avec correction de
+  continuité au-delà (même principe que triangular_sum dans engine.py)
+
+Philox4x32-10: Salmon et al., "Parallel random numbers: as easy as 1, 2, 3"
+(SC'11). Vérifié sur les vecteurs de test de Random123 (python3 philox.py).
+"""
+
+import numpy as np
+
+PHILOX_M0 = np.uint64(0xD2511F53)
+PHILOX_M1 = np.uint64(0xCD9E8D57)
+PHILOX_W0 = 0x9E3779B9
+PHILOX_W1 = 0xBB67AE85
+PHILOX_ROUNDS = 10
+MASK32 = 0xFFFFFFFF
+
+# Usages (4e mot du compteur)
+LOSSES = 0
+REVENUE = 1
+NORMAL = 2
+EVENTS = 3
+
+# Au-delà de cette variance, binomial passe à l'approximation normale:
+# l'inversion coûte ~n·p + 5·√(n·p·(1-p)) itérations
+BINOMIAL_EXACT_VAR = 25.0
+
+# Vecteurs de test Random123 (kat_vectors): compteur, clé, sortie
+KNOWN_ANSWERS = [
+    ((0, 0, 0, 0), (0, 0),
+     (0x6627e8d5, 0xe169c58d, 0xbc57ac4c, 0x9b00dbd8)),
+    ((MASK32, MASK32, MASK32, MASK32), (MASK32, MASK32),
+     (0x408f276d, 0x41c83b0e, 0xa20bc7c6, 0x6d5451fd)),
+    ((0x243f6a88, 0x85a308d3, 0x13198a2e, 0x03707344), (0xa4093822, 0x299f31d0),
+     (0xd16cfe09, 0x94fdcceb, 0x5001e420, 0x24126ea1)),
+]
+
+
+def philox4x32(counter, key, rounds=PHILOX_ROUNDS):
+    """
+    Bloc Philox4x32 pour chaque compteur.
+
+    Args:
+        counter: 4 arrays (ou entiers) d'entiers < 2^32, diffusables entre eux
+        key: 2 entiers < 2^32
+
+    Returns:
+        4 arrays uint64 (valeurs < 2^32) de la forme diffusée des compteurs
+    """
+    c0, c1, c2, c3 = np.broadcast_arrays(*(np.asarray(c, dtype=np.uint64) for c in counter))
+    k0, k1 = int(key[0]), int(key[1])
+    for r in range(rounds):
+        if r:
+            k0 = (k0 + PHILOX_W0) & MASK32
+            k1 = (k1 + PHILOX_W1) & MASK32
+        # Produits 32 × 32 → 64 bits exacts en uint64
+        p0 = c0 * PHILOX_M0
+        p1 = c2 * PHILOX_M1
+        c0, c1, c2, c3 = ((p1 >> 32) ^ c1 ^ np.uint64(k0), p1 & np.uint64(MASK32),
+                          (p0 >> 32) ^ c3 ^ np.uint64(k1), p0 & np.uint64(MASK32))
+    return c0, c1, c2, c3
+
+
+def to_unit(hi, lo):
+    """Deux mots de 32 bits → uniforme [0, 1) sur 53 bits."""
+    return ((hi >> 5) * 67108864 + (lo >> 6)) / 9007199254740992.0
+
+
+def seed_key(seed):
+    """Clé Philox (2 × uint32) d'un seed int ou np.random.SeedSequence."""
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return tuple(int(word) for word in seed.generate_state(2, np.uint32))
+
+
+class CounterRNG:
+    """
+    Flux à compteur d'un job: une clé et un curseur de run.
+
+    Chaque appel du moteur prend (take) les n_runs runs suivants, comme un
+    np.random.Generator avance dans son flux: un même CounterRNG passé à
+    plusieurs chunks successifs (checkpoint) donne les runs 0, 1, 2, ...
+    """
+
+    def __init__(self, seed, run=0):
+        self.key = seed_key(seed)
+        self.run = int(run)
+
+    @property
+    def state(self):
+        """État sérialisable (JSON), pour les checkpoints."""
+        return {'key': list(self.key), 'run': self.run}
+
+    @state.setter
+    def state(self, state):
+        self.key = tuple(state['key'])
+        self.run = state['run']
+
+    def take(self, n_runs):
+        """RunStreams des runs [run, run + n_runs); avance le curseur."""
+        if self.run + n_runs > MASK32 + 1:
+            raise ValueError(f"index de run ≥ 2^32 ({self.run + n_runs})")
+        streams = RunStreams(self.key, np.arange(self.run, self.run + n_runs, dtype=np.uint64))
+        self.run += n_runs
+        return streams
+
+
+class RunStreams:
+    """
+    Tirages d'un bloc de runs, adressés par (run, période, slot, usage).
+
+    L'axe 0 de chaque tirage est le run. Le moteur positionne la période
+    avec seek(); chaque méthode ne peut être appelée qu'une fois par période
+    (sinon deux appels liraient les mêmes compteurs).
+    """
+
+    def __init__(self, key, runs):
+        self.key = key
+        self.runs = runs
+        self.period = 0
+        self._used = set()
+
+    def seek(self, period):
+        self.period = period
+
+    def _blocks(self, usage, n_blocks):
+        """4 mots de forme (n_runs, n_blocks) pour les slots 0..n_blocks-1."""
+        if (self.period, usage) in self._used:
+            raise RuntimeError(f"usage {usage} déjà tiré à la période {self.period}")
+        self._used.add((self.period, usage))
+        slots = np.arange(n_blocks, dtype=np.uint64)
+        return philox4x32((self.runs[:, None], self.period, slots[None, :], usage), self.key)
+
+    def _uniforms(self, usage, n_values):
+        """(n_runs, n_values) uniformes: deux par bloc, la valeur j au slot j // 2."""
+        w0, w1, w2, w3 = self._blocks(usage, -(-n_values // 2))
+        values = np.empty((len(self.runs), 2 * w0.shape[1]))
+        values[:, 0::2] = to_unit(w0, w1)
+        values[:, 1::2] = to_unit(w2, w3)
+        return values[:, :n_values]
+
+    def random(self, size):
+        size = (size,) if np.ndim(size) == 0 else tuple(size)
+        n_values = int(np.prod(size[1:], dtype=np.int64))
+        return self._uniforms(EVENTS, n_values).reshape(size)
+
+    def triangular(self, left, mode, right, size):
+        size = (size,) if np.ndim(size) == 0 else tuple(size)
+        n_values = int(np.prod(size[1:], dtype=np.int64))
+        u = self._uniforms(REVENUE, n_values).reshape(size)
+        return triangular_ppf(u, left, mode, right)
+
+    def standard_normal(self, size):
+        """Box-Muller: deux normales par bloc (cos, sin), la valeur j au slot j // 2."""
+        size = (size,) if np.ndim(size) == 0 else tuple(size)
+        n_values = int(np.prod(size[1:], dtype=np.int64))
+        w0, w1, w2, w3 = self._blocks(NORMAL, -(-n_values // 2))
+        radius = np.sqrt(-2.0 * np.log1p(-to_unit(w0, w1)))
+        angle = 2 * np.pi * to_unit(w2, w3)
+        values = np.empty((len(self.runs), 2 * w0.shape[1]))
+        values[:, 0::2] = radius * np.cos(angle)
+        values[:, 1::2] = radius * np.sin(angle)
+        return values[:, :n_values].reshape(size)
+
+    def binomial(self, n, p):
+        """Binomiale(n[i], p[i]) par run, p scalaire ou array."""
+        n = np.asarray(n, dtype=np.int64)
+        p = np.broadcast_to(np.asarray(p, dtype=np.float64), n.shape)
+        # Symétrie: l'inversion part de 0, on compte le côté le moins probable
+        flip = p > 0.5
+        k = self._binomial(n, np.where(flip, 1.0 - p, p))
+        return np.where(flip, n - k, k)
+
+    def _binomial(self, n, p):
+        w0, w1, w2, w3 = (w[:, 0] for w in self._blocks(LOSSES, 1))
+        u = to_unit(w0, w1)
+        q = 1.0 - p
+        var = n * p * q
+        exact = var < BINOMIAL_EXACT_VAR
+
+        # Inversion: k = plus petit entier tel que F(k) ≥ u,
+        # densité par récurrence f(k+1) = f(k) · (n-k)/(k+1) · p/q
+        k = np.zeros(len(n), dtype=np.int64)
+        ratio = p / q
+        pmf = np.power(q, np.where(exact, n, 0))
+        cdf = pmf.copy()
+        active = np.flatnonzero(exact & (u >= cdf) & (n > 0) & (p > 0))
+        while len(active):
+            ka, na = k[active], n[active]
+            pmf[active] *= (na - ka) / (ka + 1) * ratio[active]
+            k[active] = ka + 1
+            cdf[active] += pmf[active]
+            active = active[(u[active] >= cdf[active]) & (k[active] < na)]
+
+        if not exact.all():
+            z = box_muller(u, to_unit(w2, w3))
+            approx = np.floor(n * p + np.sqrt(var) * z + 0.5)
+            k = np.where(exact, k, np.clip(approx, 0, n).astype(np.int64))
+        return k
+
+
+def box_muller(u0, u1):
+    """Normale centrée réduite à partir de deux uniformes [0, 1)."""
+    return np.sqrt(-2.0 * np.log1p(-u0)) * np.cos(2 * np.pi * u1)
+
+
+def triangular_ppf(u, left, mode, right):
+    """Inverse de la fonction de répartition de Triangular(left, mode, right)."""
+    if right == left:
+        return np.full(np.shape(u), float(left))
+    split = (mode - left) / (right - left)
+    low = left + np.sqrt(u * (right - left) * (mode - left))
+    high = right - np.sqrt((1 - u) * (right - left) * (right - mode))
+    return np.where(u < split, low, high)
+
+
+def main():
+    print("=" * 80)
+    print("PHILOX.PY — vecteurs de test Philox4x32-10 (Random123)")
+    print("=" * 80)
+    ok = True
+    for counter, key, expected in KNOWN_ANSWERS:
+        got = tuple(int(w) for w in philox4x32(counter, key))
+        status = '✓' if got == expected else '✗'
+        ok &= got == expected
+        print(f"{status} ctr={' '.join(f'{c:08x}' for c in counter)} "
+              f"key={' '.join(f'{k:08x}' for k in key)} → {' '.join(f'{w:08x}' for w in got)}")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,187 @@
+"""
+REPLAY.PY — Rejouer un run du moteur counter
+=============================================
+Flow: model.json → replay.py --run N → chemin du run N (par année, par cycle)
+
+Avec --engine counter (philox.py), les tirages d'un run ne dépendent que
+de (seed, actif, mode, index du run): le run #734 512 se recalcule seul,
+en temps constant, et il est identique bit à bit à sa ligne dans
+`simulate.py --engine counter` (quel que soit --memory-budget, --checkpoint
+ou le découpage en shards). Rien n'est stocké par run.
+
+--quantile q retrouve d'abord le run dont le rendement final est à ce
+quantile (une passe sur tous les runs, seul le capital final est gardé:
+8 octets par run), puis le rejoue: le chemin exact derrière un p1.
+
+Les options simulation.capital_events / float32 / shocks de model.json
+sont appliquées comme dans simulate.py (facteurs de chocs du run compris).
+
+Usage:
+    python3 replay.py --asset embouche --run 734512
+    python3 replay.py --asset embouche --quantile 0.01 --cycles
+    python3 replay.py --asset betail --mode with_reinvest --run 12
+"""
+
+import argparse
+
+import numpy as np
+
+from engine import simulate_asset_fast
+from params import ParameterError
+from simulate import (MODES, asset_names, calculate_pnl, job_seed, load_model, make_rng, make_shocks,
+                      mode_cap)
+
+# Runs simulés par passe pour --quantile
+SCAN_CHUNK = 100000
+
+# =============================================================================
+# 1. REJEU
+# =============================================================================
+
+def job_options(model, asset_name, first_run, n_runs):
+    sim = model['simulation']
+    options = {'capital_events': sim.get('capital_events', False), 'float32': sim.get('float32', False)}
+    shocks = make_shocks(model)
+    if shocks is not None:
+        options['shocks'] = shocks.for_asset(asset_name, first_run, n_runs, sim['n_years'])
+    return options
+
+
+def replay_run(model, asset_name, mode, run, pnl_data=None, cycles=False):
+    """
+    Recalcule le run d'index run (0-based) du job asset_name × mode.
+
+    Returns:
+        revenues[n_years], capitals[n_years + 1], units[n_years + 1],
+        cycle_outputs (dict CYCLE_METRICS → [n_periods]) ou None
+    """
+    sim = model['simulation']
+    asset_data = model['assets'][asset_name]
+    if pnl_data is None:
+        pnl_data = calculate_pnl(asset_name, asset_data)
+    if not 0 <= run < sim['n_runs']:
+        raise ValueError(f"run {run} hors de [0, {sim['n_runs']})")
+
+    rng = make_rng('counter', job_seed(sim['seed'], asset_name, mode), first_run=run)
+    cycle_outputs = {} if cycles else None
+    rev, cap, units = simulate_asset_fast(asset_name, asset_data, pnl_data, 1, sim['n_years'],
+                                          mode_cap(mode, pnl_data), rng=rng,
+                                          cycle_outputs=cycle_outputs,
+                                          **job_options(model, asset_name, run, 1))
+    if cycles:
+        cycle_outputs = {metric: values[0] for metric, values in cycle_outputs.items()}
+    return rev[0], cap[0], units[0], cycle_outputs
+
+
+def find_quantile_run(model, asset_name, mode, q, pnl_data=None):
+    """
+    Index du run dont le rendement final est la statistique d'ordre la plus
+    proche du quantile q (rang round(q × (n_runs - 1))).
+
+    Returns:
+        (run, rendement final)
+    """
+    sim = model['simulation']
+    asset_data = model['assets'][asset_name]
+    if pnl_data is None:
+        pnl_data = calculate_pnl(asset_name, asset_data)
+    n_runs = sim['n_runs']
+
+    rng = make_rng('counter', job_seed(sim['seed'], asset_name, mode))
+    final = np.empty(n_runs)
+    for start in range(0, n_runs, SCAN_CHUNK):
+        n = min(SCAN_CHUNK, n_runs - start)
+        _, cap, _ = simulate_asset_fast(asset_name, asset_data, pnl_data, n, sim['n_years'],
+                                        mode_cap(mode, pnl_data), rng=rng,
+                                        **job_options(model, asset_name, start, n))
+        final[start:start + n] = cap[:, -1]
+
+    returns = final / pnl_data['capital_total'] - 1
+    rank = int(round(q * (n_runs - 1)))
+    run = int(np.argpartition(returns, rank)[rank])
+    return run, float(returns[run])
+
+# =============================================================================
+# 2. AFFICHAGE
+# =============================================================================
+
+def print_run(asset_name, mode, run, rev, cap, units, initial_capital, cycle_outputs=None,
+              n_cycles=1):
+    print(f"\n{asset_name} ({mode}) — run #{run:,}")
+    print("-" * 60)
+    print(f"{'Année':<8} {'Revenus':>16} {'Capital':>16} {'Unités':>10}")
+    print("-" * 60)
+    print(f"{'Y0':<8} {'':>16} {cap[0]:>16,.0f} {units[0]:>10,}")
+    for year in range(len(rev)):
+        print(f"{f'Y{year + 1}':<8} {rev[year]:>16,.0f} {cap[year + 1]:>16,.0f} {units[year + 1]:>10,}")
+    print("-" * 60)
+    print(f"Rendement final: {cap[-1] / initial_capital - 1:.1%}")
+
+    if cycle_outputs is not None:
+        print(f"\nPAR CYCLE ({n_cycles}/an):")
+        print("-" * 60)
+        print(f"{'Période':<10} {'Pertes':>10} {'Unités':>10} {'Revenu':>16}")
+        print("-" * 60)
+        for period in range(len(cycle_outputs['units'])):
+            year, cycle = divmod(period, n_cycles)
+            print(f"{f'Y{year + 1}.C{cycle + 1}':<10} {cycle_outputs['losses'][period]:>10,} "
+                  f"{cycle_outputs['units'][period]:>10,} {cycle_outputs['revenues'][period]:>16,.0f}")
+
+# =============================================================================
+# 3. EXÉCUTION
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rejouer un run du moteur counter")
+    parser.add_argument('--model', default='model.json')
+    parser.add_argument('--asset', required=True)
+    parser.add_argument('--mode', choices=MODES, default='without_reinvest')
+    which = parser.add_mutually_exclusive_group(required=True)
+    which.add_argument('--run', type=int, help="index du run (0-based)")
+    which.add_argument('--quantile', type=float,
+                       help="rejouer le run au quantile q du rendement final (ex.: 0.01)")
+    parser.add_argument('--cycles', action='store_true', help="détail par cycle (pertes, unités, revenu)")
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print("REPLAY.PY — rejeu d'un run (moteur counter)")
+    print("=" * 80)
+
+    try:
+        model = load_model(args.model)
+    except ParameterError as e:
+        print(f"\n✗ {args.model} invalide:")
+        for err in e.errors:
+            print(f"  {err}")
+        return 1
+    if args.asset not in asset_names(model):
+        print(f"\n✗ actif inconnu: {args.asset} (disponibles: {', '.join(asset_names(model))})")
+        return 1
+
+    sim = model['simulation']
+    asset_data = model['assets'][args.asset]
+    pnl_data = calculate_pnl(args.asset, asset_data)
+    print(f"\nJob: seed={sim['seed']}, {sim['n_runs']:,} runs × {sim['n_years']} ans")
+
+    run = args.run
+    if args.quantile is not None:
+        if not 0 <= args.quantile <= 1:
+            print(f"\n✗ --quantile doit être dans [0, 1] (reçu {args.quantile})")
+            return 1
+        run, ret = find_quantile_run(model, args.asset, args.mode, args.quantile, pnl_data)
+        print(f"✓ Quantile {args.quantile:g} du rendement final: run #{run:,} ({ret:.1%})")
+
+    try:
+        rev, cap, units, cycle_outputs = replay_run(model, args.asset, args.mode, run, pnl_data,
+                                                    cycles=args.cycles)
+    except ValueError as e:
+        print(f"\n✗ {e}")
+        return 1
+
+    print_run(args.asset, args.mode, run, rev, cap, units, pnl_data['capital_total'], cycle_outputs,
+              asset_data['config']['n_cycles_year'])
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,278 @@
+"""
+SHARD.PY — Simulation découpée sur plusieurs machines
+======================================================
+Flow: model.json → shard.py run (×N nœuds) → shards/*.json → shard.py merge → results.json
+
+Ce qu'il fait:
+- Découpe chaque job actif × mode en chunks de runs; le nœud i sur N
+  prend une plage contiguë et disjointe de chunks
+- Chaque chunk a son propre seed dérivé du seed du modèle (chunk_seed):
+  aucun état partagé entre nœuds. Avec --engine counter, clé du job et
+  index de run dans le compteur: chaque run est le même quel que soit
+  le découpage (chunk_size, nombre de nœuds)
+- Écrit un fichier partiel fusionnable (aggregate.StreamingSummary):
+  sommes par chunk, sketches de quantiles, trajectoires échantillonnées
+- merge vérifie la couverture (tous les chunks, une seule fois) et
+  produit un results.json de même structure que simulate.py
+
+Fusionner N shards donne exactement le même results.json que 1 shard
+couvrant tous les runs (hors timestamp): sommes en math.fsum, sketches
+à comptes additifs. Les trajectoires sont les runs 0..29 du mode sans
+réinvest (au lieu du tirage séparé seed=123 de simulate.py).
+
+Usage:
+    python3 shard.py run --shard 0/4 --out shards/      # sur chaque nœud
+    python3 shard.py merge shards/ --output results.json
+    python3 shard.py local --nodes 4                    # N process locaux + merge
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from aggregate import StreamingSummary
+from checkpoint import model_digest
+from simulate import (DEFAULT_CHUNK_SIZE, ENGINES, MODES, TRAJ_N_RUNS, asset_names, build_results,
+                      calculate_pnl, call_engine, fast_only_errors, load_model, make_rng, make_shocks,
+                      mode_cap, stream_seed)
+
+# =============================================================================
+# 1. PLAN DE DÉCOUPAGE
+# =============================================================================
+
+def parse_shard(text):
+    """'2/8' → (2, 8)."""
+    index, count = (int(x) for x in text.split('/'))
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard invalide: {text} (attendu i/N avec 0 ≤ i < N)")
+    return index, count
+
+
+def shard_chunks(n_chunks, index, count):
+    """Plage de chunks [first, last) du shard index sur count."""
+    return index * n_chunks // count, (index + 1) * n_chunks // count
+
+# =============================================================================
+# 2. RUN D'UN SHARD
+# =============================================================================
+
+def run_shard(model, engine, chunk_size, index, count):
+    """Simule les chunks du shard pour tous les actifs × modes. Retourne le partiel."""
+    sim = model['simulation']
+    n_runs, n_years = sim['n_runs'], sim['n_years']
+    n_chunks = -(-n_runs // chunk_size)
+    first, last = shard_chunks(n_chunks, index, count)
+
+    shocks = make_shocks(model)
+    jobs = {}
+    for asset_name in asset_names(model):
+        asset_data = model['assets'][asset_name]
+        pnl_data = calculate_pnl(asset_name, asset_data)
+        for mode in MODES:
+            n_sample = TRAJ_N_RUNS if mode == 'without_reinvest' else 0
+            acc = StreamingSummary(n_years, pnl_data['capital_total'], n_sample)
+            for chunk in range(first, last):
+                start = chunk * chunk_size
+                rng = make_rng(engine, stream_seed(engine, sim['seed'], asset_name, mode, chunk),
+                               first_run=start)
+                arrays = call_engine(engine, asset_name, asset_data, pnl_data,
+                                     min(chunk_size, n_runs - start), n_years,
+                                     mode_cap(mode, pnl_data), rng,
+                                     capital_events=sim.get('capital_events', False),
+                                     float32=sim.get('float32', False),
+                                     shocks=shocks, first_run=start)
+                acc.update(chunk, start, *arrays)
+            jobs[f"{asset_name}:{mode}"] = acc.to_dict()
+
+    return {
+        'kind': 'risk-return-shard',
+        'header': {
+            'model_digest': model_digest(model),
+            'engine': engine,
+            'chunk_size': chunk_size,
+            'n_chunks': n_chunks,
+        },
+        'shard': [index, count],
+        'chunks': [first, last],
+        'model': model,
+        'jobs': jobs,
+    }
+
+
+def shard_path(out_dir, index, count):
+    return Path(out_dir) / f"shard_{index:03d}_of_{count:03d}.json"
+
+# =============================================================================
+# 3. FUSION
+# =============================================================================
+
+def merge_shards(partials, source='shards'):
+    """Fusionne des partiels (dicts) en results.json. Lève ValueError si incohérent."""
+    if not partials:
+        raise ValueError("Aucun shard à fusionner")
+    header = partials[0]['header']
+    for partial in partials[1:]:
+        if partial['header'] != header:
+            raise ValueError(f"Shards incompatibles: {partial['header']} ≠ {header}")
+
+    covered = []
+    for partial in partials:
+        covered.extend(range(*partial['chunks']))
+    missing = sorted(set(range(header['n_chunks'])) - set(covered))
+    if missing:
+        raise ValueError(f"Chunks manquants: {missing[:10]}{'...' if len(missing) > 10 else ''}")
+    if len(covered) != len(set(covered)):
+        raise ValueError("Des chunks sont couverts par plusieurs shards")
+
+    model = partials[0]['model']
+    results_mode = {mode: {} for mode in MODES}
+    trajectories = {}
+    for asset_name in asset_names(model):
+        for mode in MODES:
+            scope = f"{asset_name}:{mode}"
+            acc = StreamingSummary.from_dict(partials[0]['jobs'][scope])
+            for partial in partials[1:]:
+                acc.merge(StreamingSummary.from_dict(partial['jobs'][scope]))
+            results_mode[mode][asset_name] = acc.finalize()
+            if mode == 'without_reinvest':
+                trajectories[asset_name] = acc.sample_trajectories()
+
+    pnl = {asset_name: calculate_pnl(asset_name, model['assets'][asset_name])
+           for asset_name in asset_names(model)}
+    results = build_results(model, pnl, results_mode, trajectories, header['engine'], source=source)
+    results['meta']['shards'] = {
+        'count': len(partials),
+        'chunk_size': header['chunk_size'],
+        'n_chunks': header['n_chunks'],
+    }
+    results['trajectories']['meta'] = {
+        'source': f"runs 0-{TRAJ_N_RUNS - 1} de la simulation",
+        'n_runs': len(next(iter(trajectories.values()))),
+        'mode': 'without_reinvest',
+    }
+    return results
+
+
+def load_partials(patterns):
+    paths = []
+    for pattern in patterns:
+        path = Path(pattern)
+        paths.extend(sorted(path.glob('shard_*.json')) if path.is_dir() else [path])
+    partials = []
+    for path in paths:
+        with open(path, 'r') as f:
+            try:
+                partial = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}: JSON invalide ({e})") from None
+        if not isinstance(partial, dict) or partial.get('kind') != 'risk-return-shard':
+            raise ValueError(f"{path}: pas un fichier de shard")
+        partials.append(partial)
+    return partials
+
+# =============================================================================
+# 4. EXÉCUTION
+# =============================================================================
+
+def cmd_run(args):
+    start = time.perf_counter()
+    index, count = args.shard
+    try:
+        model = load_model(args.model)
+        engine = args.engine or model['simulation'].get('engine', 'legacy')
+        chunk_size = args.chunk_size or model['simulation'].get('chunk_size', DEFAULT_CHUNK_SIZE)
+        if engine not in ENGINES:
+            raise ValueError(f"Moteur inconnu: {engine} (disponibles: {', '.join(ENGINES)})")
+        errors = fast_only_errors(model, engine)
+        if errors:
+            raise ValueError(errors[0])
+        partial = run_shard(model, engine, chunk_size, index, count)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+    Path(args.out).mkdir(parents=True, exist_ok=True)
+    path = shard_path(args.out, index, count)
+    with open(path, 'w') as f:
+        json.dump(partial, f)
+    first, last = partial['chunks']
+    print(f"✓ shard {index}/{count}: chunks {first}-{last - 1} "
+          f"({time.perf_counter() - start:.1f}s) → {path}")
+    return 0
+
+
+def cmd_merge(args):
+    try:
+        results = merge_shards(load_partials(args.inputs), source=' '.join(args.inputs))
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"✓ {results['meta']['shards']['count']} shards fusionnés → {args.output}")
+    return 0
+
+
+def cmd_local(args):
+    """N process sur la machine locale à la place de N nœuds, puis merge."""
+    common = ['--model', args.model, '--out', args.out]
+    if args.engine:
+        common += ['--engine', args.engine]
+    if args.chunk_size:
+        common += ['--chunk-size', str(args.chunk_size)]
+    stale = sorted(Path(args.out).glob('shard_*.json'))
+    try:
+        load_partials(stale)
+    except (OSError, ValueError) as e:
+        print(f"✗ {e} (rien n'est supprimé dans {args.out})")
+        return 1
+    for path in stale:
+        path.unlink()
+
+    start = time.perf_counter()
+    procs = [subprocess.Popen([sys.executable, __file__, 'run', '--shard', f"{i}/{args.nodes}"] + common)
+             for i in range(args.nodes)]
+    if any(proc.wait() != 0 for proc in procs):
+        print("✗ un shard a échoué")
+        return 1
+    print(f"✓ {args.nodes} shards en {time.perf_counter() - start:.1f}s")
+
+    args.inputs = [args.out]
+    return cmd_merge(args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulation découpée en shards")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def add_run_options(p):
+        p.add_argument('--model', default='model.json')
+        p.add_argument('--engine', choices=sorted(ENGINES), help="moteur (défaut: simulation.engine ou 'legacy')")
+        p.add_argument('--chunk-size', type=int,
+                       help=f"runs par chunk (défaut: simulation.chunk_size ou {DEFAULT_CHUNK_SIZE})")
+        p.add_argument('--out', default='shards', help="dossier des partiels")
+
+    p_run = sub.add_parser('run', help="simuler un shard")
+    p_run.add_argument('--shard', type=parse_shard, required=True, metavar='i/N')
+    add_run_options(p_run)
+    p_run.set_defaults(func=cmd_run)
+
+    p_merge = sub.add_parser('merge', help="fusionner des partiels en results.json")
+    p_merge.add_argument('inputs', nargs='+', help="fichiers shard_*.json ou dossiers")
+    p_merge.add_argument('--output', default='results.json')
+    p_merge.set_defaults(func=cmd_merge)
+
+    p_local = sub.add_parser('local', help="N shards en process locaux + merge")
+    p_local.add_argument('--nodes', type=int, default=4)
+    p_local.add_argument('--output', default='results.json')
+    add_run_options(p_local)
+    p_local.set_defaults(func=cmd_local)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,336 @@
+"""
+SHOCKS.PY — Chocs systémiques corrélés entre actifs et années
+==============================================================
+Flow: model.json (simulation.shocks) → SystemicShocks → facteurs (runs × années) → moteur fast/counter
+
+Sans chocs, chaque perte d'unité et chaque variation de revenu est
+indépendante: une sécheresse, une épizootie ou un effondrement des loyers
+ne touchent jamais toutes les unités la même année. Avec simulation.shocks:
+
+1. Facteur commun Z[run, année, actif] ~ N(0, 1)
+   - corrélé entre actifs: Z = L·ε, L = Cholesky de la matrice de corrélation
+   - persistant d'une année sur l'autre (option): Z_t = φ·Z_{t-1} + √(1-φ²)·ε_t
+   - ε tiré par Philox (philox.py), clé (seed, 'shocks'), compteur (run, année):
+     tous les jobs actif × mode voient le même choc pour un même run, et un
+     chunk de runs se calcule seul (--memory-budget, shards, replay.py)
+
+2. Pertes (Vasicek, un facteur): pour l'année, chaque unité a la probabilité
+       p_t = Φ((Φ⁻¹(p_loss_total) - √ρ_loss·Z) / √(1 - ρ_loss))
+   E[p_t] = p_loss_total: seule la dispersion entre années change
+   (mauvaise année = Z bas = pertes groupées)
+
+3. Revenus (copule gaussienne): la variation de chaque unité reste
+   Triangular(pct_low, pct_base, pct_high), mais tirée par
+       variation = F⁻¹(Φ(√ρ_revenue·Z + √(1 - ρ_revenue)·η)),  η ~ N(0, 1) par unité
+   Au-delà de EXACT_SUM_MAX unités, somme normale de moyenne et variance
+   conditionnelles à Z (quadrature de Gauss-Hermite), comme triangular_sum
+
+Tout est calculé en arrays (runs × années) pour un chunk entier: le coût
+s'ajoute au moteur vectorisé sans boucle par run. Moteurs fast et counter
+uniquement (legacy reste la référence indépendante).
+
+Configuration (model.json):
+    "simulation": {
+      "shocks": {
+        "assets": {
+          "betail":     {"rho_loss": 0.3, "rho_revenue": 0.4},
+          "embouche":   {"rho_loss": 0.4, "rho_revenue": 0.3},
+          "immobilier": {"rho_loss": 0.1, "rho_revenue": 0.2}
+        },
+        "correlation": {"betail": {"embouche": 0.8, "immobilier": 0.2}},
+        "persistence": 0.3
+      }
+    }
+Un actif absent de "assets" n'a pas de choc; une paire absente de
+"correlation" est indépendante.
+
+Diagnostic (loi des pertes, marges des revenus, corrélations réalisées):
+    python3 shocks.py
+"""
+
+import math
+import zlib
+
+import numpy as np
+
+from philox import philox4x32, seed_key, to_unit, triangular_ppf
+
+# 5e usage du compteur Philox (après LOSSES, REVENUE, NORMAL, EVENTS)
+SHOCKS = 4
+SHOCK_TAG = zlib.crc32(b'shocks')
+
+# Nœuds de Gauss-Hermite pour les moments conditionnels du revenu,
+# tabulés une fois par job sur MOMENT_GRID points de z dans [-Z_MAX, Z_MAX]
+HERMITE_NODES = 40
+MOMENT_GRID = 2001
+Z_MAX = 8.0
+_HERMITE_X, _HERMITE_W = np.polynomial.hermite_e.hermegauss(HERMITE_NODES)
+_HERMITE_W = _HERMITE_W / math.sqrt(2 * math.pi)
+
+# =============================================================================
+# 1. LOI NORMALE (numpy, sans scipy)
+# =============================================================================
+
+def norm_cdf(x):
+    """
+    Φ(x) en array: 0.5·erfc(-x/√2), erfc par l'approximation de Tchebychev
+    de Numerical Recipes (erreur relative < 1.2e-7 sur tout R).
+    """
+    z = np.abs(x) / math.sqrt(2)
+    t = 1.0 / (1.0 + 0.5 * z)
+    poly = -1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (
+        -0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (
+            -0.82215223 + t * 0.17087277))))))))
+    erfc = t * np.exp(-z * z + poly)
+    return np.where(x >= 0, 1.0 - 0.5 * erfc, 0.5 * erfc)
+
+
+def norm_ppf(p):
+    """Φ⁻¹(p) scalaire."""
+    from statistics import NormalDist  # une fois par job: pas au démarrage
+    return NormalDist().inv_cdf(p)
+
+# =============================================================================
+# 2. LOIS CONDITIONNELLES AU FACTEUR
+# =============================================================================
+
+def vasicek_p(p, rho, z):
+    """Probabilité de perte de l'année sachant le facteur z (array)."""
+    if rho == 0 or p in (0, 1):
+        return np.full(np.shape(z), float(p))
+    return norm_cdf((norm_ppf(p) - math.sqrt(rho) * z) / math.sqrt(1 - rho))
+
+
+def copula_variations(z, eta, rho, low, mode, high):
+    """Variations triangulaires d'unités: z (n_runs,) commun, eta (n_runs, k) propre."""
+    return triangular_ppf(norm_cdf(math.sqrt(rho) * z[:, None] + math.sqrt(1 - rho) * eta),
+                          low, mode, high)
+
+
+def conditional_moments(z, rho, low, mode, high):
+    """
+    Moyenne et variance d'une variation d'unité sachant z (arrays), par
+    quadrature de Gauss-Hermite sur η. Somme nœud par nœud: le résultat
+    d'un run ne dépend pas des autres runs du bloc.
+    """
+    mean = np.zeros(np.shape(z))
+    second = np.zeros(np.shape(z))
+    for x, w in zip(_HERMITE_X, _HERMITE_W):
+        value = triangular_ppf(norm_cdf(math.sqrt(rho) * z + math.sqrt(1 - rho) * x),
+                               low, mode, high)
+        mean += w * value
+        second += w * value * value
+    return mean, np.maximum(second - mean * mean, 0.0)
+
+
+class MomentTable:
+    """
+    conditional_moments tabulé sur une grille de z (une fois par job):
+    interpolation linéaire ensuite, erreur ~1e-6 sur la moyenne et la
+    variance, négligeable devant l'approximation normale qu'elles servent.
+    """
+
+    def __init__(self, rho, low, mode, high):
+        self.grid = np.linspace(-Z_MAX, Z_MAX, MOMENT_GRID)
+        self.mean, self.var = conditional_moments(self.grid, rho, low, mode, high)
+
+    def __call__(self, z):
+        return np.interp(z, self.grid, self.mean), np.interp(z, self.grid, self.var)
+
+
+def shocked_triangular_sum(rng, k, low, mode, high, rho, z, moments, exact_max):
+    """
+    Comme engine.triangular_sum, sous la copule: somme de k[i] variations
+    sachant le facteur z[i] de l'année.
+
+    Exacte jusqu'à exact_max unités; au-delà, normale de moyenne k·m(z) et
+    variance k·v(z) (moments: MomentTable du job, évaluée seulement s'il
+    y a des runs au-delà), tronquée à [k·low, k·high] comme triangular_sum. Un seul
+    tirage de normales par appel: colonnes 0..k-1 pour les runs exacts,
+    colonne 0 pour les autres.
+
+    Returns:
+        (sommes[n_runs], nombre de tirages)
+    """
+    n_runs = len(k)
+    small = k <= exact_max
+    width = max(int(np.max(k, where=small, initial=0)), int(not small.all()))
+    total = np.zeros(n_runs)
+    if width == 0:
+        return total, 0
+    eta = rng.standard_normal((n_runs, width))
+    if small.any():
+        draws = copula_variations(z, eta, rho, low, mode, high)
+        counted = np.where(small, k, 0)
+        for column in range(width):
+            total += np.where(column < counted, draws[:, column], 0.0)
+    if not small.all():
+        mean, var = moments(z)
+        normal = np.clip(k * mean + np.sqrt(k * var) * eta[:, 0], k * low, k * high)
+        total = np.where(small, total, normal)
+    return total, n_runs * width
+
+# =============================================================================
+# 3. FACTEURS
+# =============================================================================
+
+def shock_errors(model):
+    """Erreurs de simulation.shocks (liste vide si absent ou valide)."""
+    config = model['simulation'].get('shocks')
+    if config is None:
+        return []
+    errors = []
+    names = list(model['assets'])
+    for asset_name, loadings in config.get('assets', {}).items():
+        if asset_name not in names:
+            errors.append(f"shocks.assets.{asset_name}: actif inconnu")
+            continue
+        for key in ('rho_loss', 'rho_revenue'):
+            value = loadings.get(key, 0.0)
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value < 1:
+                errors.append(f"shocks.assets.{asset_name}.{key}: attendu dans [0, 1), trouvé {value!r}")
+    for a, row in config.get('correlation', {}).items():
+        for b, value in row.items():
+            if a not in names or b not in names or a == b:
+                errors.append(f"shocks.correlation.{a}.{b}: paire d'actifs invalide")
+            elif isinstance(value, bool) or not isinstance(value, (int, float)) or not -1 <= value <= 1:
+                errors.append(f"shocks.correlation.{a}.{b}: attendu dans [-1, 1], trouvé {value!r}")
+    persistence = config.get('persistence', 0.0)
+    if isinstance(persistence, bool) or not isinstance(persistence, (int, float)) or not -1 < persistence < 1:
+        errors.append(f"shocks.persistence: attendu dans ]-1, 1[, trouvé {persistence!r}")
+    if not errors and np.linalg.eigvalsh(correlation_matrix(config, names)).min() < -1e-10:
+        errors.append("shocks.correlation: matrice non semi-définie positive")
+    return errors
+
+
+def correlation_matrix(config, names):
+    matrix = np.eye(len(names))
+    for a, row in config.get('correlation', {}).items():
+        for b, value in row.items():
+            i, j = names.index(a), names.index(b)
+            matrix[i, j] = matrix[j, i] = value
+    return matrix
+
+
+class SystemicShocks:
+    """
+    Facteurs communs d'un model.json (simulation.shocks déjà validé par
+    load_model). for_asset() donne le dict attendu par simulate_asset_fast.
+    """
+
+    def __init__(self, model):
+        config = model['simulation']['shocks']
+        self.names = list(model['assets'])
+        self.loadings = config.get('assets', {})
+        self.persistence = config.get('persistence', 0.0)
+        matrix = correlation_matrix(config, self.names)
+        # Jitter: accepte une corrélation de ±1 (matrice singulière)
+        self.cholesky = np.linalg.cholesky(matrix + 1e-12 * np.eye(len(self.names)))
+        self.key = seed_key(np.random.SeedSequence([model['simulation']['seed'], SHOCK_TAG]))
+
+    def factor(self, index, first_run, n_runs, n_years):
+        """
+        Z de l'actif d'index index, forme (n_runs, n_years), pour les runs
+        [first_run, first_run + n_runs). Z_i = Σ_{j≤i} L[i, j]·ε_j: seuls les
+        ε des actifs 0..i sont tirés.
+        """
+        runs = np.arange(first_run, first_run + n_runs, dtype=np.uint64)
+        years = np.arange(n_years, dtype=np.uint64)
+        slots = np.arange(index // 2 + 1, dtype=np.uint64)
+        w0, w1, w2, w3 = philox4x32((runs[:, None, None], years[None, :, None], slots[None, None, :],
+                                     SHOCKS), self.key)
+        radius = np.sqrt(-2.0 * np.log1p(-to_unit(w0, w1)))
+        angle = 2 * np.pi * to_unit(w2, w3)
+        eps = np.empty((n_runs, n_years, 2 * len(slots)))
+        eps[..., 0::2] = radius * np.cos(angle)
+        eps[..., 1::2] = radius * np.sin(angle)
+
+        # Somme explicite, terme par terme (même arrondi pour un run seul)
+        z = np.zeros((n_runs, n_years))
+        for j in range(index + 1):
+            z += self.cholesky[index, j] * eps[..., j]
+        if self.persistence:
+            phi = self.persistence
+            for year in range(1, n_years):
+                z[:, year] = phi * z[:, year - 1] + math.sqrt(1 - phi ** 2) * z[:, year]
+        return z
+
+    def for_asset(self, asset_name, first_run, n_runs, n_years):
+        """{'z': (n_runs, n_years), 'rho_loss', 'rho_revenue'} ou None si l'actif n'a pas de choc."""
+        loadings = self.loadings.get(asset_name)
+        if loadings is None:
+            return None
+        z = self.factor(self.names.index(asset_name), first_run, n_runs, n_years)
+        return {'z': z, 'rho_loss': loadings.get('rho_loss', 0.0),
+                'rho_revenue': loadings.get('rho_revenue', 0.0)}
+
+# =============================================================================
+# 4. DIAGNOSTIC
+# =============================================================================
+
+def main(argv=None):
+    import argparse
+    from engine import simulate_asset_fast
+    from simulate import calculate_pnl, load_model
+
+    parser = argparse.ArgumentParser(description="Diagnostic des chocs systémiques")
+    parser.add_argument('--model', default='model.json')
+    parser.add_argument('--n-runs', type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    model = load_model(args.model)
+    if 'shocks' not in model['simulation']:
+        print("✗ simulation.shocks absent de model.json (exemple dans l'en-tête de shocks.py)")
+        return 1
+    sim = model['simulation']
+    shocks = SystemicShocks(model)
+
+    print("=" * 80)
+    print(f"SHOCKS.PY — chocs systémiques ({args.n_runs:,} runs × {sim['n_years']} ans, sans réinvest)")
+    print("=" * 80)
+    print(f"\n{'Actif':<12} {'p_loss':>8} {'p Y1.C1':>10} {'σ pertes/an':>12} {'(indép.)':>10} "
+          f"{'Revenu moyen':>14} {'(indép.)':>14}")
+    print("-" * 84)
+
+    revenues = {}
+    for asset_name in model['assets']:
+        asset_data = model['assets'][asset_name]
+        pnl_data = calculate_pnl(asset_name, asset_data)
+        cap = pnl_data['n_units']
+        results = {}
+        for label, shock in [('indep', None),
+                             ('shock', shocks.for_asset(asset_name, 0, args.n_runs, sim['n_years']))]:
+            cycle_outputs = {}
+            rev, _, _ = simulate_asset_fast(asset_name, asset_data, pnl_data, args.n_runs, sim['n_years'],
+                                            cap, rng=np.random.default_rng(sim['seed']),
+                                            cycle_outputs=cycle_outputs, shocks=shock)
+            # Unités exposées au cycle = unités à la fin du cycle précédent
+            exposed = np.concatenate([np.full((args.n_runs, 1), asset_data['config']['n_units']),
+                                      cycle_outputs['units'][:, :-1]], axis=1)
+            n_cycles = asset_data['config']['n_cycles_year']
+            losses = cycle_outputs['losses'].reshape(args.n_runs, sim['n_years'], n_cycles).sum(axis=2)
+            trials = exposed.reshape(args.n_runs, sim['n_years'], n_cycles).sum(axis=2)
+            rate = np.divide(losses, trials, out=np.zeros(losses.shape), where=trials > 0)
+            # E[p_t] = p: mesuré au premier cycle, où tous les runs ont n_units exposées
+            first = cycle_outputs['losses'][:, 0].mean() / asset_data['config']['n_units']
+            results[label] = (first, rate[trials > 0].std(), rev.mean())
+            if label == 'shock':
+                revenues[asset_name] = rev
+        (_, sd0, r0), (p1, sd1, r1) = results['indep'], results['shock']
+        print(f"{asset_name:<12} {asset_data['risks']['capital']['p_loss_total']:>8.3f} {p1:>10.3f} "
+              f"{sd1:>12.3f} {sd0:>10.3f} {r1:>14,.0f} {r0:>14,.0f}")
+
+    names = list(revenues)
+    print("\nCorrélation réalisée des revenus annuels (Y1, runs sans ruine):")
+    print("-" * 60)
+    for i, a in enumerate(names):
+        for b in names[i + 1:]:
+            ok = (revenues[a][:, 0] > 0) & (revenues[b][:, 0] > 0)
+            corr = np.corrcoef(revenues[a][ok, 0], revenues[b][ok, 0])[0, 1]
+            print(f"  {a:<12} × {b:<12} {corr:>6.2f}")
+    print("\n✓ p Y1.C1 ≈ p_loss (Vasicek: E[p_t] = p), σ pertes/an > indép. si rho_loss > 0")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
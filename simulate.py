@@ -8,44 +8,113 @@ Règle unifiée:
 - Avec réinvestissement: on achète autant qu'on peut, cap = ∞
 
 La seule différence = le plafond d'unités.
+
+Options:
+    python3 simulate.py                      # run normal
+    python3 simulate.py --profile            # + chronométrage dans results['meta']
+    python3 simulate.py --trace trace.json   # + trace Chrome/Perfetto (implique --profile)
+    python3 simulate.py --engine fast        # moteur vectorisé (engine.py)
+    python3 simulate.py --engine counter     # idem, tirages par (run, période): rejouables (replay.py)
+    python3 simulate.py --checkpoint         # sauvegarde par chunks dans checkpoint/
+    python3 simulate.py --resume             # reprend depuis checkpoint/
+    python3 simulate.py --memory-budget 512M # chunks streamés, taille choisie pour tenir en RAM
+    python3 simulate.py --cycles cycles/     # + sorties par cycle (.npy, moteur fast)
+    python3 simulate.py --model m.json --output r.json
+
+simulation.shocks (chocs systémiques corrélés, moteurs fast/counter): voir shocks.py.
+
+checkpoint et cycles ne sont importés que si --checkpoint / --cycles sont
+demandés: le démarrage d'un run simple se limite à numpy et au moteur.
 """
 
+import argparse
 import json
+import zlib
 import numpy as np
 from datetime import datetime
 
-print("=" * 80)
-print("SIMULATE.PY — Monte Carlo unifié")
-print("=" * 80)
+from aggregate import StreamingSummary
+from bootstrap import summarize_ci
+from budget import MB, parse_size, plan_chunks
+from economics import ExpressionError, compile_pnl
+from engine import simulate_asset_fast
+from instrumentation import Instrumentation, NULL_INSTRUMENTATION
+from params import ParameterError, build_index
+from philox import CounterRNG
+from shocks import SystemicShocks, shock_errors
+
+CAP_INFINITE = 999999
+DEFAULT_CHUNK_SIZE = 10000
 
 # =============================================================================
 # 1. LECTURE SOURCE UNIQUE
 # =============================================================================
 
-with open('model.json', 'r') as f:
-    model = json.load(f)
+def load_model(path='model.json'):
+    """
+    Lit model.json, valide ses paramètres et compile les blocs pnl.
+    Lève ParameterError avec toutes les erreurs (excel_mapping ignoré).
+    """
+    with open(path, 'r') as f:
+        model = json.load(f)
+    errors = build_index(model).errors + shock_errors(model)
+    for asset_name, asset_data in model['assets'].items():
+        if 'pnl' in asset_data:
+            try:
+                compile_pnl(asset_name, asset_data)
+            except ExpressionError as e:
+                errors.append(str(e))
+    if errors:
+        raise ParameterError(errors)
+    return model
 
-N_RUNS = model['simulation']['n_runs']
-N_YEARS = model['simulation']['n_years']
-SEED = model['simulation']['seed']
 
-print(f"\nConfiguration: {N_RUNS} runs × {N_YEARS} years (seed={SEED})")
+def asset_names(model):
+    """Actifs simulés, dans l'ordre de model.json."""
+    return list(model['assets'])
 
 # =============================================================================
 # 2. CALCULS P&L (inline)
 # =============================================================================
 
-def calculate_pnl(asset_name, asset_data):
-    """Calcule P&L depuis les inputs. Retourne profit PAR UNITÉ PAR CYCLE."""
+def _with_variants(cfg, inp, variants):
+    """Copies de config/inputs où les paramètres de variants sont des arrays."""
+    unknown = set(variants) - set(cfg) - set(inp)
+    if unknown:
+        raise ValueError(f"Paramètres inconnus (ni config ni inputs): {sorted(unknown)}")
+    cfg = {k: np.asarray(variants[k], dtype=np.float64) if k in variants else v
+           for k, v in cfg.items()}
+    inp = {k: np.asarray(variants[k], dtype=np.float64) if k in variants else v
+           for k, v in inp.items()}
+    return cfg, inp
+
+
+def calculate_pnl(asset_name, asset_data, variants=None):
+    """
+    Calcule P&L depuis les inputs. Retourne profit PAR UNITÉ PAR CYCLE.
+
+    Le bloc pnl de model.json (economics.py) est utilisé s'il existe, sinon
+    les formules historiques par nom d'actif.
+
+    variants: {paramètre config/inputs: array} optionnel; chaque sortie est
+    alors un array (une valeur par variante), calculé en une seule passe.
+    """
     
     cfg = asset_data['config']
     inp = asset_data['inputs']
+    if variants:
+        cfg, inp = _with_variants(cfg, inp, variants)
     
     n_units = cfg['n_units']
     price_unit = cfg['price_unit']
     n_cycles = cfg['n_cycles_year']
     
-    if asset_name == 'immobilier':
+    if 'pnl' in asset_data:
+        values = compile_pnl(asset_name, asset_data).evaluate({**cfg, **inp})
+        profit_unit_cycle = values['profit_unit_cycle']
+        capital_total = values['capital_total']
+        
+    elif asset_name == 'immobilier':
         revenue_unit_year = inp['rent_month'] * inp['n_months_occupied']
         cost_unit_year = inp['cost_maintenance'] + inp['cost_taxes'] + inp['cost_management']
         profit_unit_cycle = revenue_unit_year - cost_unit_year
@@ -69,6 +138,9 @@ def calculate_pnl(asset_name, asset_data):
                         n_units * (price_unit + inp['cost_feed_cycle'] + 
                                    inp['cost_vet_cycle'] + inp['cost_other_cycle']))
     
+    else:
+        raise ValueError(f"{asset_name}: pas de bloc pnl dans model.json")
+    
     profit_unit_year = profit_unit_cycle * n_cycles
     profit_total_year = profit_unit_year * n_units
     return_year = profit_total_year / capital_total
@@ -89,7 +161,7 @@ def calculate_pnl(asset_name, asset_data):
 # 3. SIMULATION UNIFIÉE
 # =============================================================================
 
-def simulate_asset(asset_name, asset_data, pnl_data, n_runs, n_years, cap):
+def simulate_asset(asset_name, asset_data, pnl_data, n_runs, n_years, cap, stats=None):
     """
     Simulation unifiée.
     
@@ -97,6 +169,8 @@ def simulate_asset(asset_name, asset_data, pnl_data, n_runs, n_years, cap):
         cap: plafond d'unités
              - n_units_initial pour mode "sans réinvest"
              - 999999 pour mode "avec réinvest"
+        stats: dict optionnel, rempli avec les compteurs
+               random_draws, losses, units_purchased
     
     Returns:
         revenues[n_runs, n_years]
@@ -124,6 +198,11 @@ def simulate_asset(asset_name, asset_data, pnl_data, n_runs, n_years, cap):
     capitals = np.zeros((n_runs, n_years + 1))
     units = np.zeros((n_runs, n_years + 1))
     
+    # Compteurs (mis à jour par cycle, pas par unité)
+    n_draws = 0
+    n_losses = 0
+    n_purchased = 0
+    
     for run in range(n_runs):
         n_units = n_units_initial
         cash = 0.0
@@ -150,6 +229,10 @@ def simulate_asset(asset_name, asset_data, pnl_data, n_runs, n_years, cap):
                         rev_var = np.random.triangular(rev_low, rev_base, rev_high)
                         year_revenue += profit_unit_cycle * (1 + rev_var)
                 
+                # 1 tirage par unité + 1 triangulaire par unité survivante
+                n_draws += 2 * n_units - losses_this_cycle
+                n_losses += losses_this_cycle
+                
                 # Fin de cycle: retirer les unités mortes
                 n_units -= losses_this_cycle
                 
@@ -157,6 +240,7 @@ def simulate_asset(asset_name, asset_data, pnl_data, n_runs, n_years, cap):
                 while n_units < cap and cash >= price_unit:
                     n_units += 1
                     cash -= price_unit
+                    n_purchased += 1
             
             # Fin d'année: enregistrer revenus
             revenues[run, year] = year_revenue
@@ -166,11 +250,17 @@ def simulate_asset(asset_name, asset_data, pnl_data, n_runs, n_years, cap):
             while n_units < cap and cash >= price_unit:
                 n_units += 1
                 cash -= price_unit
+                n_purchased += 1
             
             # Capital = valeur des unités + cash
             capitals[run, year + 1] = n_units * price_unit + cash
             units[run, year + 1] = n_units
     
+    if stats is not None:
+        stats['random_draws'] = n_draws
+        stats['losses'] = n_losses
+        stats['units_purchased'] = n_purchased
+    
     return revenues, capitals, units
 
 
@@ -232,54 +322,152 @@ def generate_trajectories(asset_name, asset_data, pnl_data, n_traj, n_years, cap
     
     return trajectories
 
-# =============================================================================
-# 4. CALCUL P&L
-# =============================================================================
 
-pnl = {}
-print("\nP&L THÉORIQUE (sans risque):")
-print("-" * 60)
-for asset_name in ['immobilier', 'betail', 'embouche']:
-    pnl[asset_name] = calculate_pnl(asset_name, model['assets'][asset_name])
-    p = pnl[asset_name]
-    print(f"{asset_name:<12} profit/unit/cycle={p['profit_unit_cycle']:>10,.0f}  "
-          f"return/year={p['return_year']:>7.1%}  events={p['n_events_year']}")
+# Moteurs disponibles. 'legacy' = boucle de référence (np.random global),
+# 'fast' reçoit un np.random.Generator via rng=, 'counter' le même moteur
+# avec un philox.CounterRNG (tirages adressés par run, voir philox.py).
+ENGINES = {
+    'legacy': simulate_asset,
+    'fast': simulate_asset_fast,
+    'counter': simulate_asset_fast,
+}
 
-# =============================================================================
-# 5. EXÉCUTION DES SIMULATIONS
-# =============================================================================
 
-print("\n" + "=" * 80)
-print("SIMULATIONS EN COURS...")
-print("=" * 80)
+def make_rng(engine_name, seed, first_run=0):
+    """
+    Flux aléatoire du moteur: None (np.random global, seedé) pour legacy.
+    seed: int ou np.random.SeedSequence (voir chunk_seed, job_seed).
+    first_run: index du premier run simulé (counter uniquement).
+    """
+    if engine_name not in ENGINES:
+        raise ValueError(f"Moteur inconnu: {engine_name} (disponibles: {', '.join(ENGINES)})")
+    if engine_name == 'legacy':
+        if isinstance(seed, np.random.SeedSequence):
+            seed = seed.generate_state(4)
+        np.random.seed(seed)
+        return None
+    if engine_name == 'counter':
+        return CounterRNG(seed, first_run)
+    return np.random.default_rng(seed)
 
-results_without = {}
-results_with = {}
-trajectories = {}
 
-for asset_name in ['immobilier', 'betail', 'embouche']:
-    asset_data = model['assets'][asset_name]
-    pnl_data = pnl[asset_name]
-    initial_capital = pnl_data['capital_total']
-    n_units_initial = pnl_data['n_units']
-    
-    # --- MODE SANS RÉINVESTISSEMENT (cap = n_units_initial) ---
-    np.random.seed(SEED)
-    print(f"\n{asset_name} (sans reinvest, cap={n_units_initial})...", end=" ")
-    
-    rev, cap, units = simulate_asset(
-        asset_name, asset_data, pnl_data, N_RUNS, N_YEARS, cap=n_units_initial
-    )
-    
-    results_without[asset_name] = {
+def chunk_seed(seed, asset_name, mode, chunk):
+    """
+    Seed indépendant d'un chunk de runs, dérivé du seed du modèle.
+    Chaque chunk a son propre flux: n'importe quel process peut le
+    calculer sans connaître les autres (shards).
+    """
+    asset_key = zlib.crc32(asset_name.encode())
+    return np.random.SeedSequence([seed, asset_key, MODES.index(mode), chunk])
+
+
+def job_seed(seed, asset_name, mode):
+    """Clé d'un job actif × mode pour le moteur counter (le run est dans le compteur)."""
+    asset_key = zlib.crc32(asset_name.encode())
+    return np.random.SeedSequence([seed, asset_key, MODES.index(mode)])
+
+
+def stream_seed(engine_name, seed, asset_name, mode, chunk=None):
+    """
+    Seed du flux d'un job (chunk=None) ou d'un de ses chunks.
+    counter: toujours la clé du job, les chunks ne diffèrent que par first_run.
+    """
+    if engine_name == 'counter':
+        return job_seed(seed, asset_name, mode)
+    return seed if chunk is None else chunk_seed(seed, asset_name, mode, chunk)
+
+
+# Options de simulation que la boucle legacy ne connaît pas
+FAST_ONLY_OPTIONS = ['capital_events', 'float32', 'shocks']
+
+
+def fast_only_errors(model, engine_name):
+    """Messages d'erreur des options de model incompatibles avec le moteur (vide si tout va bien)."""
+    if engine_name != 'legacy':
+        return []
+    return [f"simulation.{option} n'existe que dans le moteur fast (--engine fast)"
+            for option in FAST_ONLY_OPTIONS if model['simulation'].get(option)]
+
+
+def make_shocks(model):
+    """SystemicShocks de simulation.shocks, ou None si absent."""
+    return SystemicShocks(model) if 'shocks' in model['simulation'] else None
+
+
+def n_shock_factors(model):
+    """Facteurs tirés par run et par année (budget mémoire): un par actif avec shocks."""
+    return len(model['assets']) if 'shocks' in model['simulation'] else 0
+
+
+def call_engine(engine_name, asset_name, asset_data, pnl_data, n_runs, n_years, cap, rng,
+                stats=None, capital_events=False, float32=False, cycle_outputs=None,
+                shocks=None, first_run=0):
+    """
+    Lance un moteur sur un flux déjà créé par make_rng (sans le réinitialiser).
+    capital_events, float32, cycle_outputs, shocks: moteur fast uniquement.
+    shocks (make_shocks): facteurs des runs [first_run, first_run + n_runs).
+    """
+    options = {}
+    if capital_events:
+        options['capital_events'] = True
+    if float32:
+        options['float32'] = True
+    if cycle_outputs is not None:
+        options['cycle_outputs'] = cycle_outputs
+    if shocks is not None:
+        asset_shocks = shocks.for_asset(asset_name, first_run, n_runs, n_years)
+        if asset_shocks is not None:
+            options['shocks'] = asset_shocks
+    if engine_name == 'legacy':
+        if options:
+            raise ValueError(f"{', '.join(options)} n'existe que dans le moteur fast (--engine fast)")
+        return simulate_asset(asset_name, asset_data, pnl_data, n_runs, n_years, cap, stats=stats)
+    return ENGINES[engine_name](asset_name, asset_data, pnl_data, n_runs, n_years, cap,
+                                rng=rng, stats=stats, **options)
+
+
+def rng_state(engine_name, rng):
+    """État sérialisable (JSON) du flux, pour les checkpoints."""
+    if engine_name == 'legacy':
+        name, key, pos, has_gauss, cached_gaussian = np.random.get_state()
+        return {'bit_generator': name, 'key': key.tolist(), 'pos': pos,
+                'has_gauss': has_gauss, 'cached_gaussian': cached_gaussian}
+    if engine_name == 'counter':
+        return rng.state
+    return rng.bit_generator.state
+
+
+def restore_rng_state(engine_name, rng, state):
+    if engine_name == 'legacy':
+        np.random.set_state((state['bit_generator'], np.array(state['key'], dtype=np.uint32),
+                             state['pos'], state['has_gauss'], state['cached_gaussian']))
+    elif engine_name == 'counter':
+        rng.state = state
+    else:
+        rng.bit_generator.state = state
+
+
+def run_engine(engine_name, asset_name, asset_data, pnl_data, n_runs, n_years, cap, seed,
+               stats=None, capital_events=False, float32=False, cycle_outputs=None, shocks=None):
+    """Lance un moteur avec son seeding propre. Retourne (revenues, capitals, units)."""
+    rng = make_rng(engine_name, seed)
+    return call_engine(engine_name, asset_name, asset_data, pnl_data, n_runs, n_years, cap, rng,
+                       stats=stats, capital_events=capital_events, float32=float32,
+                       cycle_outputs=cycle_outputs, shocks=shocks)
+
+
+def summarize(rev, cap, units, initial_capital):
+    """Percentiles par année + résumé final + leurs IC à 95 % (structure de results.json)."""
+    returns = cap[:, -1].astype(np.float64) / initial_capital - 1
+    return {
         'revenues': {
-            'mean': rev.mean(axis=0).tolist(),
+            'mean': rev.mean(axis=0, dtype=np.float64).tolist(),
             'p10': np.percentile(rev, 10, axis=0).tolist(),
             'p50': np.percentile(rev, 50, axis=0).tolist(),
             'p90': np.percentile(rev, 90, axis=0).tolist(),
         },
         'capitals': {
-            'mean': cap.mean(axis=0).tolist(),
+            'mean': cap.mean(axis=0, dtype=np.float64).tolist(),
             'p10': np.percentile(cap, 10, axis=0).tolist(),
             'p50': np.percentile(cap, 50, axis=0).tolist(),
             'p90': np.percentile(cap, 90, axis=0).tolist(),
@@ -290,123 +478,452 @@ for asset_name in ['immobilier', 'betail', 'embouche']:
             'p90': np.percentile(units, 90, axis=0).tolist(),
         },
         'summary': {
-            'return_mean': float((cap[:, -1] / initial_capital - 1).mean()),
-            'return_p10': float(np.percentile(cap[:, -1] / initial_capital - 1, 10)),
-            'return_p90': float(np.percentile(cap[:, -1] / initial_capital - 1, 90)),
-            'volatility': float((cap[:, -1] / initial_capital - 1).std()),
+            'return_mean': float(returns.mean()),
+            'return_p10': float(np.percentile(returns, 10)),
+            'return_p90': float(np.percentile(returns, 90)),
+            'volatility': float(returns.std()),
             'units_final_mean': float(units[:, -1].mean()),
-        }
+        },
+        'ci': summarize_ci(rev, cap, units, returns),
     }
-    
-    s = results_without[asset_name]['summary']
-    print(f"return={s['return_mean']:.1%}, vol={s['volatility']:.1%}")
-    
-    # --- MODE AVEC RÉINVESTISSEMENT (cap = ∞) ---
-    np.random.seed(SEED)
-    print(f"{asset_name} (avec reinvest, cap=∞)...", end=" ")
-    
-    rev, cap, units = simulate_asset(
-        asset_name, asset_data, pnl_data, N_RUNS, N_YEARS, cap=999999
-    )
-    
-    results_with[asset_name] = {
-        'revenues': {
-            'mean': rev.mean(axis=0).tolist(),
-            'p10': np.percentile(rev, 10, axis=0).tolist(),
-            'p50': np.percentile(rev, 50, axis=0).tolist(),
-            'p90': np.percentile(rev, 90, axis=0).tolist(),
+
+# =============================================================================
+# 4. JOBS (actif × mode) ET ASSEMBLAGE DE results.json
+# =============================================================================
+
+MODES = ['without_reinvest', 'with_reinvest']
+TRAJ_N_RUNS = 30
+TRAJ_SEED = 123
+
+
+def mode_cap(mode, pnl_data):
+    """Plafond d'unités du mode: n_units_initial sans réinvest, ∞ avec."""
+    return pnl_data['n_units'] if mode == 'without_reinvest' else CAP_INFINITE
+
+
+def simulate_mode(model, asset_name, mode, engine='legacy', pnl_data=None,
+                  instr=NULL_INSTRUMENTATION, checkpoint=None, budget=None, cycles=None):
+    """
+    Un job actif × mode: simulation + percentiles (bloc de results['simulation']).
+
+    Avec checkpoint (checkpoint.Checkpoint), les runs sont simulés par chunks
+    de checkpoint.chunk_size sur un seul flux aléatoire, sauvegardé après
+    chaque chunk. Pour legacy le résultat est identique au run d'un bloc.
+
+    Avec budget (octets), les chunks sont dimensionnés par budget.plan_chunks
+    et agrégés au fil de l'eau (voir _simulate_mode_streamed).
+
+    Avec cycles (cycles.CycleStore, moteur fast), les sorties par cycle du
+    job sont écrites dans ses fichiers .npy.
+    """
+    sim = model['simulation']
+    asset_data = model['assets'][asset_name]
+    if pnl_data is None:
+        pnl_data = calculate_pnl(asset_name, asset_data)
+    scope = f"{asset_name}:{mode}"
+
+    if checkpoint is not None:
+        return _simulate_mode_chunked(model, asset_name, mode, engine, pnl_data, instr, checkpoint)
+    if budget is not None:
+        return _simulate_mode_streamed(model, asset_name, mode, engine, pnl_data, instr, budget,
+                                       cycles)
+
+    stats = {}
+    cycle_outputs = {} if cycles is not None else None
+    with instr.phase(f"simulate:{scope}"):
+        rev, cap, units = run_engine(
+            engine, asset_name, asset_data, pnl_data, sim['n_runs'], sim['n_years'],
+            mode_cap(mode, pnl_data), stream_seed(engine, sim['seed'], asset_name, mode), stats=stats,
+            capital_events=sim.get('capital_events', False), float32=sim.get('float32', False),
+            cycle_outputs=cycle_outputs, shocks=make_shocks(model)
+        )
+    instr.count(scope, **stats)
+    if cycles is not None:
+        with instr.phase(f"cycles_write:{scope}"):
+            writer = cycles.writer(scope, sim['n_runs'], sim['n_years'],
+                                   asset_data['config']['n_cycles_year'])
+            writer.write(0, cycle_outputs)
+            writer.close()
+
+    with instr.phase(f"percentiles:{scope}"):
+        return summarize(rev, cap, units, pnl_data['capital_total'])
+
+
+def _simulate_mode_chunked(model, asset_name, mode, engine, pnl_data, instr, checkpoint):
+    sim = model['simulation']
+    asset_data = model['assets'][asset_name]
+    scope = f"{asset_name}:{mode}"
+    chunk_size = checkpoint.header['chunk_size']
+    n_chunks = -(-sim['n_runs'] // chunk_size)
+
+    job = checkpoint.job(scope)
+    if job['summary'] is not None:
+        return job['summary']
+
+    rng = make_rng(engine, stream_seed(engine, sim['seed'], asset_name, mode))
+    shocks = make_shocks(model)
+    with instr.phase(f"checkpoint_load:{scope}"):
+        parts = checkpoint.load_chunks(scope)
+    if job['rng_state'] is not None:
+        restore_rng_state(engine, rng, job['rng_state'])
+
+    for chunk in range(len(parts), n_chunks):
+        n_runs_chunk = min(chunk_size, sim['n_runs'] - chunk * chunk_size)
+        stats = {}
+        with instr.phase(f"simulate:{scope}"):
+            arrays = call_engine(engine, asset_name, asset_data, pnl_data, n_runs_chunk,
+                                 sim['n_years'], mode_cap(mode, pnl_data), rng, stats=stats,
+                                 capital_events=sim.get('capital_events', False),
+                                 float32=sim.get('float32', False), shocks=shocks,
+                                 first_run=chunk * chunk_size)
+        instr.count(scope, **stats)
+        with instr.phase(f"checkpoint_save:{scope}"):
+            checkpoint.save_chunk(scope, chunk, arrays, rng_state(engine, rng), stats)
+        parts.append(arrays)
+
+    rev, cap, units = (np.concatenate(columns) for columns in zip(*parts))
+    with instr.phase(f"percentiles:{scope}"):
+        summary = summarize(rev, cap, units, pnl_data['capital_total'])
+    checkpoint.finish(scope, summary)
+    return summary
+
+
+def _simulate_mode_streamed(model, asset_name, mode, engine, pnl_data, instr, budget, cycles=None):
+    """
+    Chunks de runs agrégés au fil de l'eau dans un StreamingSummary: un seul
+    chunk en mémoire. Chaque chunk a son seed (chunk_seed), comme shard.py:
+    même budget → mêmes chunks → même résultat que shard.py avec ce chunk_size.
+    """
+    sim = model['simulation']
+    asset_data = model['assets'][asset_name]
+    scope = f"{asset_name}:{mode}"
+    n_runs, n_years = sim['n_runs'], sim['n_years']
+    cap = mode_cap(mode, pnl_data)
+    plan = plan_chunks(budget, asset_data, pnl_data, n_runs, n_years, cap,
+                       float32=sim.get('float32', False), cycles=cycles is not None,
+                       n_shock_factors=n_shock_factors(model))
+    writer = None
+    if cycles is not None:
+        writer = cycles.writer(scope, n_runs, n_years, asset_data['config']['n_cycles_year'])
+
+    shocks = make_shocks(model)
+    acc = StreamingSummary(n_years, pnl_data['capital_total'])
+    for chunk in range(plan['n_chunks']):
+        start = chunk * plan['chunk_size']
+        stats = {}
+        cycle_outputs = {} if writer is not None else None
+        with instr.phase(f"simulate:{scope}"):
+            rng = make_rng(engine, stream_seed(engine, sim['seed'], asset_name, mode, chunk),
+                           first_run=start)
+            arrays = call_engine(engine, asset_name, asset_data, pnl_data,
+                                 min(plan['chunk_size'], n_runs - start), n_years, cap, rng,
+                                 stats=stats, capital_events=sim.get('capital_events', False),
+                                 float32=sim.get('float32', False), cycle_outputs=cycle_outputs,
+                                 shocks=shocks, first_run=start)
+        instr.count(scope, **stats)
+        with instr.phase(f"aggregate:{scope}"):
+            acc.update(chunk, start, *arrays)
+        if writer is not None:
+            with instr.phase(f"cycles_write:{scope}"):
+                writer.write(start, cycle_outputs)
+        del arrays, cycle_outputs
+
+    if writer is not None:
+        writer.close()
+
+    with instr.phase(f"percentiles:{scope}"):
+        return acc.finalize()
+
+
+def simulate_trajectories(model, asset_name, pnl_data=None, instr=NULL_INSTRUMENTATION):
+    """Les 30 trajectoires de revenus des charts G/H (mode sans réinvest)."""
+    asset_data = model['assets'][asset_name]
+    if pnl_data is None:
+        pnl_data = calculate_pnl(asset_name, asset_data)
+    with instr.phase(f"trajectories:{asset_name}"):
+        traj = generate_trajectories(
+            asset_name, asset_data, pnl_data,
+            n_traj=TRAJ_N_RUNS, n_years=model['simulation']['n_years'],
+            cap=pnl_data['n_units'], seed=TRAJ_SEED
+        )
+    return traj.tolist()
+
+
+def build_results(model, pnl, results_mode, trajectories, engine, source='model.json'):
+    """Assemble le dict results.json à partir des jobs."""
+    sim = model['simulation']
+    results = {
+        'meta': {
+            'version': '2.1',
+            'timestamp': datetime.now().isoformat(),
+            'source': source,
+            'n_runs': sim['n_runs'],
+            'n_years': sim['n_years'],
+            'seed': sim['seed'],
+            'engine': engine
         },
-        'capitals': {
-            'mean': cap.mean(axis=0).tolist(),
-            'p10': np.percentile(cap, 10, axis=0).tolist(),
-            'p50': np.percentile(cap, 50, axis=0).tolist(),
-            'p90': np.percentile(cap, 90, axis=0).tolist(),
+        'pnl': {
+            asset_name: {
+                'profit_unit_cycle': pnl[asset_name]['profit_unit_cycle'],
+                'profit_unit_year': pnl[asset_name]['profit_unit_year'],
+                'profit_total_year': pnl[asset_name]['profit_total_year'],
+                'capital_total': pnl[asset_name]['capital_total'],
+                'return_year': pnl[asset_name]['return_year'],
+                'n_events_year': pnl[asset_name]['n_events_year']
+            }
+            for asset_name in asset_names(model)
         },
-        'units': {
-            'mean': units.mean(axis=0).tolist(),
-            'p10': np.percentile(units, 10, axis=0).tolist(),
-            'p90': np.percentile(units, 90, axis=0).tolist(),
+        'simulation': {
+            mode: {asset_name: results_mode[mode][asset_name] for asset_name in asset_names(model)}
+            for mode in MODES
         },
-        'summary': {
-            'return_mean': float((cap[:, -1] / initial_capital - 1).mean()),
-            'return_p10': float(np.percentile(cap[:, -1] / initial_capital - 1, 10)),
-            'return_p90': float(np.percentile(cap[:, -1] / initial_capital - 1, 90)),
-            'volatility': float((cap[:, -1] / initial_capital - 1).std()),
-            'units_final_mean': float(units[:, -1].mean()),
+        'trajectories': {
+            'meta': {'seed': TRAJ_SEED, 'n_runs': TRAJ_N_RUNS, 'mode': 'without_reinvest'},
+            'data': {asset_name: trajectories[asset_name] for asset_name in asset_names(model)}
         }
     }
-    
-    s = results_with[asset_name]['summary']
-    print(f"return={s['return_mean']:.1%}, vol={s['volatility']:.1%}, units={s['units_final_mean']:.1f}")
-    
-    # --- TRAJECTOIRES POUR CHARTS G/H (mode sans réinvest) ---
-    traj = generate_trajectories(
-        asset_name, asset_data, pnl_data, 
-        n_traj=30, n_years=N_YEARS, cap=n_units_initial, seed=123
-    )
-    trajectories[asset_name] = traj.tolist()
+    for option in ['capital_events', 'float32', 'shocks']:
+        if sim.get(option):
+            results['meta'][option] = True
+    return results
 
 # =============================================================================
-# 6. SAUVEGARDE RÉSULTATS
+# 5. EXÉCUTION
 # =============================================================================
 
-results = {
-    'meta': {
-        'version': '2.1',
-        'timestamp': datetime.now().isoformat(),
-        'source': 'model.json',
-        'n_runs': N_RUNS,
-        'n_years': N_YEARS,
-        'seed': SEED
-    },
-    'pnl': {
-        asset_name: {
-            'profit_unit_cycle': pnl[asset_name]['profit_unit_cycle'],
-            'profit_unit_year': pnl[asset_name]['profit_unit_year'],
-            'profit_total_year': pnl[asset_name]['profit_total_year'],
-            'capital_total': pnl[asset_name]['capital_total'],
-            'return_year': pnl[asset_name]['return_year'],
-            'n_events_year': pnl[asset_name]['n_events_year']
-        }
-        for asset_name in ['immobilier', 'betail', 'embouche']
-    },
-    'simulation': {
-        'without_reinvest': results_without,
-        'with_reinvest': results_with
-    },
-    'trajectories': {
-        'meta': {'seed': 123, 'n_runs': 30, 'mode': 'without_reinvest'},
-        'data': trajectories
-    }
-}
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo unifié")
+    parser.add_argument('--profile', action='store_true',
+                        help="chronométrer les phases (results['meta']['instrumentation'])")
+    parser.add_argument('--trace', metavar='PATH',
+                        help="écrire une trace Chrome/Perfetto (implique --profile)")
+    parser.add_argument('--engine', choices=sorted(ENGINES),
+                        help="moteur de simulation (défaut: simulation.engine ou 'legacy')")
+    parser.add_argument('--checkpoint', nargs='?', const='checkpoint', metavar='DIR',
+                        help="sauvegarder l'état après chaque chunk (défaut: checkpoint/)")
+    parser.add_argument('--resume', action='store_true',
+                        help="reprendre depuis le checkpoint (implique --checkpoint)")
+    parser.add_argument('--chunk-size', type=int,
+                        help=f"runs par chunk (défaut: simulation.chunk_size ou {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument('--memory-budget', metavar='SIZE',
+                        help="RAM max (ex.: 512M, 2G): chunks dimensionnés et agrégés au fil de l'eau "
+                             "(défaut: simulation.memory_budget)")
+    parser.add_argument('--float32', action='store_true',
+                        help="stocker revenues/capitals en float32 (moteur fast, défaut: simulation.float32)")
+    parser.add_argument('--cycles', metavar='DIR',
+                        help="écrire revenus/unités/pertes par cycle en .npy dans DIR (moteur fast)")
+    parser.add_argument('--model', default='model.json')
+    parser.add_argument('--output', default='results.json', help="results.json produit")
+    args = parser.parse_args(argv)
 
-with open('results.json', 'w') as f:
-    json.dump(results, f, indent=2)
+    instr = Instrumentation() if (args.profile or args.trace) else NULL_INSTRUMENTATION
+
+    print("=" * 80)
+    print("SIMULATE.PY — Monte Carlo unifié")
+    print("=" * 80)
+
+    with instr.phase('load_model'):
+        try:
+            model = load_model(args.model)
+        except ParameterError as e:
+            print(f"\n✗ {args.model} invalide:")
+            for err in e.errors:
+                print(f"  {err}")
+            raise SystemExit(1)
+
+    N_RUNS = model['simulation']['n_runs']
+    N_YEARS = model['simulation']['n_years']
+    SEED = model['simulation']['seed']
+    ENGINE = args.engine or model['simulation'].get('engine', 'legacy')
+    ASSETS = asset_names(model)
+
+    if args.float32:
+        model['simulation']['float32'] = True
+    errors = fast_only_errors(model, ENGINE)
+    if errors:
+        print(f"\n✗ {errors[0]}")
+        raise SystemExit(1)
+
+    budget_text = args.memory_budget or model['simulation'].get('memory_budget')
+    budget = None
+    if budget_text is not None:
+        try:
+            budget = parse_size(budget_text)
+        except ValueError as e:
+            print(f"\n✗ --memory-budget: {e}")
+            raise SystemExit(1)
+        if args.checkpoint or args.resume:
+            print("\n✗ --memory-budget et --checkpoint sont exclusifs (le checkpoint garde tous les runs)")
+            raise SystemExit(1)
+    if args.cycles and ENGINE == 'legacy':
+        print("\n✗ --cycles n'existe que dans le moteur fast (--engine fast)")
+        raise SystemExit(1)
+    if args.cycles and (args.checkpoint or args.resume):
+        print("\n✗ --cycles et --checkpoint sont exclusifs")
+        raise SystemExit(1)
+
+    options = [option for option in FAST_ONLY_OPTIONS if model['simulation'].get(option)]
+    print(f"\nConfiguration: {N_RUNS} runs × {N_YEARS} years (seed={SEED}, engine={ENGINE}"
+          f"{''.join(f', {option}' for option in options)})")
+
+    checkpoint = None
+    if args.checkpoint or args.resume:
+        chunk_size = args.chunk_size or model['simulation'].get('chunk_size', DEFAULT_CHUNK_SIZE)
+        from checkpoint import Checkpoint, CheckpointMismatch, NotACheckpoint
+        try:
+            checkpoint = Checkpoint(args.checkpoint or 'checkpoint', model, ENGINE, chunk_size,
+                                    resume=args.resume)
+        except CheckpointMismatch as e:
+            print(f"\n✗ Checkpoint incompatible ({e}). Relancer sans --resume pour repartir de zéro.")
+            raise SystemExit(1)
+        except NotACheckpoint as e:
+            print(f"\n✗ {e}: choisir un dossier vide ou un checkpoint existant.")
+            raise SystemExit(1)
+        done = sum(job['chunks_done'] for job in checkpoint.manifest['jobs'].values())
+        print(f"Checkpoint: {checkpoint.path}/ (chunks de {chunk_size} runs"
+              f"{f', reprise après {done} chunks' if args.resume else ''})")
+
+    # -------------------------------------------------------------------------
+    # 5.1 CALCUL P&L
+    # -------------------------------------------------------------------------
+
+    pnl = {}
+    print("\nP&L THÉORIQUE (sans risque):")
+    print("-" * 60)
+    with instr.phase('pnl'):
+        for asset_name in ASSETS:
+            pnl[asset_name] = calculate_pnl(asset_name, model['assets'][asset_name])
+    for asset_name in ASSETS:
+        p = pnl[asset_name]
+        print(f"{asset_name:<12} profit/unit/cycle={p['profit_unit_cycle']:>10,.0f}  "
+              f"return/year={p['return_year']:>7.1%}  events={p['n_events_year']}")
+
+    plans = {}
+    if budget is not None:
+        print(f"\nBUDGET MÉMOIRE: {budget / MB:,.0f} Mo")
+        print("-" * 60)
+        for asset_name in ASSETS:
+            for mode in MODES:
+                try:
+                    plan = plan_chunks(budget, model['assets'][asset_name], pnl[asset_name],
+                                       N_RUNS, N_YEARS, mode_cap(mode, pnl[asset_name]),
+                                       float32=model['simulation'].get('float32', False),
+                                       cycles=bool(args.cycles),
+                                       n_shock_factors=n_shock_factors(model))
+                except ValueError as e:
+                    print(f"\n✗ {asset_name}:{mode}: {e}")
+                    raise SystemExit(1)
+                plans[f"{asset_name}:{mode}"] = plan
+                print(f"{asset_name:<12} {mode:<18} {plan['n_chunks']:>5} chunks de "
+                      f"{plan['chunk_size']:>9,} runs (units en {plan['units_dtype']})")
+
+    # -------------------------------------------------------------------------
+    # 5.2 SIMULATIONS (2 modes par actif)
+    # -------------------------------------------------------------------------
+
+    print("\n" + "=" * 80)
+    print("SIMULATIONS EN COURS...")
+    print("=" * 80)
+
+    results_mode = {mode: {} for mode in MODES}
+    trajectories = {}
+    cycles = None
+    if args.cycles:
+        from cycles import CycleStore
+        cycles = CycleStore(args.cycles)
+
+    for asset_name in ASSETS:
+        n_units_initial = pnl[asset_name]['n_units']
+
+        for mode in MODES:
+            if mode == 'without_reinvest':
+                print(f"\n{asset_name} (sans reinvest, cap={n_units_initial})...", end=" ")
+            else:
+                print(f"{asset_name} (avec reinvest, cap=∞)...", end=" ")
+
+            results_mode[mode][asset_name] = simulate_mode(
+                model, asset_name, mode, ENGINE, pnl_data=pnl[asset_name], instr=instr,
+                checkpoint=checkpoint, budget=budget, cycles=cycles
+            )
+
+            s = results_mode[mode][asset_name]['summary']
+            if mode == 'without_reinvest':
+                print(f"return={s['return_mean']:.1%}, vol={s['volatility']:.1%}")
+            else:
+                print(f"return={s['return_mean']:.1%}, vol={s['volatility']:.1%}, units={s['units_final_mean']:.1f}")
+
+        # --- TRAJECTOIRES POUR CHARTS G/H (mode sans réinvest) ---
+        trajectories[asset_name] = simulate_trajectories(
+            model, asset_name, pnl_data=pnl[asset_name], instr=instr
+        )
+
+    results_without = results_mode['without_reinvest']
+    results_with = results_mode['with_reinvest']
+
+    # -------------------------------------------------------------------------
+    # 5.3 SAUVEGARDE RÉSULTATS
+    # -------------------------------------------------------------------------
+
+    results = build_results(model, pnl, results_mode, trajectories, ENGINE, source=args.model)
+    if budget is not None:
+        results['meta']['memory_budget'] = {'bytes': budget, 'jobs': plans}
+    if cycles is not None:
+        cycles.write_index({'seed': SEED, 'engine': ENGINE, 'timestamp': results['meta']['timestamp']})
+        results['meta']['cycles'] = args.cycles
+
+    # Le temps d'écriture lui-même n'apparaît que dans la trace et le rapport
+    if instr.enabled:
+        results['meta']['instrumentation'] = instr.to_meta()
+
+    with instr.phase('write_json'):
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    # -------------------------------------------------------------------------
+    # 5.4 RÉSUMÉ FINAL
+    # -------------------------------------------------------------------------
+
+    print("\n" + "=" * 80)
+    print("RÉSUMÉ")
+    print("=" * 80)
+
+    print("\nSANS RÉINVESTISSEMENT (cap = n_units_initial):")
+    print("-" * 70)
+    print(f"{'Actif':<12} {'Return 5Y':<12} {'IC95':<20} {'Volatilité':<12} {'Units Y5':<10}")
+    print("-" * 70)
+    for asset_name in ASSETS:
+        s = results_without[asset_name]['summary']
+        ci = results_without[asset_name].get('ci')  # absent des jobs d'un ancien checkpoint
+        ci = ci and ci['summary']['return_mean']
+        interval = f"[{ci['low']:.1%}, {ci['high']:.1%}]" if ci else "—"
+        print(f"{asset_name:<12} {s['return_mean']:>10.1%}   {interval:<20} {s['volatility']:>8.1%} {s['units_final_mean']:>10.1f}")
+
+    print("\nAVEC RÉINVESTISSEMENT (cap = ∞):")
+    print("-" * 70)
+    print(f"{'Actif':<12} {'Return 5Y':<12} {'IC95':<20} {'Volatilité':<12} {'Units Y5':<10}")
+    print("-" * 70)
+    for asset_name in ASSETS:
+        s = results_with[asset_name]['summary']
+        ci = results_with[asset_name].get('ci')  # absent des jobs d'un ancien checkpoint
+        ci = ci and ci['summary']['return_mean']
+        interval = f"[{ci['low']:.1%}, {ci['high']:.1%}]" if ci else "—"
+        print(f"{asset_name:<12} {s['return_mean']:>10.1%}   {interval:<20} {s['volatility']:>8.1%} {s['units_final_mean']:>10.1f}")
+
+    if instr.enabled:
+        print("\n" + "=" * 80)
+        print("PROFIL")
+        print("=" * 80)
+        instr.report()
+        if args.trace:
+            instr.write_trace(args.trace)
+            print(f"✓ Trace écrite: {args.trace}")
+
+    print("\n" + "=" * 80)
+    print(f"✓ {args.output} créé (2 modes + 30 trajectoires)")
+    print("=" * 80)
+
+    return results
 
-# =============================================================================
-# 7. RÉSUMÉ FINAL
-# =============================================================================
 
-print("\n" + "=" * 80)
-print("RÉSUMÉ")
-print("=" * 80)
-
-print("\nSANS RÉINVESTISSEMENT (cap = n_units_initial):")
-print("-" * 60)
-print(f"{'Actif':<12} {'Return 5Y':<12} {'Volatilité':<12} {'Units Y5':<10}")
-print("-" * 60)
-for asset_name in ['immobilier', 'betail', 'embouche']:
-    s = results_without[asset_name]['summary']
-    print(f"{asset_name:<12} {s['return_mean']:>10.1%} {s['volatility']:>10.1%} {s['units_final_mean']:>8.1f}")
-
-print("\nAVEC RÉINVESTISSEMENT (cap = ∞):")
-print("-" * 60)
-print(f"{'Actif':<12} {'Return 5Y':<12} {'Volatilité':<12} {'Units Y5':<10}")
-print("-" * 60)
-for asset_name in ['immobilier', 'betail', 'embouche']:
-    s = results_with[asset_name]['summary']
-    print(f"{asset_name:<12} {s['return_mean']:>10.1%} {s['volatility']:>10.1%} {s['units_final_mean']:>8.1f}")
-
-print("\n" + "=" * 80)
-print("✓ results.json créé (2 modes + 30 trajectoires)")
-print("=" * 80)
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,589 @@
+"""
+SURROGATE.PY — Métamodèle des résumés de simulation (requêtes en microsecondes)
+================================================================================
+Flow: model.json → surrogate.py fit (hors ligne) → surrogate.json
+      → Surrogate.query() (outil interactif) → résumé + erreur, ou moteur hors domaine
+
+Même le moteur fast prend des secondes par scénario; un outil qui
+recalcule à chaque frappe a besoin d'une réponse en microsecondes.
+
+1. Réduction: le moteur ne voit config/inputs qu'à travers le P&L, et tout
+   est homogène en price_unit (achats: floor(cash / price_unit)). Le capital
+   final divisé par price_unit ne dépend donc que de paramètres sans dimension:
+       yield = profit_unit_cycle / price_unit, p_loss_total, pct_low, pct_base, pct_high
+       (+ p/pct_depreciation, p/pct_appreciation avec capital_events)
+   et les rendements s'en déduisent exactement:
+       return_x = final_x × price_unit / capital_total - 1, volatility = final_std × price_unit / capital_total
+   Tous les inputs (prix du lait, coûts...) passent par yield: le métamodèle
+   a 5 dimensions au lieu d'une vingtaine.
+   Non interpolés (toute autre valeur → moteur): mode, n_units,
+   n_cycles_year, n_years, capital_events, shocks.
+
+2. Entraînement (fit): N_TRAIN points en hypercube latin dans un domaine
+   autour de model.json (±SPAN relatif sur yield et les probabilités,
+   ±PCT_SPAN absolu sur la loi triangulaire sans croiser pct_base), un
+   lot de runs du moteur fast par point, mêmes nombres aléatoires pour tous
+   les points (surface lisse). Un job actif × mode par worker.
+
+3. Chaos polynomial: polynômes de Legendre orthonormés sur le domaine
+   ramené à [-1, 1]^d, degré total ≤ MAX_DEGREE, moindres carrés. Degré
+   et échelle (linéaire, ou log1p quand le capital réinvesti croît
+   exponentiellement) choisis par sortie sur HOLDOUT des points (jamais
+   vus par l'ajustement), puis réajustés sur tous. L'erreur hold-out
+   (RMSE, max) est publiée avec chaque réponse, à côté du bruit Monte Carlo
+   des points d'entraînement.
+
+4. Requête: Surrogate(path) ne lit surrogate.json qu'au premier appel.
+   predict() (paramètres sans dimension) ~30 µs; query() (model.json +
+   surcharges de paramètres) calcule d'abord le P&L, ~200 µs en tout. Hors du domaine
+   entraîné ou si la structure diffère: le vrai moteur (simulate_mode),
+   et la réponse l'indique (source='engine').
+
+Usage:
+    python3 surrogate.py fit                                  # tous les actifs × modes
+    python3 surrogate.py fit --asset betail --n-train 600 --workers 4
+    python3 surrogate.py query --asset betail --set price_milk_liter=550 --set p_loss_total=0.25
+    python3 surrogate.py check --n-points 20                  # métamodèle vs moteur
+
+API:
+    from surrogate import Surrogate
+    s = Surrogate('surrogate.json')
+    summary, info = s.query(model, 'betail', 'with_reinvest', {'price_milk_liter': 550})
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+SURROGATE_PATH = 'surrogate.json'
+N_TRAIN = 400
+N_RUNS_TRAIN = 4000
+TRAIN_SEED = 7
+SPAN = 0.5
+PCT_SPAN = 0.1
+MAX_DEGREE = 4
+HOLDOUT = 0.2
+
+TRIANGULAR = ['pct_low', 'pct_base', 'pct_high']
+CAPITAL_EVENTS = ['p_depreciation', 'pct_depreciation', 'p_appreciation', 'pct_appreciation']
+OUTPUTS = ['final_mean', 'final_p10', 'final_p90', 'final_std', 'units_final_mean']
+SUMMARY_KEYS = ['return_mean', 'return_p10', 'return_p90', 'volatility', 'units_final_mean']
+
+# =============================================================================
+# 1. PARAMÈTRES SANS DIMENSION
+# =============================================================================
+
+def features(asset_data, pnl_data, capital_events=False):
+    """{nom: valeur} des paramètres dont dépend le capital final / price_unit."""
+    revenue = asset_data['risks']['revenue']
+    capital = asset_data['risks']['capital']
+    x = {'yield': pnl_data['profit_unit_cycle'] / pnl_data['price_unit'],
+         'p_loss_total': capital['p_loss_total']}
+    x.update({key: revenue[key] for key in TRIANGULAR})
+    if capital_events:
+        x.update({key: capital[key] for key in CAPITAL_EVENTS})
+    return x
+
+
+def structure(model, asset_name, mode):
+    """Ce qui n'est pas interpolé: toute différence renvoie au moteur."""
+    sim = model['simulation']
+    cfg = model['assets'][asset_name]['config']
+    return {'mode': mode, 'n_units': cfg['n_units'], 'n_cycles_year': cfg['n_cycles_year'],
+            'n_years': sim['n_years'], 'capital_events': bool(sim.get('capital_events', False)),
+            'shocks': sim.get('shocks')}
+
+
+def domain(x, span=SPAN, pct_span=PCT_SPAN):
+    """{nom: [bas, haut]} autour de x (largeur nulle = paramètre figé)."""
+    bounds = {}
+    # Triangulaire: même demi-largeur pour les trois, sans croisement possible
+    gap = min(x['pct_base'] - x['pct_low'], x['pct_high'] - x['pct_base'])
+    half = min(pct_span, gap / 2)
+    for name, value in x.items():
+        if name in TRIANGULAR:
+            bounds[name] = [value - half, value + half]
+            continue
+        low, high = sorted((value * (1 - span), value * (1 + span)))
+        if name.startswith('p_'):
+            low, high = max(low, 0.0), min(high, 1.0)
+        bounds[name] = [low, high]
+    return bounds
+
+
+def apply_overrides(asset_data, overrides):
+    """Copie de asset_data avec des paramètres config/inputs/risks remplacés (copies superficielles)."""
+    if not overrides:
+        return asset_data
+    asset_data = dict(asset_data)
+    sections = {'config': ('config',), 'inputs': ('inputs',),
+                'risks.revenue': ('risks', 'revenue'), 'risks.capital': ('risks', 'capital')}
+    copied = {}
+    for key, value in overrides.items():
+        for name, path in sections.items():
+            block = asset_data
+            for part in path:
+                block = block[part]
+            if key in block:
+                break
+        else:
+            raise ValueError(f"paramètre inconnu: {key} (ni config, ni inputs, ni risks)")
+        if name not in copied:
+            if path[0] == 'risks' and 'risks' not in copied:
+                asset_data['risks'] = dict(asset_data['risks'])
+                copied['risks'] = True
+            parent = asset_data['risks'] if path[0] == 'risks' else asset_data
+            parent[path[-1]] = copied[name] = dict(parent[path[-1]])
+        copied[name][key] = value
+    return asset_data
+
+# =============================================================================
+# 2. CHAOS POLYNOMIAL (LEGENDRE)
+# =============================================================================
+
+def multi_indices(n_dims, degree):
+    """Exposants (n_termes, n_dims) de degré total ≤ degree, par degré croissant."""
+    def rec(dims, remaining):
+        if dims == 0:
+            yield ()
+            return
+        for k in range(remaining + 1):
+            for rest in rec(dims - 1, remaining - k):
+                yield (k,) + rest
+    indices = sorted(rec(n_dims, degree), key=lambda e: (sum(e), [-k for k in e]))
+    return np.array(indices, dtype=np.int64).reshape(len(indices), n_dims)
+
+
+def legendre_table(z, degree):
+    """P_k(z) orthonormés sur [-1, 1] (uniforme), forme z.shape + (degree + 1,)."""
+    table = np.empty(np.shape(z) + (degree + 1,))
+    table[..., 0] = 1.0
+    if degree:
+        table[..., 1] = z
+    for k in range(1, degree):
+        table[..., k + 1] = ((2 * k + 1) * z * table[..., k] - k * table[..., k - 1]) / (k + 1)
+    return table * np.sqrt(2 * np.arange(degree + 1) + 1)
+
+
+def legendre_powers(degree):
+    """Matrice L (degree + 1, degree + 1): P_k(z) orthonormé = Σ_j L[k, j] z^j."""
+    matrix = np.zeros((degree + 1, degree + 1))
+    for k in range(degree + 1):
+        matrix[k, :k + 1] = np.polynomial.legendre.leg2poly(np.eye(degree + 1)[k])[:k + 1]
+    return matrix * np.sqrt(2 * np.arange(degree + 1) + 1)[:, None]
+
+
+def design(z, exponents):
+    """Matrice (n_points, n_termes) des polynômes produits."""
+    degree = int(exponents.max(initial=0))
+    table = legendre_table(z, degree)                       # (n, d, degree + 1)
+    dims = np.arange(exponents.shape[1])
+    return table[:, dims, exponents].prod(axis=2)           # (n, termes, d) → (n, termes)
+
+
+def fit_outputs(z, targets, max_degree=MAX_DEGREE, holdout=HOLDOUT, seed=TRAIN_SEED):
+    """
+    Ajuste chaque sortie (colonnes de targets, ≥ 0). Degré et échelle
+    (linéaire ou log1p) choisis par sortie sur l'erreur hold-out, en unités
+    d'origine.
+
+    Returns:
+        exponents (termes du degré max retenu), coefficients (termes, sorties),
+        degrés retenus, échelle log par sortie, erreurs hold-out {'rmse', 'max'} par sortie
+    """
+    n = len(z)
+    order = np.random.default_rng(seed).permutation(n)
+    n_test = max(int(n * holdout), 1)
+    test, train = order[:n_test], order[n_test:]
+
+    best = [(math.inf, 0, False, math.inf)] * targets.shape[1]     # (rmse, degré, log, max)
+    for degree in range(max_degree + 1):
+        exponents = multi_indices(z.shape[1], degree)
+        if len(exponents) > len(train) / 2:
+            break
+        basis = design(z, exponents)
+        for log in (False, True):
+            scaled = np.log1p(targets) if log else targets
+            coef, *_ = np.linalg.lstsq(basis[train], scaled[train], rcond=None)
+            predicted = basis[test] @ coef
+            errors = (np.expm1(predicted) if log else predicted) - targets[test]
+            rmse = np.sqrt((errors ** 2).mean(axis=0))
+            worst = np.abs(errors).max(axis=0)
+            best = [min(b, (r, degree, log, w)) for b, r, w in zip(best, rmse, worst)]
+
+    degrees = [degree for _, degree, _, _ in best]
+    logs = [log for _, _, log, _ in best]
+    exponents = multi_indices(z.shape[1], max(degrees))
+    basis = design(z, exponents)
+    coefficients = np.zeros((len(exponents), targets.shape[1]))
+    for output, (degree, log) in enumerate(zip(degrees, logs)):
+        terms = exponents.sum(axis=1) <= degree
+        scaled = np.log1p(targets[:, output]) if log else targets[:, output]
+        coefficients[terms, output], *_ = np.linalg.lstsq(basis[:, terms], scaled, rcond=None)
+    errors = [{'rmse': float(r), 'max': float(w)} for r, _, _, w in best]
+    return exponents, coefficients, degrees, logs, errors
+
+# =============================================================================
+# 3. ENTRAÎNEMENT
+# =============================================================================
+
+def latin_hypercube(n, n_dims, rng):
+    """n points dans [0, 1)^n_dims, une strate par point et par dimension."""
+    strata = np.argsort(rng.random((n_dims, n)), axis=1).T
+    return (strata + rng.random((n, n_dims))) / n
+
+
+def simulate_point(asset_name, asset_data, pnl_data, x, n_runs, n_years, cap, capital_events,
+                   shocks, seed):
+    """Statistiques OUTPUTS (par price_unit) du moteur fast au point x."""
+    from engine import simulate_asset_fast
+
+    asset_data = dict(asset_data)
+    asset_data['risks'] = {
+        'revenue': {**asset_data['risks']['revenue'], **{k: x[k] for k in TRIANGULAR}},
+        'capital': {**asset_data['risks']['capital'],
+                    **{k: v for k, v in x.items() if k == 'p_loss_total' or k in CAPITAL_EVENTS}},
+    }
+    pnl_data = dict(pnl_data, profit_unit_cycle=x['yield'] * pnl_data['price_unit'])
+    _, capitals, units = simulate_asset_fast(
+        asset_name, asset_data, pnl_data, n_runs, n_years, cap,
+        rng=np.random.default_rng(seed), capital_events=capital_events, shocks=shocks)
+    final = capitals[:, -1] / pnl_data['price_unit']
+    return [final.mean(), np.percentile(final, 10), np.percentile(final, 90), final.std(),
+            units[:, -1].mean()]
+
+
+def fit_job(model, asset_name, mode, n_train=N_TRAIN, n_runs=N_RUNS_TRAIN, span=SPAN,
+            pct_span=PCT_SPAN, max_degree=MAX_DEGREE, seed=TRAIN_SEED):
+    """Métamodèle d'un job actif × mode (dict sérialisable)."""
+    from simulate import calculate_pnl, make_shocks, mode_cap
+
+    start = time.perf_counter()
+    sim = model['simulation']
+    asset_data = model['assets'][asset_name]
+    pnl_data = calculate_pnl(asset_name, asset_data)
+    shape = structure(model, asset_name, mode)
+    center = features(asset_data, pnl_data, shape['capital_events'])
+    bounds = domain(center, span, pct_span)
+    varied = [name for name, (low, high) in bounds.items() if high > low]
+    fixed = {name: center[name] for name in bounds if name not in varied}
+
+    shocks = make_shocks(model)
+    shocks = shocks and shocks.for_asset(asset_name, 0, n_runs, sim['n_years'])
+    unit = latin_hypercube(n_train, len(varied), np.random.default_rng(seed))
+    targets = np.empty((n_train, len(OUTPUTS)))
+    for i, u in enumerate(unit):
+        x = dict(fixed, **{name: bounds[name][0] + v * (bounds[name][1] - bounds[name][0])
+                           for name, v in zip(varied, u)})
+        targets[i] = simulate_point(asset_name, asset_data, pnl_data, x, n_runs, sim['n_years'],
+                                    mode_cap(mode, pnl_data), shape['capital_events'], shocks, seed)
+
+    exponents, coefficients, degrees, logs, errors = fit_outputs(2 * unit - 1, targets, max_degree,
+                                                                 seed=seed)
+    # Bruit Monte Carlo moyen des cibles: erreur standard de final_mean (std / √n_runs)
+    noise = {'final_mean': float(targets[:, 3].mean() / math.sqrt(n_runs))}
+    return {
+        'structure': shape,
+        'features': varied,
+        'bounds': [bounds[name] for name in varied],
+        'fixed': fixed,
+        'exponents': exponents.tolist(),
+        'coefficients': {output: coefficients[:, i].tolist() for i, output in enumerate(OUTPUTS)},
+        'degrees': dict(zip(OUTPUTS, degrees)),
+        'log': dict(zip(OUTPUTS, logs)),
+        'holdout': dict(zip(OUTPUTS, errors)),
+        'noise': noise,
+        'scale': pnl_data['price_unit'] / pnl_data['capital_total'],
+        'n_train': n_train,
+        'n_runs': n_runs,
+        'elapsed_s': round(time.perf_counter() - start, 2),
+    }
+
+
+def fit(model, scopes, workers=None, source='model.json', **options):
+    """Entraîne les jobs (asset, mode) sur un pool de process. Retourne le dict de surrogate.json."""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from datetime import datetime
+
+    from checkpoint import model_digest
+
+    jobs = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fit_job, model, asset_name, mode, **options): f"{asset_name}:{mode}"
+                   for asset_name, mode in scopes}
+        for future in as_completed(futures):
+            scope = futures[future]
+            jobs[scope] = job = future.result()
+            errors = ', '.join(f"{key} {job['holdout'][output]['rmse'] * job['scale']:.3g} "
+                               f"(deg {job['degrees'][output]})"
+                               for key, output in zip(SUMMARY_KEYS[:2], OUTPUTS[:2]))
+            print(f"  ✓ {scope:<28} {len(job['features'])} dims, {job['elapsed_s']:.1f}s — RMSE hold-out: {errors}")
+    return {
+        'kind': 'risk-return-surrogate',
+        'meta': {'source': source, 'model_digest': model_digest(model),
+                 'timestamp': datetime.now().isoformat(), 'engine': 'fast', 'seed': options.get('seed', TRAIN_SEED)},
+        'jobs': {f"{asset_name}:{mode}": jobs[f"{asset_name}:{mode}"] for asset_name, mode in scopes},
+    }
+
+# =============================================================================
+# 4. REQUÊTES
+# =============================================================================
+
+class Surrogate:
+    """
+    Métamodèles de surrogate.json, lus au premier appel.
+
+    predict(scope, x) → dict OUTPUTS ou None hors domaine;
+    query(model, asset, mode, overrides) → (résumé au format results.json, info).
+    """
+
+    def __init__(self, path=SURROGATE_PATH):
+        self.path = path
+        self._jobs = None
+        self.meta = None
+
+    @property
+    def jobs(self):
+        if self._jobs is None:
+            with open(self.path) as f:
+                data = json.load(f)
+            self.meta = data['meta']
+            self._jobs = {scope: self._prepare(job) for scope, job in data['jobs'].items()}
+        return self._jobs
+
+    @staticmethod
+    def _prepare(job):
+        bounds = np.array(job['bounds'], dtype=np.float64).reshape(-1, 2)
+        exponents = np.array(job['exponents'], dtype=np.int64).reshape(-1, len(job['features']))
+        return dict(job,
+                    low=bounds[:, 0], width=bounds[:, 1] - bounds[:, 0],
+                    exponent_array=exponents, powers=np.arange(exponents.max(initial=0) + 1),
+                    legendre=legendre_powers(int(exponents.max(initial=0))).T,
+                    dims=np.arange(len(job['features'])),
+                    log_mask=np.array([job['log'][o] for o in OUTPUTS]),
+                    coefficient_matrix=np.array([job['coefficients'][o] for o in OUTPUTS]).T)
+
+    def outside(self, scope, x):
+        """Raison pour laquelle x est hors du domaine entraîné de scope (None s'il est dedans)."""
+        job = self.jobs.get(scope)
+        if job is None:
+            return f"pas de métamodèle pour {scope}"
+        for name, value in job['fixed'].items():
+            if not math.isclose(x.get(name, math.nan), value, rel_tol=1e-12, abs_tol=1e-15):
+                return f"{name}={x.get(name)!r} ≠ {value!r} (figé à l'entraînement)"
+        for name, (low, high) in zip(job['features'], job['bounds']):
+            if not low <= x[name] <= high:
+                return f"{name}={x[name]:.6g} hors de [{low:.6g}, {high:.6g}]"
+        return None
+
+    def predict(self, scope, x):
+        """Sorties OUTPUTS (par price_unit) au point x, ou None hors domaine."""
+        if self.outside(scope, x) is not None:
+            return None
+        job = self.jobs[scope]
+        z = 2 * (np.array([x[name] for name in job['features']]) - job['low']) / job['width'] - 1
+        # Un point: puissances de z puis Legendre par produit matriciel (pas de récurrence)
+        table = np.power.outer(z, job['powers']) @ job['legendre']
+        basis = table[job['dims'], job['exponent_array']].prod(axis=1)
+        y = basis @ job['coefficient_matrix']
+        # Capital et unités sont ≥ 0: return_x ≥ -1 même en bord de domaine
+        y = np.maximum(np.where(job['log_mask'], np.expm1(y), y), 0.0)
+        return dict(zip(OUTPUTS, y.tolist()))
+
+    def query(self, model, asset_name, mode, overrides=None, engine='fast'):
+        """
+        Résumé (clés de results.json 'summary') du job avec les paramètres
+        surchargés. Hors domaine: simulate_mode avec le moteur engine.
+
+        Returns:
+            (summary, info) avec info = {'source': 'surrogate' | 'engine',
+            'error': RMSE hold-out en unités du résumé, 'noise': bruit Monte
+            Carlo de return_mean à l'entraînement, 'reason', 'elapsed_s'}
+        """
+        from simulate import calculate_pnl
+
+        start = time.perf_counter()
+        if asset_name not in model['assets']:
+            raise ValueError(f"actif inconnu: {asset_name}")
+        scope = f"{asset_name}:{mode}"
+        asset_data = apply_overrides(model['assets'][asset_name], overrides)
+        pnl_data = calculate_pnl(asset_name, asset_data)
+        shape = structure({'simulation': model['simulation'], 'assets': {asset_name: asset_data}},
+                          asset_name, mode)
+        x = features(asset_data, pnl_data, shape['capital_events'])
+
+        reason = None
+        job = self.jobs.get(scope)
+        if job is None:
+            reason = f"pas de métamodèle pour {scope}"
+        elif shape != job['structure']:
+            changed = [key for key in shape if shape[key] != job['structure'].get(key)]
+            reason = f"structure différente de l'entraînement: {', '.join(changed)}"
+        else:
+            reason = self.outside(scope, x)
+
+        if reason is not None:
+            from simulate import simulate_mode
+            model = dict(model, assets=dict(model['assets'], **{asset_name: asset_data}))
+            summary = simulate_mode(model, asset_name, mode, engine, pnl_data=pnl_data)['summary']
+            return summary, {'source': 'engine', 'reason': reason,
+                             'elapsed_s': time.perf_counter() - start}
+
+        y = self.predict(scope, x)
+        scale = pnl_data['price_unit'] / pnl_data['capital_total']
+        summary = {
+            'return_mean': y['final_mean'] * scale - 1,
+            'return_p10': y['final_p10'] * scale - 1,
+            'return_p90': y['final_p90'] * scale - 1,
+            'volatility': y['final_std'] * scale,
+            'units_final_mean': y['units_final_mean'],
+        }
+        holdout = job['holdout']
+        error = {key: holdout[output]['rmse'] * (1 if key == 'units_final_mean' else scale)
+                 for key, output in zip(SUMMARY_KEYS, OUTPUTS)}
+        return summary, {'source': 'surrogate', 'error': error,
+                         'noise': job['noise']['final_mean'] * scale,
+                         'elapsed_s': time.perf_counter() - start}
+
+# =============================================================================
+# 5. EXÉCUTION
+# =============================================================================
+
+def parse_override(text):
+    key, sep, value = text.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"attendu clé=valeur, reçu {text!r}")
+    return key.strip(), float(value)
+
+
+def cmd_fit(args):
+    from simulate import MODES, asset_names, load_model
+
+    model = load_model(args.model)
+    assets = args.asset or asset_names(model)
+    scopes = [(asset_name, mode) for asset_name in assets for mode in (args.mode or MODES)]
+    print("=" * 80)
+    print(f"SURROGATE.PY — entraînement ({len(scopes)} jobs, {args.n_train} points × {args.n_runs:,} runs)")
+    print("=" * 80)
+    start = time.perf_counter()
+    data = fit(model, scopes, workers=args.workers, source=args.model, n_train=args.n_train,
+               n_runs=args.n_runs, span=args.span, pct_span=args.pct_span,
+               max_degree=args.max_degree, seed=args.seed)
+    with open(args.output, 'w') as f:
+        json.dump(data, f, indent=2)
+    print(f"\n✓ {args.output} ({time.perf_counter() - start:.1f}s)")
+    return 0
+
+
+def cmd_query(args):
+    from simulate import load_model
+
+    model = load_model(args.model)
+    surrogate = Surrogate(args.surrogate)
+    overrides = dict(args.set or [])
+    try:
+        summary, info = surrogate.query(model, args.asset, args.mode, overrides)
+        if info['source'] == 'surrogate':
+            # Deuxième appel: latence d'une requête avec surrogate.json déjà chargé
+            _, info = surrogate.query(model, args.asset, args.mode, overrides)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+    print(f"{args.asset} ({args.mode}) {' '.join(f'{k}={v:g}' for k, v in overrides.items())}")
+    if info['source'] == 'engine':
+        print(f"⚠ Moteur ({info['reason']})")
+    for key in SUMMARY_KEYS:
+        error = f"  ± {info['error'][key]:.4g} (RMSE hold-out)" if 'error' in info else ''
+        print(f"  {key:<18} {summary[key]:>12.4g}{error}")
+    if 'noise' in info:
+        print(f"  (bruit Monte Carlo à l'entraînement: ± {info['noise']:.4g} sur return_mean)")
+    print(f"✓ {info['source']} en {info['elapsed_s'] * 1e6:,.0f} µs")
+    return 0
+
+
+def cmd_check(args):
+    from simulate import calculate_pnl, load_model, make_shocks, mode_cap
+
+    model = load_model(args.model)
+    sim = model['simulation']
+    surrogate = Surrogate(args.surrogate)
+    shocks = make_shocks(model)
+    rng = np.random.default_rng(args.seed)
+    print("=" * 80)
+    print(f"SURROGATE.PY — métamodèle vs moteur fast ({args.n_points} points par job, {sim['n_runs']:,} runs)")
+    print("=" * 80)
+    print(f"{'Job':<28} {'|Δ| return_mean':>16} {'|Δ| return_p10':>16} {'RMSE hold-out':>14} {'Accélération':>13}")
+    print("-" * 91)
+    for scope, job in surrogate.jobs.items():
+        asset_name, mode = scope.split(':')
+        if asset_name not in model['assets'] or structure(model, asset_name, mode) != job['structure']:
+            print(f"{scope:<28} ⚠ structure différente de {args.model}, ignoré")
+            continue
+        asset_data = model['assets'][asset_name]
+        pnl_data = calculate_pnl(asset_name, asset_data)
+        scale = pnl_data['price_unit'] / pnl_data['capital_total']
+        asset_shocks = shocks and shocks.for_asset(asset_name, 0, sim['n_runs'], sim['n_years'])
+        deltas, times = [], [0.0, 0.0]
+        for u in rng.random((args.n_points, len(job['features']))):
+            x = dict(job['fixed'], **{name: low + v * (high - low)
+                                      for name, (low, high), v in zip(job['features'], job['bounds'], u)})
+            start = time.perf_counter()
+            y = surrogate.predict(scope, x)
+            times[0] += time.perf_counter() - start
+            start = time.perf_counter()
+            truth = simulate_point(asset_name, asset_data, pnl_data, x, sim['n_runs'], sim['n_years'],
+                                   mode_cap(mode, pnl_data), job['structure']['capital_events'],
+                                   asset_shocks, args.seed)
+            times[1] += time.perf_counter() - start
+            deltas.append([abs(y['final_mean'] - truth[0]) * scale, abs(y['final_p10'] - truth[1]) * scale])
+        deltas = np.mean(deltas, axis=0)
+        holdout = job['holdout']['final_mean']['rmse'] * scale
+        print(f"{scope:<28} {deltas[0]:>16.4f} {deltas[1]:>16.4f} {holdout:>14.4f} {times[1] / times[0]:>12,.0f}×")
+    print("\n(|Δ| inclut le bruit Monte Carlo du moteur à n_runs runs)")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Métamodèle des résumés de simulation")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_fit = sub.add_parser('fit', help="entraîner surrogate.json (hors ligne)")
+    p_fit.add_argument('--model', default='model.json')
+    p_fit.add_argument('--asset', action='append', help="actif (répétable, défaut: tous)")
+    p_fit.add_argument('--mode', action='append', choices=['without_reinvest', 'with_reinvest'])
+    p_fit.add_argument('--n-train', type=int, default=N_TRAIN, help="points d'entraînement par job")
+    p_fit.add_argument('--n-runs', type=int, default=N_RUNS_TRAIN, help="runs par point")
+    p_fit.add_argument('--span', type=float, default=SPAN, help="± relatif sur yield et les probabilités")
+    p_fit.add_argument('--pct-span', type=float, default=PCT_SPAN, help="± absolu sur pct_low/base/high")
+    p_fit.add_argument('--max-degree', type=int, default=MAX_DEGREE)
+    p_fit.add_argument('--seed', type=int, default=TRAIN_SEED)
+    p_fit.add_argument('--workers', type=int, help=f"process (défaut: {os.cpu_count()})")
+    p_fit.add_argument('--output', default=SURROGATE_PATH)
+    p_fit.set_defaults(func=cmd_fit)
+
+    p_query = sub.add_parser('query', help="résumé d'un job avec paramètres modifiés")
+    p_query.add_argument('--model', default='model.json')
+    p_query.add_argument('--surrogate', default=SURROGATE_PATH)
+    p_query.add_argument('--asset', required=True)
+    p_query.add_argument('--mode', choices=['without_reinvest', 'with_reinvest'], default='without_reinvest')
+    p_query.add_argument('--set', type=parse_override, action='append', metavar='CLÉ=VALEUR',
+                         help="paramètre config/inputs/risks (répétable)")
+    p_query.set_defaults(func=cmd_query)
+
+    p_check = sub.add_parser('check', help="comparer le métamodèle au moteur sur des points tirés")
+    p_check.add_argument('--model', default='model.json')
+    p_check.add_argument('--surrogate', default=SURROGATE_PATH)
+    p_check.add_argument('--n-points', type=int, default=10)
+    p_check.add_argument('--seed', type=int, default=1)
+    p_check.set_defaults(func=cmd_check)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,297 @@
+"""
+TAIL.PY — Queues de distribution par importance sampling
+=========================================================
+Flow: model.json → tail.py → quantiles extrêmes + probabilité de ruine (stdout / JSON)
+
+Le p1 du rendement et la probabilité de perdre tout le troupeau viennent
+de séries de pertes rares: en Monte Carlo simple il faut énormément de
+runs pour les estimer. Ici:
+
+1. Le moteur fast tire les pertes avec une probabilité inclinée p' > p_loss_total
+   (plus de runs dans la queue), et chaque run porte son poids de
+   vraisemblance w = (p/p')^L · ((1-p)/(1-p'))^(T-L)
+2. p' est choisi par cross-entropy: quelques passes pilotes visent
+   l'événement « rendement ≤ quantile q » (la mise à jour optimale pour une
+   loi de Bernoulli est p' = Σ w·L / Σ w·T sur les runs de l'événement)
+3. Les estimateurs sont repondérés (sans normalisation, donc sans biais):
+       F(x)    = moyenne de w · 1{rendement ≤ x}
+       P(ruine) = moyenne de w · 1{ruine}
+   IC à 95 %: erreur standard de la moyenne; pour un quantile, inversion
+   de l'IC de F au point estimé.
+4. Garde-fou sur le run final, comme sur les pilotes: tant que son ESS
+   reste sous MIN_ESS_FRACTION des runs, p' est rapproché de p (pas divisé
+   par deux). Si l'ESS reste trop faible, ou si l'erreur standard de F au
+   quantile visé dépasse celle d'un Monte Carlo simple de même taille,
+   l'importance sampling est abandonné: le job est recalculé en Monte
+   Carlo simple (signalé par ⚠), comme quand p_loss_total = 0 (pas de queue
+   à incliner, même avec --tilt).
+
+Ruine = plus aucune unité à une fin d'année (troupeau entièrement perdu).
+« Équiv. MC » = nombre de runs qu'il faudrait en Monte Carlo simple pour
+la même erreur standard: F(1-F) / se², avec F estimé au point publié (et
+non le niveau nominal q: sur un atome, comme la ruine à -100 %, F(x) > q).
+
+Gain mesuré sur le modèle par défaut (20 000 runs, --compare, rapport des
+variances): ~10 à 15× pour le Bétail sans réinvestissement (ruine ~1 %),
+~3× avec réinvestissement, ~1,3 à 2,5× pour l'Embouche (ruine ~11 %, pas
+rare). Pas des ordres de grandeur: p_loss_total = 0,2 n'est pas rare.
+
+Usage:
+    python3 tail.py                                  # embouche et betail, 2 modes
+    python3 tail.py --asset embouche --n-runs 20000
+    python3 tail.py --tilt 0.45 --compare            # p' fixé + MC simple de même taille
+    python3 tail.py --output tail.json
+"""
+
+import argparse
+import json
+import math
+
+import numpy as np
+
+from engine import simulate_asset_fast
+from simulate import MODES, calculate_pnl, load_model, mode_cap
+
+Z_95 = 1.959963984540054
+DEFAULT_ASSETS = ['embouche', 'betail']
+DEFAULT_QUANTILES = [0.01, 0.05]
+PILOT_RUNS = 5000
+PILOT_ITERATIONS = 3
+MAX_TILT = 0.95
+MIN_ESS_FRACTION = 0.10
+MAX_HALVINGS = 6
+
+# =============================================================================
+# 1. ESTIMATEURS PONDÉRÉS
+# =============================================================================
+
+def weighted_probability(event, weights):
+    """P(event) sous la loi nominale: (estimation, IC bas, IC haut, erreur standard)."""
+    terms = event * weights
+    p = float(terms.mean())
+    se = float(terms.std(ddof=1) / math.sqrt(len(terms)))
+    return p, max(p - Z_95 * se, 0.0), p + Z_95 * se, se
+
+
+def weighted_quantile(values, weights, q):
+    """Quantile q sous la loi nominale: (estimation, IC bas, IC haut, se de F au point, F au point)."""
+    order = np.argsort(values, kind='stable')
+    sorted_values = values[order]
+    cdf = np.cumsum(weights[order]) / len(values)
+
+    def inverse(level):
+        index = int(np.searchsorted(cdf, level, side='left'))
+        return float(sorted_values[min(index, len(values) - 1)])
+
+    x = inverse(q)
+    f, _, _, se = weighted_probability(values <= x, weights)
+    return x, inverse(max(q - Z_95 * se, 0.0)), inverse(q + Z_95 * se), se, f
+
+
+def effective_sample_size(weights):
+    return float(weights.sum() ** 2 / (weights ** 2).sum())
+
+# =============================================================================
+# 2. SIMULATION INCLINÉE
+# =============================================================================
+
+def run_tilted(model, asset_name, mode, n_runs, p_tilt, rng):
+    """Runs du moteur fast avec pertes tirées à p_tilt. Retourne (returns, ruined, importance)."""
+    sim = model['simulation']
+    asset_data = model['assets'][asset_name]
+    pnl_data = calculate_pnl(asset_name, asset_data)
+    importance = {'p_loss': p_tilt}
+    _, capitals, units = simulate_asset_fast(
+        asset_name, asset_data, pnl_data, n_runs, sim['n_years'], mode_cap(mode, pnl_data),
+        rng=rng, capital_events=sim.get('capital_events', False), importance=importance)
+    returns = capitals[:, -1] / pnl_data['capital_total'] - 1
+    ruined = (units[:, 1:] == 0).any(axis=1)
+    return returns, ruined, importance
+
+
+def cross_entropy_tilt(model, asset_name, mode, q, rng, n_pilot=PILOT_RUNS,
+                       iterations=PILOT_ITERATIONS):
+    """
+    p' qui concentre les runs sur l'événement « rendement ≤ quantile q ».
+
+    Mise à jour cross-entropy, puis garde-fou: les runs ruinés tôt (peu
+    d'essais, presque tous perdus) tirent p' trop haut et les poids
+    dégénèrent. Le pas est divisé par deux tant que l'ESS du pilote au
+    nouveau p' reste sous MIN_ESS_FRACTION.
+    """
+    p_loss = model['assets'][asset_name]['risks']['capital']['p_loss_total']
+    p_tilt = p_loss
+    returns, _, importance = run_tilted(model, asset_name, mode, n_pilot, p_tilt, rng)
+    for _ in range(iterations):
+        weights = np.exp(importance['log_weights'])
+        level, _, _, _, _ = weighted_quantile(returns, weights, q)
+        event = returns <= level
+        trials = (weights * event * importance['trials']).sum()
+        if trials == 0:
+            break
+        target = float((weights * event * importance['losses']).sum() / trials)
+        target = min(max(target, p_loss), MAX_TILT)
+        for _ in range(MAX_HALVINGS):
+            pilot = run_tilted(model, asset_name, mode, n_pilot, target, rng)
+            if effective_sample_size(np.exp(pilot[2]['log_weights'])) >= MIN_ESS_FRACTION * n_pilot:
+                break
+            target = (target + p_tilt) / 2
+        else:
+            break
+        p_tilt = target
+        returns, _, importance = pilot
+    return p_tilt
+
+
+def importance_failure(returns, weights, q):
+    """
+    Raison d'abandonner l'importance sampling du run final (None s'il tient):
+    ESS trop faible, ou F au quantile q moins précis qu'en Monte Carlo simple.
+    """
+    n_runs = len(returns)
+    ess = effective_sample_size(weights)
+    if ess < MIN_ESS_FRACTION * n_runs:
+        return f"ESS {ess:,.0f} < {MIN_ESS_FRACTION:.0%} des runs"
+    _, _, _, se, f = weighted_quantile(returns, weights, q)
+    plain_se = math.sqrt(f * (1 - f) / n_runs)
+    if se > plain_se:
+        return f"erreur standard de F(p{q * 100:g}) {se:.2e} > Monte Carlo simple {plain_se:.2e}"
+    return None
+
+
+def estimate_tail(model, asset_name, mode, n_runs, seed, quantiles=DEFAULT_QUANTILES, tilt=None):
+    """
+    Quantiles de queue et probabilité de ruine d'un job actif × mode.
+
+    Args:
+        tilt: p' imposé; None = cross-entropy, p_loss_total = Monte Carlo simple
+
+    Returns:
+        dict sérialisable (JSON)
+    """
+    rng = np.random.default_rng(seed)
+    p_loss = model['assets'][asset_name]['risks']['capital']['p_loss_total']
+    fallback = None
+    if p_loss == 0 and tilt not in (None, 0):
+        fallback = "p_loss_total = 0, pas de queue à incliner"
+        tilt = p_loss
+    if tilt is None:
+        tilt = cross_entropy_tilt(model, asset_name, mode, min(quantiles), rng) if p_loss > 0 else p_loss
+
+    returns, ruined, importance = run_tilted(model, asset_name, mode, n_runs, tilt, rng)
+    weights = np.exp(importance['log_weights'])
+
+    if tilt != p_loss:
+        for _ in range(MAX_HALVINGS):
+            if effective_sample_size(weights) >= MIN_ESS_FRACTION * n_runs:
+                break
+            tilt = (tilt + p_loss) / 2
+            returns, ruined, importance = run_tilted(model, asset_name, mode, n_runs, tilt, rng)
+            weights = np.exp(importance['log_weights'])
+        fallback = importance_failure(returns, weights, min(quantiles))
+        if fallback is not None:
+            tilt = p_loss
+            returns, ruined, importance = run_tilted(model, asset_name, mode, n_runs, tilt, rng)
+            weights = np.exp(importance['log_weights'])
+
+    result = {
+        'asset': asset_name,
+        'mode': mode,
+        'n_runs': n_runs,
+        'p_loss': p_loss,
+        'p_tilt': tilt,
+        'ess': effective_sample_size(weights),
+        'fallback': fallback,
+        'quantiles': {},
+    }
+    for q in quantiles:
+        x, low, high, se, f = weighted_quantile(returns, weights, q)
+        result['quantiles'][f"p{q * 100:g}"] = {
+            'value': x, 'ci': [low, high], 'se': se,
+            'mc_equivalent_runs': f * (1 - f) / se ** 2 if se > 0 else None,
+        }
+    p, low, high, se = weighted_probability(ruined, weights)
+    result['ruin'] = {
+        'probability': p, 'ci': [low, high], 'se': se,
+        'mc_equivalent_runs': p * (1 - p) / se ** 2 if se > 0 else None,
+    }
+    return result
+
+# =============================================================================
+# 3. EXÉCUTION
+# =============================================================================
+
+def _runs(value):
+    return f"{value:>11,.0f}" if value else f"{'—':>11}"
+
+
+def print_result(result, label):
+    print(f"\n{result['asset']} / {result['mode']} — {label}: p={result['p_loss']:g} → "
+          f"p'={result['p_tilt']:.3f}, {result['n_runs']:,} runs, ESS={result['ess']:,.0f}")
+    if result['fallback']:
+        print(f"  ⚠ Importance sampling abandonné ({result['fallback']}): Monte Carlo simple")
+    print(f"  {'':<8} {'Estimation':>12} {'IC 95 %':>24} {'Équiv. MC':>11}")
+    for name, block in result['quantiles'].items():
+        low, high = block['ci']
+        print(f"  {name:<8} {block['value']:>12.1%} {f'[{low:.1%}, {high:.1%}]':>24} "
+              f"{_runs(block['mc_equivalent_runs'])}")
+    ruin = result['ruin']
+    low, high = ruin['ci']
+    print(f"  {'ruine':<8} {ruin['probability']:>12.2e} {f'[{low:.2e}, {high:.2e}]':>24} "
+          f"{_runs(ruin['mc_equivalent_runs'])}")
+
+
+def print_gain(tilted, plain):
+    """Gain mesuré: rapport des variances MC simple / importance sampling, à runs égaux."""
+    blocks = [(name, block, plain['quantiles'][name]) for name, block in tilted['quantiles'].items()]
+    blocks.append(('ruine', tilted['ruin'], plain['ruin']))
+    gains = [f"{name} {(ref['se'] / block['se']) ** 2:.1f}×" if block['se'] > 0 and ref['se'] > 0
+             else f"{name} —" for name, block, ref in blocks]
+    print(f"  Gain mesuré (se² MC simple / se² importance sampling): {', '.join(gains)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Queues de distribution par importance sampling")
+    parser.add_argument('--model', default='model.json')
+    parser.add_argument('--asset', action='append', help=f"actif (répétable, défaut: {DEFAULT_ASSETS})")
+    parser.add_argument('--mode', choices=MODES, action='append', help="défaut: les 2 modes")
+    parser.add_argument('--n-runs', type=int, default=10000)
+    parser.add_argument('--seed', type=int, help="défaut: simulation.seed")
+    parser.add_argument('--tilt', type=float, help="p' imposé (défaut: cross-entropy)")
+    parser.add_argument('--compare', action='store_true',
+                        help="ajouter le Monte Carlo simple avec le même nombre de runs")
+    parser.add_argument('--output', metavar='PATH', help="écrire les résultats en JSON")
+    args = parser.parse_args(argv)
+
+    model = load_model(args.model)
+    seed = model['simulation']['seed'] if args.seed is None else args.seed
+    if 'shocks' in model['simulation']:
+        print("✗ simulation.shocks: l'inclinaison de p_loss_total suppose des pertes indépendantes")
+        return 1
+
+    print("=" * 80)
+    print("TAIL.PY — Importance sampling sur p_loss_total")
+    print("=" * 80)
+
+    results = []
+    for asset_name in args.asset or DEFAULT_ASSETS:
+        for mode in args.mode or MODES:
+            result = estimate_tail(model, asset_name, mode, args.n_runs, seed, tilt=args.tilt)
+            print_result(result, 'importance sampling')
+            results.append(result)
+            if args.compare:
+                p_loss = model['assets'][asset_name]['risks']['capital']['p_loss_total']
+                plain = estimate_tail(model, asset_name, mode, args.n_runs, seed, tilt=p_loss)
+                print_result(plain, 'Monte Carlo simple')
+                print_gain(result, plain)
+                results.append(plain)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
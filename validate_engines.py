@@ -0,0 +1,213 @@
+"""
+VALIDATE_ENGINES.PY — Équivalence statistique legacy vs moteur rapide
+======================================================================
+Flow: model.json → simulate_asset (legacy) + moteur candidat → verdict
+
+Pourquoi: EMBOUCHE_MODEL_BUG_ANALYSIS.md montre qu'une erreur dans la
+logique de pertes de capital fait passer le P10 d'embouche de -71.5% à
++5.7% sans que rien ne "casse". Un moteur plus rapide doit donc produire
+les MÊMES distributions que la boucle de référence, pas seulement des
+moyennes proches.
+
+Tests par actif × mode, pour chaque année de revenues, capitals et units
+(+ rendement final):
+- Kolmogorov-Smirnov à deux échantillons (forme de la distribution)
+- Moyenne: écart / erreur standard (Welch)
+- Quantiles: la fréquence empirique legacy au quantile candidat doit
+  rester dans ± z · sqrt(q(1-q)(1/n_a + 1/n_b)) de q
+
+Seuil global alpha corrigé par Bonferroni sur le nombre de tests.
+
+Profils:
+    python3 validate_engines.py                     # smoke: chaque commit (~secondes)
+    python3 validate_engines.py --profile release   # haute puissance: avant release
+"""
+
+import argparse
+import math
+import sys
+
+import numpy as np
+
+from simulate import CAP_INFINITE, ENGINES, asset_names, calculate_pnl, load_model, run_engine
+
+PROFILES = {
+    'smoke': {'n_runs': 2000, 'alpha': 1e-3, 'quantiles': [0.1, 0.5, 0.9]},
+    'release': {'n_runs': 50000, 'alpha': 1e-3, 'quantiles': [0.01, 0.1, 0.5, 0.9, 0.99]},
+}
+
+# Décalage de seed: les deux moteurs ne doivent jamais partager leurs tirages
+CANDIDATE_SEED_OFFSET = 1_000_003
+
+MAX_FAILURES_SHOWN = 20
+
+# =============================================================================
+# 1. TESTS À DEUX ÉCHANTILLONS
+# =============================================================================
+
+def normal_sf(z):
+    """P(Z > z) pour Z ~ N(0, 1)."""
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def ks_2samp(a, b):
+    """
+    Statistique D et p-value asymptotique (Numerical Recipes, kstwo).
+    Conservatif pour les données discrètes (units).
+    """
+    a = np.sort(a)
+    b = np.sort(b)
+    grid = np.concatenate([a, b])
+    cdf_a = np.searchsorted(a, grid, side='right') / len(a)
+    cdf_b = np.searchsorted(b, grid, side='right') / len(b)
+    d = float(np.max(np.abs(cdf_a - cdf_b)))
+
+    n_eff = len(a) * len(b) / (len(a) + len(b))
+    lam = (math.sqrt(n_eff) + 0.12 + 0.11 / math.sqrt(n_eff)) * d
+    if lam < 1e-3:
+        return d, 1.0
+    p = 0.0
+    for k in range(1, 101):
+        term = 2 * (-1) ** (k - 1) * math.exp(-2 * k * k * lam * lam)
+        p += term
+        if abs(term) < 1e-12:
+            break
+    return d, min(max(p, 0.0), 1.0)
+
+
+def mean_test(a, b):
+    """Différence de moyennes / erreur standard (Welch). Retourne (écart, z)."""
+    diff = float(b.mean() - a.mean())
+    se = math.sqrt(a.var(ddof=1) / len(a) + b.var(ddof=1) / len(b))
+    if se == 0:
+        return diff, (0.0 if diff == 0 else math.inf)
+    return diff, abs(diff) / se
+
+
+def quantile_test(a, b, q):
+    """
+    Position du quantile q du candidat dans la distribution legacy.
+    Retourne l'écart (en fréquence) hors de [F(x-), F(x)], 0 si q est dedans,
+    et l'erreur standard attendue.
+    """
+    x = np.percentile(b, q * 100)
+    a_sorted = np.sort(a)
+    f_below = np.searchsorted(a_sorted, x, side='left') / len(a)
+    f_at = np.searchsorted(a_sorted, x, side='right') / len(a)
+    gap = max(f_below - q, q - f_at, 0.0)
+    se = math.sqrt(q * (1 - q) * (1 / len(a) + 1 / len(b)))
+    return gap, se
+
+# =============================================================================
+# 2. COMPARAISON D'UN ACTIF × MODE
+# =============================================================================
+
+def compare_samples(label, a, b, quantiles):
+    """Liste de (label, test, statistique, p-value) pour un échantillon."""
+    checks = []
+    if np.all(a == a[0]) and np.all(b == b[0]):
+        # Colonne constante (ex: capital Y0): égalité exacte exigée
+        checks.append((label, 'const', float(b[0] - a[0]), a[0] == b[0]))
+        return checks
+
+    d, p_ks = ks_2samp(a, b)
+    checks.append((label, 'ks', d, p_ks))
+
+    diff, z = mean_test(a, b)
+    checks.append((label, 'mean', diff, 2 * normal_sf(z)))
+
+    for q in quantiles:
+        gap, se = quantile_test(a, b, q)
+        p_q = 1.0 if gap == 0 else 2 * normal_sf(gap / se)
+        checks.append((label, f'q{q:g}', gap, p_q))
+    return checks
+
+
+def compare_engines(model, candidate, n_runs, seed, quantiles):
+    """Lance legacy et candidat sur model, retourne toutes les vérifications."""
+    n_years = model['simulation']['n_years']
+    checks = []
+
+    for asset_name in asset_names(model):
+        asset_data = model['assets'][asset_name]
+        pnl_data = calculate_pnl(asset_name, asset_data)
+        initial_capital = pnl_data['capital_total']
+
+        for mode, cap_units in [('without_reinvest', pnl_data['n_units']),
+                                ('with_reinvest', CAP_INFINITE)]:
+            ref = run_engine('legacy', asset_name, asset_data, pnl_data,
+                             n_runs, n_years, cap_units, seed)
+            new = run_engine(candidate, asset_name, asset_data, pnl_data,
+                             n_runs, n_years, cap_units, seed + CANDIDATE_SEED_OFFSET)
+
+            for metric, a_mat, b_mat in zip(['revenues', 'capitals', 'units'], ref, new):
+                offset = 1 if metric == 'revenues' else 0
+                for col in range(a_mat.shape[1]):
+                    label = f"{asset_name}:{mode}:{metric}:Y{col + offset}"
+                    checks += compare_samples(label, a_mat[:, col], b_mat[:, col], quantiles)
+
+            ret_a = ref[1][:, -1] / initial_capital - 1
+            ret_b = new[1][:, -1] / initial_capital - 1
+            checks += compare_samples(f"{asset_name}:{mode}:return", ret_a, ret_b, quantiles)
+
+    return checks
+
+# =============================================================================
+# 3. EXÉCUTION
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Équivalence legacy vs moteur rapide")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='smoke')
+    parser.add_argument('--engine', choices=sorted(set(ENGINES) - {'legacy'}), default='fast',
+                        help="moteur candidat")
+    parser.add_argument('--model', default='model.json')
+    parser.add_argument('--n-runs', type=int, help="remplace n_runs du profil")
+    parser.add_argument('--seed', type=int, help="remplace simulation.seed")
+    args = parser.parse_args(argv)
+
+    profile = PROFILES[args.profile]
+    model = load_model(args.model)
+    n_runs = args.n_runs or profile['n_runs']
+    seed = model['simulation']['seed'] if args.seed is None else args.seed
+
+    print("=" * 80)
+    print(f"VALIDATE_ENGINES.PY — legacy vs {args.engine} (profil {args.profile})")
+    print("=" * 80)
+    print(f"\n{n_runs} runs × {model['simulation']['n_years']} années par moteur, seed={seed}")
+
+    checks = compare_engines(model, args.engine, n_runs, seed, profile['quantiles'])
+    n_stat = sum(1 for c in checks if c[1] != 'const')
+    alpha_test = profile['alpha'] / max(n_stat, 1)
+    print(f"{len(checks)} vérifications, alpha global={profile['alpha']:g} "
+          f"(Bonferroni: {alpha_test:.2e} par test)")
+
+    failures = []
+    for label, test, stat, p in checks:
+        ok = p if test == 'const' else p >= alpha_test
+        if not ok:
+            failures.append((label, test, stat, p))
+
+    worst = sorted((c for c in checks if c[1] != 'const'), key=lambda c: c[3])[:5]
+    print("\nTests les plus serrés:")
+    print("-" * 80)
+    for label, test, stat, p in worst:
+        print(f"  {label:<45} {test:<6} stat={stat:>12.4g}  p={p:.2e}")
+
+    print("\n" + "=" * 80)
+    if failures:
+        print(f"✗ {len(failures)} ÉCHEC(S):")
+        for label, test, stat, p in failures[:MAX_FAILURES_SHOWN]:
+            print(f"  {label:<45} {test:<6} stat={stat:>12.4g}  p={p:.2e}")
+        if len(failures) > MAX_FAILURES_SHOWN:
+            print(f"  ... et {len(failures) - MAX_FAILURES_SHOWN} autres")
+        print("=" * 80)
+        return 1
+
+    print(f"✓ {args.engine} équivalent à legacy ({len(checks)} vérifications)")
+    print("=" * 80)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,332 @@
+"""
+WATCH.PY — Mise à jour incrémentale à chaque sauvegarde de model.json
+======================================================================
+Flow: model.json (édité) → diff par actif × section → jobs touchés → results.json
+      → charts dont un bloc a changé → cellules Excel modifiées
+
+Au lieu de relancer simulate.py, charts.py et excel_writer.py en entier:
+- Diff de model.json par actif et par section (config, inputs, risks.revenue,
+  risks.capital, pnl, excel_mapping...). Une modification de simulation
+  relance tout; une modification de excel_mapping ne relance aucune simulation
+- Seuls les jobs actif × mode (et les trajectoires) des actifs touchés sont
+  resimulés. Chaque job a son propre seed: results.json est identique à
+  celui d'un simulate.py complet (hors timestamp)
+- Seuls les charts qui lisent un bloc de results.json qui a changé sont
+  redessinés (charts.CHARTS déclare les blocs lus par chaque chart)
+- Seules les cellules Excel dont la valeur change sont réécrites
+  (TemplateFiller.update), puis le classeur est sauvegardé
+
+Détection: polling du mtime toutes les --interval secondes. Un model.json
+invalide (JSON en cours d'écriture, paramètres refusés) est signalé et
+ignoré: l'état précédent reste en place jusqu'à la prochaine sauvegarde.
+
+Usage:
+    python3 watch.py                                   # simulation + charts + Excel
+    python3 watch.py --engine fast --no-excel
+    python3 watch.py --template template.xlsx --interval 0.2
+"""
+
+import argparse
+import json
+import os
+import time
+
+from budget import parse_size, plan_chunks
+from params import ParameterError
+from simulate import (ENGINES, MODES, asset_names, build_results, calculate_pnl, fast_only_errors,
+                      load_model, mode_cap, n_shock_factors, simulate_mode, simulate_trajectories)
+
+# Sections d'un actif que la simulation ne lit pas
+PRESENTATION_SECTIONS = {'excel_mapping'}
+
+# Mêmes défauts qu'excel_writer.py, importé seulement si Excel est demandé (openpyxl)
+TEMPLATE_PATH = '/mnt/user-data/uploads/unit_economics-6.xlsx'
+OUTPUT_PATH = 'unit_economics_output.xlsx'
+
+# =============================================================================
+# 1. DIFF DE model.json
+# =============================================================================
+
+def asset_sections(asset_data):
+    """{section: contenu} d'un actif, risks éclaté en risks.revenue / risks.capital."""
+    sections = {}
+    for key, value in asset_data.items():
+        if key == 'risks':
+            for sub, block in value.items():
+                sections[f"risks.{sub}"] = block
+        else:
+            sections[key] = value
+    return sections
+
+
+def diff_models(old, new):
+    """
+    Returns:
+        simulation_changed: bool (bloc simulation modifié)
+        assets: {actif: [sections modifiées]}, ['*'] pour un actif ajouté ou supprimé
+    """
+    assets = {}
+    for asset_name in sorted(old['assets'].keys() | new['assets'].keys()):
+        a, b = old['assets'].get(asset_name), new['assets'].get(asset_name)
+        if a is None or b is None:
+            assets[asset_name] = ['*']
+            continue
+        sa, sb = asset_sections(a), asset_sections(b)
+        changed = sorted(key for key in sa.keys() | sb.keys() if sa.get(key) != sb.get(key))
+        if changed:
+            assets[asset_name] = changed
+    return old['simulation'] != new['simulation'], assets
+
+
+def changed_blocks(old, new, all_blocks):
+    """Blocs 'mode.métrique' et 'trajectories' de results.json qui diffèrent."""
+    if old is None or old['meta']['n_years'] != new['meta']['n_years']:
+        return set(all_blocks)
+    blocks = set()
+    for mode in MODES:
+        old_mode, new_mode = old['simulation'][mode], new['simulation'][mode]
+        for asset_name in old_mode.keys() | new_mode.keys():
+            a, b = old_mode.get(asset_name, {}), new_mode.get(asset_name, {})
+            blocks.update(f"{mode}.{metric}" for metric in a.keys() | b.keys()
+                          if a.get(metric) != b.get(metric))
+    if old['trajectories'] != new['trajectories']:
+        blocks.add('trajectories')
+    return blocks
+
+# =============================================================================
+# 2. PIPELINE INCRÉMENTAL
+# =============================================================================
+
+def budget_plans(model, pnl, budget):
+    """Plans de chunks par job, comme results['meta']['memory_budget'] de simulate.py."""
+    sim = model['simulation']
+    return {f"{asset_name}:{mode}": plan_chunks(budget, model['assets'][asset_name], pnl[asset_name],
+                                               sim['n_runs'], sim['n_years'],
+                                               mode_cap(mode, pnl[asset_name]),
+                                               float32=sim.get('float32', False),
+                                               n_shock_factors=n_shock_factors(model))
+            for asset_name in asset_names(model) for mode in MODES}
+
+
+def resolve_budget(model, budget=None):
+    """Octets du budget mémoire: --memory-budget, sinon simulation.memory_budget (comme simulate.py)."""
+    if budget is not None:
+        return budget
+    text = model['simulation'].get('memory_budget')
+    return None if text is None else parse_size(text)
+
+
+class Pipeline:
+    """
+    État de la dernière mise à jour: model, résultats par job, results.json.
+
+    Args:
+        engine: moteur de simulation (None = simulation.engine ou 'legacy')
+        budget: octets (--memory-budget) ou None = simulation.memory_budget du modèle
+        charts: module charts (None = pas de charts)
+        filler: excel_writer.TemplateFiller (None = pas d'Excel)
+    """
+
+    def __init__(self, engine=None, budget=None, charts=None, filler=None,
+                 results_path='results.json', excel_path=OUTPUT_PATH):
+        self.engine = engine
+        self.budget = budget
+        self.charts = charts
+        self.filler = filler
+        self.results_path = results_path
+        self.excel_path = excel_path
+        self.model = None
+        self.results = None
+        self.results_mode = {mode: {} for mode in MODES}
+        self.trajectories = {}
+
+    def update(self, model):
+        """Applique model (déjà validé). Retourne le détail de ce qui a été refait."""
+        timings = {}
+        report = {'assets': [], 'charts': [], 'cells': []}
+
+        if self.model is None:
+            to_simulate = asset_names(model)
+        else:
+            simulation_changed, assets = diff_models(self.model, model)
+            report['diff'] = assets
+            if simulation_changed:
+                report['diff'] = dict(assets, simulation=['*'])
+                to_simulate = asset_names(model)
+            else:
+                to_simulate = [asset_name for asset_name, sections in assets.items()
+                               if asset_name in model['assets']
+                               and set(sections) - PRESENTATION_SECTIONS]
+
+        start = time.perf_counter()
+        engine = self.engine or model['simulation'].get('engine', 'legacy')
+        budget = resolve_budget(model, self.budget)
+        pnl = {asset_name: calculate_pnl(asset_name, model['assets'][asset_name])
+               for asset_name in asset_names(model)}
+        for asset_name in to_simulate:
+            for mode in MODES:
+                self.results_mode[mode][asset_name] = simulate_mode(
+                    model, asset_name, mode, engine, pnl_data=pnl[asset_name], budget=budget)
+            self.trajectories[asset_name] = simulate_trajectories(
+                model, asset_name, pnl_data=pnl[asset_name])
+        report['assets'] = to_simulate
+
+        results = build_results(model, pnl, self.results_mode, self.trajectories, engine)
+        if budget is not None:
+            results['meta']['memory_budget'] = {'bytes': budget, 'jobs': budget_plans(model, pnl, budget)}
+        if to_simulate or self.results is None:
+            with open(self.results_path, 'w') as f:
+                json.dump(results, f, indent=2)
+        timings['simulation'] = time.perf_counter() - start
+
+        if self.charts is not None:
+            start = time.perf_counter()
+            all_blocks = {dep for _, _, deps in self.charts.CHARTS for dep in deps}
+            names = self.charts.charts_depending_on(changed_blocks(self.results, results, all_blocks))
+            if names:
+                self.charts.render(results, names)
+            report['charts'] = names
+            timings['charts'] = time.perf_counter() - start
+
+        if self.filler is not None:
+            start = time.perf_counter()
+            report['cells'], report['excel_errors'] = self.filler.update(model, self.excel_path)
+            timings['excel'] = time.perf_counter() - start
+
+        self.model = model
+        self.results = results
+        report['timings'] = timings
+        return report
+
+# =============================================================================
+# 3. BOUCLE DE SURVEILLANCE
+# =============================================================================
+
+def print_report(report):
+    if 'diff' in report:
+        for asset_name, sections in report['diff'].items():
+            print(f"  Δ {asset_name}: {', '.join(sections)}")
+    print(f"  Simulés: {', '.join(report['assets']) or '—'}")
+    if 'charts' in report['timings']:
+        print(f"  Charts:  {len(report['charts'])} redessiné(s)"
+              f"{': ' + ', '.join(report['charts']) if report['charts'] else ''}")
+    if 'excel' in report['timings']:
+        print(f"  Excel:   {len(report['cells'])} cellule(s) réécrite(s)")
+        for cell, old, new in report['cells']:
+            print(f"    {cell}: {old!r} → {new!r}")
+        for err in report['excel_errors']:
+            print(err)
+    detail = ', '.join(f"{phase} {seconds:.2f}s" for phase, seconds in report['timings'].items())
+    print(f"✓ Mis à jour en {sum(report['timings'].values()):.2f}s ({detail})")
+
+
+def load_checked(path, engine=None, budget=None):
+    """
+    model.json validé, ou None (message affiché) s'il est illisible, invalide,
+    demande des options que le moteur (engine, sinon simulation.engine) n'a pas
+    ou un simulation.memory_budget illisible (sans --memory-budget).
+    """
+    try:
+        model = load_model(path)
+    except json.JSONDecodeError as e:
+        print(f"✗ {path}: JSON invalide ({e}), en attente de la prochaine sauvegarde")
+        return None
+    except ParameterError as e:
+        errors = e.errors
+    else:
+        errors = fast_only_errors(model, engine or model['simulation'].get('engine', 'legacy'))
+        try:
+            resolve_budget(model, budget)
+        except ValueError as e:
+            errors.append(f"simulation.memory_budget: {e}")
+        if not errors:
+            return model
+    print(f"✗ {path} invalide:")
+    for err in errors:
+        print(f"  {err}")
+    return None
+
+
+def watch(path, pipeline, interval):
+    last_mtime = os.stat(path).st_mtime_ns
+    while True:
+        time.sleep(interval)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            continue  # remplacement atomique par l'éditeur en cours
+        if mtime == last_mtime:
+            continue
+        last_mtime = mtime
+        print(f"\n[{time.strftime('%H:%M:%S')}] {path} modifié")
+        model = load_checked(path, pipeline.engine, pipeline.budget)
+        if model is None:
+            continue
+        if model == pipeline.model:
+            print("  Aucun changement de contenu")
+            continue
+        try:
+            report = pipeline.update(model)
+        except ValueError as e:
+            # Ex.: --memory-budget trop petit pour le nouveau modèle
+            print(f"✗ {e}, en attente de la prochaine sauvegarde")
+            continue
+        print_report(report)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mise à jour incrémentale sur modification de model.json")
+    parser.add_argument('--model', default='model.json')
+    parser.add_argument('--engine', choices=sorted(ENGINES),
+                        help="moteur de simulation (défaut: simulation.engine ou 'legacy')")
+    parser.add_argument('--memory-budget', metavar='SIZE', help="comme simulate.py --memory-budget")
+    parser.add_argument('--template', default=TEMPLATE_PATH, help="template Excel")
+    parser.add_argument('--no-charts', action='store_true')
+    parser.add_argument('--no-excel', action='store_true')
+    parser.add_argument('--interval', type=float, default=0.5, help="secondes entre deux vérifications")
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print(f"WATCH.PY — surveillance de {args.model} (Ctrl+C pour arrêter)")
+    print("=" * 80)
+
+    charts = None
+    if not args.no_charts:
+        import charts  # matplotlib: import seulement si les charts sont demandés
+
+    filler = None
+    if not args.no_excel:
+        if os.path.exists(args.template):
+            from excel_writer import TemplateFiller  # openpyxl: import seulement si Excel est demandé
+            filler = TemplateFiller(args.template)
+        else:
+            print(f"⚠ Template introuvable ({args.template}): Excel désactivé")
+
+    budget = None
+    if args.memory_budget:
+        try:
+            budget = parse_size(args.memory_budget)
+        except ValueError as e:
+            print(f"✗ --memory-budget: {e}")
+            return 1
+    pipeline = Pipeline(args.engine, budget, charts, filler)
+
+    model = load_checked(args.model, args.engine, budget)
+    if model is None:
+        return 1
+    print("\nPremier passage (tout)...")
+    try:
+        print_report(pipeline.update(model))
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+
+    try:
+        watch(args.model, pipeline, args.interval)
+    except KeyboardInterrupt:
+        print("\n✓ Arrêt")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())